@@ -14,12 +14,12 @@ def get_env_bool(name: str, required: bool = False) -> bool:
   return value.lower() in ("1", "true", "yes", "on")
 
 
-def get_env_float(name: str, required: bool = False) -> float:
+def get_env_float(name: str, required: bool = False, default: float = 0.0) -> float:
   value = os.getenv(name)
   if value is None:
     if required:
       raise EnvironmentError(f"Missing required environment variable: {name}")
-    return 0.0
+    return default
   try:
     return float(value)
   except ValueError:
@@ -45,6 +45,24 @@ def get_env_str(name: str, required: bool = False, default: str = "") -> str:
 # --- Config ---
 DEFAULT_TIMEOUT_ORDERS = get_env_float("DEFAULT_TIMEOUT_ORDERS", required=True)
 SLIPPAGE = get_env_float("SLIPPAGE", required=True)
+# Keep the Coinbase book current over the level2 websocket instead of a REST fetch per cycle
+COINBASE_WS_ORDER_BOOK = get_env_bool("COINBASE_WS_ORDER_BOOK")
+# "interval": fixed sleep between analyzer cycles, "event": cycle on new blocks / top of book changes
+ANALYZER_TRIGGER_MODE = get_env_str("ANALYZER_TRIGGER_MODE", default="interval").lower()
+# Shared RPC connection pool (sync: requests/urllib3 pool, async: aiohttp connector limit)
+RPC_POOL_CONNECTIONS = int(get_env_float("RPC_POOL_CONNECTIONS", default=4))
+RPC_POOL_MAXSIZE = int(get_env_float("RPC_POOL_MAXSIZE", default=32))
+RPC_TIMEOUT_SECONDS = get_env_float("RPC_TIMEOUT_SECONDS", default=20)
+
+# Concurrent get_logs workers of the IndexerService backfill
+INDEXER_WORKERS = int(get_env_float("INDEXER_WORKERS", default=4))
+# Upper bound of the adaptive get_logs block range (the window starts at 2000 blocks)
+INDEXER_MAX_BLOCKS_PER_CALL = int(get_env_float("INDEXER_MAX_BLOCKS_PER_CALL", default=100_000))
+# Blocks below the head that are treated as final (64 = two epochs, finalized on mainnet). Newer
+# blocks are indexed right away but journaled, and rolled back and re-indexed on a reorg.
+INDEXER_CONFIRMATIONS = int(get_env_float("INDEXER_CONFIRMATIONS", default=64))
+# Persist the executor queue in Postgres and resume unfinished tasks after a restart
+PERSISTENT_TASK_QUEUE = get_env_bool("PERSISTENT_TASK_QUEUE")
 
 EURO_USDC_UNI_V3_POOL_ADDRESS = "0x95DBB3C7546F22BCE375900AbFdd64a4E5bD73d6"
 COINBASE_EURC_USDC_TICKER = "EURC/USDC"
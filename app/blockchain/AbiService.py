@@ -3,25 +3,27 @@ import os
 
 
 class AbiService:
+  # Shared by all instances, an ABI file is parsed once per process
+  _cache: dict[str, list] = {}
+
   def __init__(self, abi_dir="./abis"):
     self.abi_dir = abi_dir
-    self.cache = {}
+    self.cache = self._cache
 
   def get_abi(self, filename):
     """Loads and caches ABI from a JSON file."""
-    if filename in self.cache:
-      return self.cache[filename]
-
     # Ensure the filename ends with .json
     if not filename.endswith(".json"):
       filename += ".json"
 
     filepath = os.path.join(self.abi_dir, filename)
+    if filepath in self.cache:
+      return self.cache[filepath]
 
     try:
       with open(filepath, 'r') as f:
         abi = json.load(f)
-        self.cache[filename] = abi
+        self.cache[filepath] = abi
         return abi
     except FileNotFoundError:
       raise FileNotFoundError(f"ABI file not found: {filepath}")
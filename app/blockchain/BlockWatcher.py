@@ -0,0 +1,111 @@
+import asyncio
+import os
+from typing import Callable
+
+import dotenv
+from web3 import AsyncWeb3, WebSocketProvider
+
+from blockchain.Web3Provider import Web3Provider
+from common.logger import get_logger
+
+dotenv.load_dotenv()
+
+
+class BlockWatcher:
+  """
+  Tracks the chain head and notifies listeners about every new block.
+
+  Uses an eth_subscribe newHeads websocket when WS_RPC_URL is set, otherwise polls
+  eth_blockNumber every POLL_INTERVAL_SECONDS over RPC_URL. One shared instance per process.
+  """
+  POLL_INTERVAL_SECONDS = 1.0
+  RECONNECT_DELAY_SECONDS = 2.0
+  _instance: "BlockWatcher | None" = None
+
+  def __init__(self, rpc_url: str | None = None, ws_url: str | None = None):
+    self.logger = get_logger()
+    self.w3 = Web3Provider.get_web3(rpc_url)
+    self.ws_url = ws_url if ws_url is not None else os.getenv("WS_RPC_URL")
+    self.latest_block: int | None = None
+    self._listeners: list[Callable[[int], None]] = []
+    self._condition: asyncio.Condition | None = None
+    self._task: asyncio.Task | None = None
+
+  @classmethod
+  def shared(cls) -> "BlockWatcher":
+    if cls._instance is None:
+      cls._instance = cls()
+    return cls._instance
+
+  def subscribe(self, listener: Callable[[int], None]) -> None:
+    """Registers a callback that receives the number of every new block (called on the event loop)."""
+    self._listeners.append(listener)
+
+  def unsubscribe(self, listener: Callable[[int], None]) -> None:
+    if listener in self._listeners:
+      self._listeners.remove(listener)
+
+  def start(self) -> asyncio.Task:
+    """Starts watching in the background once, further calls return the running task."""
+    if self._task is None or self._task.done():
+      self._task = asyncio.create_task(self.run())
+    return self._task
+
+  async def wait_for_block(self, block_number: int | None = None, timeout: float | None = None) -> int:
+    """Waits until the head reaches block_number (default: the next block) and returns the head."""
+    self.start()
+    if block_number is None:
+      block_number = self.latest_block + 1 if self.latest_block is not None else 0
+    condition = self._get_condition()
+    async with condition:
+      await asyncio.wait_for(
+        condition.wait_for(lambda: self.latest_block is not None and self.latest_block >= block_number),
+        timeout=timeout
+      )
+    return self.latest_block
+
+  async def run(self):
+    mode = "newHeads subscription" if self.ws_url else f"polling every {self.POLL_INTERVAL_SECONDS}s"
+    self.logger.info(f"Starting BlockWatcher ({mode})...")
+    while True:
+      try:
+        if self.ws_url:
+          await self._subscribe_new_heads()
+        else:
+          await self._poll()
+      except Exception as e:
+        self.logger.error(f"BlockWatcher error: {e}")
+        await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+
+  async def _subscribe_new_heads(self):
+    async with AsyncWeb3(WebSocketProvider(self.ws_url)) as w3:
+      await w3.eth.subscribe("newHeads")
+      async for payload in w3.socket.process_subscriptions():
+        await self._on_block(int(payload["result"]["number"]))
+
+  async def _poll(self):
+    while True:
+      block_number = await asyncio.to_thread(lambda: self.w3.eth.block_number)
+      await self._on_block(block_number)
+      await asyncio.sleep(self.POLL_INTERVAL_SECONDS)
+
+  async def _on_block(self, block_number: int):
+    if self.latest_block is not None and block_number <= self.latest_block:
+      return
+    self.latest_block = block_number
+
+    condition = self._get_condition()
+    async with condition:
+      condition.notify_all()
+
+    for listener in list(self._listeners):
+      try:
+        listener(block_number)
+      except Exception as e:
+        self.logger.error(f"BlockWatcher listener error: {e}")
+
+  def _get_condition(self) -> asyncio.Condition:
+    # Created lazily so the condition binds to the running event loop
+    if self._condition is None:
+      self._condition = asyncio.Condition()
+    return self._condition
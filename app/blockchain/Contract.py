@@ -24,6 +24,7 @@ class Contract(StrEnum):
   UNIVERSAL_ROUTER = "UNIVERSAL_ROUTER"
   NFTM = "NFTM"
   PERMIT2 = "PERMIT2"
+  MULTICALL3 = "MULTICALL3"
 
   def to_string(self) -> str:
     """Return the string value of the token."""
@@ -40,6 +41,7 @@ class Contract(StrEnum):
         "UNISWAP_V4_QUOTER": "0x52f0e24d1c21c8a0cb1e5a5dd6198556bd9e1203",
         "UNIVERSAL_ROUTER": "0x66a9893cC07D91D95644AEDD05D03f95e1dBA8Af",
         "PERMIT2": "0x000000000022D473030F116dDEE9F6B43aC78BA3",
+        "MULTICALL3": "0xcA11bde05977b3631167028862bE2a173976CA11",
         "WETH": Tokens.ETH.to_address(1),
         "USDC": Tokens.USDC.to_address(1),
         "EURC": Tokens.EURC.to_address(1),
@@ -53,6 +55,7 @@ class Contract(StrEnum):
         "UNISWAP_V4_QUOTER": "",
         "UNIVERSAL_ROUTER": "0x492e6456d9528771018deb9e87ef7750ef184104",
         "PERMIT2": "0x000000000022D473030F116dDEE9F6B43aC78BA3",
+        "MULTICALL3": "0xcA11bde05977b3631167028862bE2a173976CA11",
         "WETH": Tokens.ETH.to_address(11155111),
         "USDC": Tokens.USDC.to_address(11155111),
       },
@@ -64,6 +67,7 @@ class Contract(StrEnum):
         "UNISWAP_V4_QUOTER": "0x333e3c607b141b18ff6de9f258db6e77fe7491e0",
         "UNIVERSAL_ROUTER": "0xef740bf23acae26f6492b10de645d6b98dc8eaf3",
         "PERMIT2": "0x000000000022D473030F116dDEE9F6B43aC78BA3",
+        "MULTICALL3": "0xcA11bde05977b3631167028862bE2a173976CA11",
         "WETH": Tokens.ETH.to_address(130),
         "USDC": Tokens.USDC.to_address(130),
       },
@@ -75,6 +79,7 @@ class Contract(StrEnum):
         "UNISWAP_V4_QUOTER": "0x3972c00f7ed4885e145823eb7c655375d275a1c5",
         "UNIVERSAL_ROUTER": "0xA51afAFe0263b40EdaEf0Df8781eA9aa03E381a3",
         "PERMIT2": "0x000000000022D473030F116dDEE9F6B43aC78BA3",
+        "MULTICALL3": "0xcA11bde05977b3631167028862bE2a173976CA11",
         "WETH": Tokens.ETH.to_address(42161),
         "USDC": Tokens.USDC.to_address(42161),
       },
@@ -86,6 +91,7 @@ class Contract(StrEnum):
         "UNISWAP_V4_QUOTER": "0xbe40675bb704506a3c2ccfb762dcfd1e979845c2",
         "UNIVERSAL_ROUTER": "0x94b75331ae8d42c1b61065089b7d48fe14aa73b7",
         "PERMIT2": "0x000000000022D473030F116dDEE9F6B43aC78BA3",
+        "MULTICALL3": "0xcA11bde05977b3631167028862bE2a173976CA11",
         "WETH": Tokens.ETH.to_address(43114),
         "USDC": Tokens.USDC.to_address(43114),
       },
@@ -97,6 +103,7 @@ class Contract(StrEnum):
         "UNISWAP_V4_QUOTER": "0x9f75dd27d6664c475b90e105573e550ff69437b0",
         "UNIVERSAL_ROUTER": "0x1906c1d672b88cd1b9ac7593301ca990f94eae07",
         "PERMIT2": "0x000000000022D473030F116dDEE9F6B43aC78BA3",
+        "MULTICALL3": "0xcA11bde05977b3631167028862bE2a173976CA11",
         "WETH": Tokens.ETH.to_address(56),
         "USDC": Tokens.USDC.to_address(56),
       },
@@ -108,6 +115,7 @@ class Contract(StrEnum):
         "UNISWAP_V4_QUOTER": "0x0d5e0f971ed27fbff6c2837bf31316121532048d",
         "UNIVERSAL_ROUTER": "0x6ff5693b99212da76ad316178a184ab56d299b43",
         "PERMIT2": "0x000000000022D473030F116dDEE9F6B43aC78BA3",
+        "MULTICALL3": "0xcA11bde05977b3631167028862bE2a173976CA11",
         "WETH": Tokens.ETH.to_address(8453),
         "USDC": Tokens.USDC.to_address(8453),
       },
@@ -119,6 +127,7 @@ class Contract(StrEnum):
         "UNISWAP_V4_QUOTER": "0x1f3131a13296fb91c90870043742c3cdbff1a8d7",
         "UNIVERSAL_ROUTER": "0x851116d9223fabed8e56c0e6b8ad0c31d98b3507",
         "PERMIT2": "0x000000000022D473030F116dDEE9F6B43aC78BA3",
+        "MULTICALL3": "0xcA11bde05977b3631167028862bE2a173976CA11",
         "WETH": Tokens.ETH.to_address(10),
         "USDC": Tokens.USDC.to_address(10),
       },
@@ -130,6 +139,7 @@ class Contract(StrEnum):
         "UNISWAP_V4_QUOTER": "0xb3d5c3dfc3a7aebff71895a7191796bffc2c81b9",
         "UNIVERSAL_ROUTER": "0x1095692a6237d83c6a72f3f5efedb9a670c49223",
         "PERMIT2": "0x000000000022D473030F116dDEE9F6B43aC78BA3",
+        "MULTICALL3": "0xcA11bde05977b3631167028862bE2a173976CA11",
         "WETH": Tokens.ETH.to_address(137),
         "USDC": Tokens.USDC.to_address(137),
       },
@@ -140,6 +150,7 @@ class Contract(StrEnum):
         "UNISWAP_V4_QUOTER": "0x6f71cdcb0d119ff72c6eb501abceb576fbf62bcf",
         "UNIVERSAL_ROUTER": "0xeabbcb3e8e415306207ef514f660a3f820025be3",
         "PERMIT2": "0x000000000022D473030F116dDEE9F6B43aC78BA3",
+        "MULTICALL3": "0xcA11bde05977b3631167028862bE2a173976CA11",
         "WETH": Tokens.ETH.to_address(81457),
         "USDC": Tokens.USDC.to_address(81457),
       },
@@ -157,6 +168,7 @@ class Contract(StrEnum):
         "UNISWAP_V4_QUOTER": "0x55d235b3ff2daf7c3ede0defc9521f1d6fe6c5c0",
         "UNIVERSAL_ROUTER": "0x8ac7bee993bb44dab564ea4bc9ea67bf9eb5e743",
         "PERMIT2": "0x000000000022D473030F116dDEE9F6B43aC78BA3",
+        "MULTICALL3": "0xcA11bde05977b3631167028862bE2a173976CA11",
         "WETH": Tokens.ETH.to_address(480),
         "USDC": Tokens.USDC.to_address(480),
       },
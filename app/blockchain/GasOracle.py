@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from enum import StrEnum
+
+from web3 import Web3
+
+from blockchain.BlockWatcher import BlockWatcher
+from blockchain.Web3Provider import Web3Provider
+from common.logger import get_logger
+
+
+class GasTemplate(StrEnum):
+  """Transaction shapes whose gas usage is cached instead of estimated per call."""
+  ERC20_TRANSFER = "ERC20_TRANSFER"
+  V3_SWAP = "V3_SWAP"
+
+
+@dataclass(frozen=True)
+class GasSnapshot:
+  block_number: int
+  base_fee: int
+  next_base_fee: int
+  priority_fee: int
+  fetched_at: float
+
+  def max_fee_per_gas(self, base_fee_multiplier: float = 1.125) -> int:
+    """maxFeePerGas with headroom over the next base fee, so the tx stays valid for a few blocks."""
+    return int(self.next_base_fee * base_fee_multiplier) + self.priority_fee
+
+  def cost_wei(self, gas_used: int, base_fee_multiplier: float = 1.0) -> int:
+    return gas_used * (int(self.next_base_fee * base_fee_multiplier) + self.priority_fee)
+
+
+class GasOracle:
+  """
+  Per-block gas prices and gas-used estimates shared by all cost estimators.
+
+  Reads the latest header once per block and derives the next block's base fee locally with
+  the EIP-1559 update rule. When attached to a BlockWatcher the refresh runs in the background
+  on every new head, otherwise a read refreshes once the snapshot is older than one slot.
+  """
+  PRIORITY_FEE_GWEI = 0.01
+  MAX_AGE_SECONDS = 12.0
+  ELASTICITY_MULTIPLIER = 2
+  BASE_FEE_MAX_CHANGE_DENOMINATOR = 8
+  DEFAULT_GAS_USED = {
+    GasTemplate.ERC20_TRANSFER: 65000,
+    GasTemplate.V3_SWAP: 280493,
+  }
+  _instance: "GasOracle | None" = None
+
+  def __init__(self, rpc_url: str | None = None):
+    self.logger = get_logger()
+    self.w3 = Web3Provider.get_web3(rpc_url)
+    self.priority_fee = Web3.to_wei(self.PRIORITY_FEE_GWEI, "gwei")
+    self._snapshot: GasSnapshot | None = None
+    self._gas_used: dict[GasTemplate, int] = dict(self.DEFAULT_GAS_USED)
+    self._block_watcher: BlockWatcher | None = None
+    self._refresh_lock = threading.Lock()
+
+  @classmethod
+  def shared(cls) -> "GasOracle":
+    if cls._instance is None:
+      cls._instance = cls()
+    return cls._instance
+
+  def attach(self, block_watcher: BlockWatcher) -> None:
+    """Refreshes on every new head of the watcher; reads then never wait for the RPC."""
+    if self._block_watcher is block_watcher:
+      return
+    self._block_watcher = block_watcher
+    block_watcher.subscribe(self._on_block)
+    block_watcher.start()
+
+  def get_snapshot(self) -> GasSnapshot:
+    snapshot = self._snapshot
+    if snapshot is None or self._is_stale(snapshot):
+      snapshot = self.refresh()
+    return snapshot
+
+  def refresh(self, block_number: int | None = None) -> GasSnapshot:
+    with self._refresh_lock:
+      snapshot = self._snapshot
+      if snapshot is not None and block_number is not None and snapshot.block_number >= block_number:
+        return snapshot
+
+      header = self.w3.eth.get_block(block_number if block_number is not None else "latest")
+      snapshot = GasSnapshot(
+        block_number=header["number"],
+        base_fee=header["baseFeePerGas"],
+        next_base_fee=self.next_base_fee(header["baseFeePerGas"], header["gasUsed"], header["gasLimit"]),
+        priority_fee=self.priority_fee,
+        fetched_at=time.monotonic()
+      )
+      self._snapshot = snapshot
+      return snapshot
+
+  def gas_used(self, template: GasTemplate) -> int:
+    return self._gas_used[template]
+
+  def record_gas_used(self, template: GasTemplate, gas_used: int) -> None:
+    """Updates the cached gas usage of a template from an estimate or a receipt."""
+    if gas_used > 0:
+      self._gas_used[template] = gas_used
+
+  def estimate_cost_eth(self, template: GasTemplate, base_fee_multiplier: float = 1.0) -> float:
+    cost_wei = self.get_snapshot().cost_wei(self.gas_used(template), base_fee_multiplier)
+    return float(Web3.from_wei(cost_wei, "ether"))
+
+  @classmethod
+  def next_base_fee(cls, base_fee: int, gas_used: int, gas_limit: int) -> int:
+    """EIP-1559 base fee of the child block, computed from the parent header."""
+    gas_target = gas_limit // cls.ELASTICITY_MULTIPLIER
+    if gas_target == 0 or gas_used == gas_target:
+      return base_fee
+    if gas_used > gas_target:
+      delta = base_fee * (gas_used - gas_target) // gas_target // cls.BASE_FEE_MAX_CHANGE_DENOMINATOR
+      return base_fee + max(delta, 1)
+    delta = base_fee * (gas_target - gas_used) // gas_target // cls.BASE_FEE_MAX_CHANGE_DENOMINATOR
+    return base_fee - delta
+
+  def _is_stale(self, snapshot: GasSnapshot) -> bool:
+    if self._block_watcher is not None and self._block_watcher.latest_block is not None:
+      # The background refresh is in flight; the previous snapshot is at most one block behind
+      return snapshot.block_number < self._block_watcher.latest_block - 1
+    return time.monotonic() - snapshot.fetched_at > self.MAX_AGE_SECONDS
+
+  def _on_block(self, block_number: int) -> None:
+    asyncio.get_running_loop().run_in_executor(None, self._refresh_quietly, block_number)
+
+  def _refresh_quietly(self, block_number: int) -> None:
+    try:
+      self.refresh(block_number)
+    except Exception as e:
+      self.logger.error(f"GasOracle refresh failed: {e}")
@@ -0,0 +1,155 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, TypeVar
+
+from requests.exceptions import Timeout
+
+from common.logger import get_logger
+
+T = TypeVar("T")
+
+
+@dataclass
+class LogWindowStats:
+  ranges: int = 0
+  blocks: int = 0
+  logs: int = 0
+  seconds: float = 0.0
+  splits: int = 0
+  rate_limits: int = 0
+
+  def __str__(self) -> str:
+    if not self.ranges:
+      return "no ranges fetched"
+    return (
+      f"{self.ranges} ranges, {self.blocks} blocks, {self.logs} logs in {self.seconds:.1f}s "
+      f"(avg {self.seconds / self.ranges * 1000:.0f}ms/range, {self.blocks / max(self.seconds, 1e-9):.0f} blocks/s), "
+      f"{self.splits} splits, {self.rate_limits} rate limits"
+    )
+
+
+class LogWindow:
+  """
+  Adaptive block range for eth_getLogs.
+
+  After a range that came back fast (< FAST_SECONDS) with few logs (< SMALL_LOG_COUNT) the window
+  grows by GROWTH_FACTOR up to max_blocks. When the provider rejects a range as too large, the
+  window is halved and the range is fetched again as two halves, down to a single block. A timed
+  out range is split once as well; a half that times out again is raised. A failed size is not
+  grown into again until RETRY_AFTER_RANGES ranges succeeded, so the window doesn't oscillate
+  around the provider limit. Rate limited calls (HTTP 429) say nothing about the range size: they
+  are retried after an exponential backoff, up to MAX_RATE_LIMIT_RETRIES times. Shared by
+  concurrent workers, so all updates are locked.
+  """
+  GROWTH_FACTOR = 2
+  FAST_SECONDS = 1.0
+  SMALL_LOG_COUNT = 1000
+  MIN_BLOCKS = 1
+  RETRY_AFTER_RANGES = 50
+  MAX_RATE_LIMIT_RETRIES = 5
+  RATE_LIMIT_BACKOFF_SECONDS = 0.5
+  # Provider messages for ranges or responses over their limits
+  SIZE_ERRORS = (
+    "too large", "too wide", "more than", "block range", "response size", "is limited to",
+  )
+  # Provider messages for request rates over their limits, checked before SIZE_ERRORS
+  RATE_LIMIT_ERRORS = (
+    "429", "rate limit", "rate-limit", "too many requests", "compute units per second",
+  )
+
+  def __init__(self, name: str, initial_blocks: int, max_blocks: int):
+    self.logger = get_logger()
+    self.name = name
+    self.max_blocks = max(self.MIN_BLOCKS, max_blocks)
+    self.size = min(max(self.MIN_BLOCKS, initial_blocks), self.max_blocks)
+    self.stats = LogWindowStats()
+    # Smallest range that failed recently; growth stays below it
+    self._ceiling = self.max_blocks + 1
+    self._ranges_since_failure = 0
+    self._lock = threading.Lock()
+
+  def fetch(self, get_logs: Callable[[int, int], list[T]], from_block: int, to_block: int) -> list[T]:
+    """Calls get_logs(from_block, to_block); splits the range on size errors and timeouts."""
+    return self._fetch(get_logs, from_block, to_block, split_on_timeout=True)
+
+  def _fetch(self, get_logs: Callable[[int, int], list[T]], from_block: int, to_block: int,
+             split_on_timeout: bool) -> list[T]:
+    attempt = 0
+    while True:
+      started_at = time.perf_counter()
+      try:
+        logs = get_logs(from_block, to_block)
+        break
+      except Exception as e:
+        if self.is_rate_limit_error(e):
+          if attempt >= self.MAX_RATE_LIMIT_RETRIES:
+            raise
+          self._back_off(attempt, e)
+          attempt += 1
+          continue
+
+        timed_out = self.is_timeout(e)
+        if from_block >= to_block or not (self.is_size_error(e) or (timed_out and split_on_timeout)):
+          raise
+        self._shrink(to_block - from_block + 1, e)
+        middle = (from_block + to_block) // 2
+        # Only one split per timeout: a range that keeps timing out points at the node, not its size
+        split_on_timeout = split_on_timeout and not timed_out
+        return (self._fetch(get_logs, from_block, middle, split_on_timeout)
+                + self._fetch(get_logs, middle + 1, to_block, split_on_timeout))
+
+    self._record(to_block - from_block + 1, len(logs), time.perf_counter() - started_at)
+    return logs
+
+  @classmethod
+  def is_rate_limit_error(cls, error: Exception) -> bool:
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+      return True
+    message = str(error).lower()
+    return any(pattern in message for pattern in cls.RATE_LIMIT_ERRORS)
+
+  @classmethod
+  def is_size_error(cls, error: Exception) -> bool:
+    if cls.is_rate_limit_error(error):
+      return False
+    message = str(error).lower()
+    return any(pattern in message for pattern in cls.SIZE_ERRORS)
+
+  @staticmethod
+  def is_timeout(error: Exception) -> bool:
+    return isinstance(error, (Timeout, TimeoutError))
+
+  def _back_off(self, attempt: int, error: Exception):
+    delay = self.RATE_LIMIT_BACKOFF_SECONDS * 2 ** attempt
+    with self._lock:
+      self.stats.rate_limits += 1
+    self.logger.warning(f"{self.name} rate limited, retrying in {delay:.1f}s: {error}")
+    time.sleep(delay)
+
+  def _shrink(self, blocks: int, error: Exception):
+    with self._lock:
+      self.stats.splits += 1
+      self._ceiling = min(self._ceiling, blocks)
+      self._ranges_since_failure = 0
+      new_size = max(self.MIN_BLOCKS, min(self.size, blocks) // 2)
+      if new_size < self.size:
+        self.logger.info(f"{self.name} window {self.size} -> {new_size} blocks: {error}")
+        self.size = new_size
+
+  def _record(self, blocks: int, logs: int, seconds: float):
+    with self._lock:
+      self.stats.ranges += 1
+      self.stats.blocks += blocks
+      self.stats.logs += logs
+      self.stats.seconds += seconds
+      self._ranges_since_failure += 1
+      if self._ranges_since_failure >= self.RETRY_AFTER_RANGES:
+        self._ceiling = self.max_blocks + 1
+      # Only a range of the full window size says something about a larger one
+      if blocks >= self.size and seconds < self.FAST_SECONDS and logs < self.SMALL_LOG_COUNT:
+        new_size = min(self.max_blocks, self.size * self.GROWTH_FACTOR)
+        if self.size < new_size < self._ceiling:
+          self.logger.debug(f"{self.name} window {self.size} -> {new_size} blocks ({logs} logs in {seconds:.2f}s)")
+          self.size = new_size
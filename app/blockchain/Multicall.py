@@ -0,0 +1,68 @@
+from typing import Any, Callable
+
+from eth_utils.abi import get_abi_output_types
+from web3 import Web3
+from web3.contract import Contract as Web3Contract
+from web3.contract.contract import ContractFunction
+
+from blockchain.Contract import Contract
+
+
+class Multicall:
+  """
+  Collects contract reads and sends them as a single Multicall3 aggregate3 eth_call.
+  All results of one execute() come from the same block.
+  """
+  _contracts: dict[int, Web3Contract] = {}
+
+  def __init__(self, w3: Web3, chain_id: int):
+    self.w3 = w3
+    if chain_id not in Multicall._contracts:
+      Multicall._contracts[chain_id] = Contract.MULTICALL3.get_contract(w3, chain_id)
+    self.contract = Multicall._contracts[chain_id]
+    self._calls: list[tuple[str, bool, bytes, list[str], Callable[[Any], Any] | None]] = []
+
+  def add(self, function: ContractFunction, transform: Callable[[Any], Any] | None = None,
+          allow_failure: bool = False) -> int:
+    """
+    Queues a contract read and returns its index in the result list of execute().
+    The optional transform is applied to the decoded value, e.g. Token.to_human.
+    """
+    self._calls.append((
+      function.address,
+      allow_failure,
+      function._encode_transaction_data(),
+      get_abi_output_types(function.abi),
+      transform
+    ))
+    return len(self._calls) - 1
+
+  def add_eth_balance(self, address: str, transform: Callable[[Any], Any] | None = None) -> int:
+    return self.add(self.contract.functions.getEthBalance(address), transform)
+
+  def execute(self, block_identifier: int | str = "latest") -> list[Any]:
+    """
+    Executes all queued reads in one eth_call. Values are decoded like ContractFunction.call():
+    a single output is returned as is, multiple outputs as a list. Failed calls that were added
+    with allow_failure return None.
+    """
+    calls, self._calls = self._calls, []
+    if not calls:
+      return []
+
+    responses = self.contract.functions.aggregate3(
+      [(target, allow_failure, call_data) for target, allow_failure, call_data, _, _ in calls]
+    ).call(block_identifier=block_identifier)
+
+    results = []
+    for (target, allow_failure, _, output_types, transform), (success, return_data) in zip(calls, responses):
+      if not success:
+        if allow_failure:
+          results.append(None)
+          continue
+        raise RuntimeError(f"Multicall read on {target} failed: 0x{bytes(return_data).hex()}")
+
+      decoded = self.w3.codec.decode(output_types, return_data)
+      value = decoded[0] if len(decoded) == 1 else list(decoded)
+      results.append(transform(value) if transform else value)
+    return results
@@ -0,0 +1,119 @@
+import threading
+
+from eth_account.datastructures import SignedTransaction
+from eth_account.signers.local import LocalAccount
+from hexbytes import HexBytes
+from web3.types import TxParams
+
+from blockchain.Web3Provider import Web3Provider
+from common.logger import get_logger
+
+
+class NonceManager:
+  """
+  Tracks the next nonce of a wallet locally so transactions can be built and sent back to back
+  without a get_transaction_count round trip and without two transactions sharing a nonce.
+
+  One instance per address and process (`for_address`). The local counter is synced with the
+  node's pending count on first use and re-synced whenever a transaction is rejected for its
+  nonce or reported as dropped.
+  """
+  NONCE_ERRORS = ("nonce too low", "nonce too high", "already known", "replacement transaction underpriced")
+  _instances: dict[str, "NonceManager"] = {}
+  _instances_lock = threading.Lock()
+
+  def __init__(self, address: str):
+    self.logger = get_logger()
+    self.w3 = Web3Provider.get_web3()
+    self.address = self.w3.to_checksum_address(address)
+    self._next_nonce: int | None = None
+    self._pending: dict[int, HexBytes] = {}
+    self._lock = threading.Lock()
+
+  @classmethod
+  def for_address(cls, address: str) -> "NonceManager":
+    key = address.lower()
+    if key not in cls._instances:
+      with cls._instances_lock:
+        if key not in cls._instances:
+          cls._instances[key] = cls(address)
+    return cls._instances[key]
+
+  @property
+  def pending(self) -> dict[int, HexBytes]:
+    """Sent transactions (nonce -> tx hash) not yet seen as mined at the last reconcile."""
+    return dict(self._pending)
+
+  def peek(self) -> int:
+    """Next nonce without reserving it, for transactions that are only built to estimate costs."""
+    with self._lock:
+      if self._next_nonce is None:
+        self._sync()
+      return self._next_nonce
+
+  def reserve(self) -> int:
+    with self._lock:
+      if self._next_nonce is None:
+        self._sync()
+      nonce = self._next_nonce
+      self._next_nonce += 1
+      return nonce
+
+  def release(self, nonce: int) -> None:
+    """Returns a reserved nonce whose transaction never reached the node."""
+    with self._lock:
+      if self._next_nonce == nonce + 1:
+        self._next_nonce = nonce
+      else:
+        # Later nonces are already in flight, the gap can only be closed by the node's view
+        self._sync()
+
+  def mark_sent(self, nonce: int, tx_hash: HexBytes) -> None:
+    with self._lock:
+      self._pending[nonce] = tx_hash
+
+  def mark_dropped(self, tx_hash: HexBytes) -> None:
+    """A sent transaction was dropped or timed out; re-syncs so later transactions don't wait on a gap."""
+    self.logger.warning(f"Transaction {HexBytes(tx_hash).hex()} dropped or not mined, reconciling nonces")
+    self.reconcile()
+
+  def reconcile(self) -> int:
+    with self._lock:
+      return self._sync()
+
+  def sign_and_send(self, account: LocalAccount, tx: TxParams) -> HexBytes:
+    """Assigns the next local nonce, signs and broadcasts without waiting for earlier transactions."""
+    nonce, signed = self.sign(account, tx)
+    return self.send(nonce, signed.raw_transaction)
+
+  def sign(self, account: LocalAccount, tx: TxParams) -> tuple[int, SignedTransaction]:
+    """Reserves the next nonce and signs; the caller must send() it (e.g. after persisting the raw tx)."""
+    nonce = self.reserve()
+    try:
+      return nonce, account.sign_transaction({**tx, "nonce": nonce})
+    except Exception:
+      self.release(nonce)
+      raise
+
+  def send(self, nonce: int, raw_transaction: bytes) -> HexBytes:
+    try:
+      tx_hash = self.w3.eth.send_raw_transaction(raw_transaction)
+    except Exception as e:
+      if any(error in str(e).lower() for error in self.NONCE_ERRORS):
+        self.logger.warning(f"Nonce {nonce} rejected ({e}), reconciling with the chain")
+        self.reconcile()
+      else:
+        self.release(nonce)
+      raise
+    self.mark_sent(nonce, tx_hash)
+    return tx_hash
+
+  def _sync(self) -> int:
+    # Caller holds the lock
+    mined = self.w3.eth.get_transaction_count(self.address, "latest")
+    pending = self.w3.eth.get_transaction_count(self.address, "pending")
+    self._pending = {nonce: tx_hash for nonce, tx_hash in self._pending.items() if mined <= nonce < pending}
+    if self._next_nonce is not None and self._next_nonce != pending:
+      self.logger.info(f"Nonce of {self.address} reconciled: local {self._next_nonce}, chain {pending}")
+    self._next_nonce = pending
+    return pending
@@ -0,0 +1,120 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Generic, TypeVar
+
+from eth_utils.abi import get_abi_output_types
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.contract.contract import ContractFunction
+
+T = TypeVar("T")
+
+
+class RpcBatchError(RuntimeError):
+  """A failed entry of a JSON-RPC batch, or a batch the node rejected as a whole."""
+
+  def __init__(self, method: str, error: Any):
+    super().__init__(f"{method} failed: {error}")
+    self.method = method
+    self.error = error
+
+
+@dataclass
+class RpcResult(Generic[T]):
+  """Result of one batch entry: the decoded value, or the JSON-RPC error of just this entry."""
+  method: str
+  value: T | None = None
+  error: dict | None = None
+
+  @property
+  def ok(self) -> bool:
+    return self.error is None
+
+  def unwrap(self) -> T:
+    if self.error is not None:
+      raise RpcBatchError(self.method, self.error)
+    return self.value
+
+
+class RpcBatch:
+  """
+  Collects independent JSON-RPC reads and sends them as JSON-RPC batches, one HTTP POST per
+  MAX_BATCH_SIZE entries, instead of one round trip per read.
+
+  Entries are raw provider requests (no web3 middleware or formatters), so every entry carries a
+  decoder for its raw result. execute() returns one RpcResult per entry in the order they were
+  added; an entry the node fails only fails its own result. Also usable as a context manager
+  that executes on exit:
+
+    with RpcBatch(w3) as batch:
+      index = batch.add_call(contract.functions.tickBitmap(word))
+    bitmap = batch.results[index].unwrap()
+
+  Unlike Multicall the entries are not pinned to one block unless they pass the same block.
+  """
+  MAX_BATCH_SIZE = 100
+
+  def __init__(self, w3: Web3):
+    self.w3 = w3
+    self.results: list[RpcResult] = []
+    self._entries: list[tuple[str, list[Any], Callable[[Any], Any]]] = []
+
+  def __enter__(self) -> "RpcBatch":
+    return self
+
+  def __exit__(self, exc_type, exc, tb) -> None:
+    if exc_type is None:
+      self.execute()
+
+  def add(self, method: str, params: list[Any], decode: Callable[[Any], T] = lambda raw: raw) -> int:
+    """Queues a raw request and returns its index in the result list of execute()."""
+    self._entries.append((method, params, decode))
+    return len(self._entries) - 1
+
+  def add_call(self, function: ContractFunction, block_identifier: int | str = "latest",
+               transform: Callable[[Any], Any] | None = None) -> int:
+    """Queues an eth_call, decoded like ContractFunction.call() (see Multicall.add)."""
+    output_types = get_abi_output_types(function.abi)
+
+    def decode(raw: str) -> Any:
+      decoded = self.w3.codec.decode(output_types, HexBytes(raw))
+      value = decoded[0] if len(decoded) == 1 else list(decoded)
+      return transform(value) if transform else value
+
+    call = {"to": function.address, "data": "0x" + HexBytes(function._encode_transaction_data()).hex()}
+    return self.add("eth_call", [call, self._block_param(block_identifier)], decode)
+
+  def add_block_hash(self, block_number: int) -> int:
+    """Queues eth_getBlockByNumber; the result is the 0x block hash, None if the block doesn't exist."""
+    return self.add(
+      "eth_getBlockByNumber",
+      [self._block_param(block_number), False],
+      lambda block: block["hash"] if block else None
+    )
+
+  def execute(self) -> list[RpcResult]:
+    entries, self._entries = self._entries, []
+    results: list[RpcResult] = []
+    for start in range(0, len(entries), self.MAX_BATCH_SIZE):
+      chunk = entries[start:start + self.MAX_BATCH_SIZE]
+      responses = self.w3.provider.make_batch_request([(method, params) for method, params, _ in chunk])
+      if not isinstance(responses, list):
+        # The node rejected the whole batch (e.g. batching unsupported or too many entries)
+        raise RpcBatchError("batch", responses.get("error", responses))
+      if len(responses) != len(chunk):
+        raise RpcBatchError("batch", f"{len(responses)} responses for {len(chunk)} requests")
+
+      # The provider sorts the responses by request id, i.e. in request order
+      for (method, _, decode), response in zip(chunk, responses):
+        if response.get("error") is not None:
+          results.append(RpcResult(method, error=response["error"]))
+          continue
+        try:
+          results.append(RpcResult(method, value=decode(response.get("result"))))
+        except Exception as e:
+          results.append(RpcResult(method, error={"message": f"Undecodable result: {e}"}))
+    self.results = results
+    return results
+
+  @staticmethod
+  def _block_param(block_identifier: int | str) -> str:
+    return hex(block_identifier) if isinstance(block_identifier, int) else block_identifier
@@ -1,11 +1,18 @@
-import os
 from decimal import Decimal
 from enum import StrEnum
+from typing import TYPE_CHECKING
 
 from dotenv import load_dotenv
-from web3 import Web3
+from web3.logs import DISCARD
 
 from blockchain.AbiService import AbiService
+from blockchain.TokenRegistry import TokenRegistry
+from blockchain.Web3Provider import Web3Provider
+
+if TYPE_CHECKING:
+  from web3.contract import Contract as Web3Contract
+
+  from blockchain.Multicall import Multicall
 
 load_dotenv()
 
@@ -101,32 +108,27 @@ class Tokens(StrEnum):
 
 
 class Token:
+  # Contract objects are shared per address, building one parses the whole ABI
+  _contracts: dict[str, "Web3Contract"] = {}
+
   def __init__(self, token: Tokens):
-    self._cache = {}
-    self.w3 = Web3(Web3.HTTPProvider(os.getenv("RPC_URL")))
-    self.address = self.w3.to_checksum_address(token.to_address(self.w3.eth.chain_id))
+    self.w3 = Web3Provider.get_web3()
+    chain_id = Web3Provider.get_chain_id()
+    self.address = self.w3.to_checksum_address(token.to_address(chain_id))
     self.abi_service = AbiService()
     self.token = token
 
-    if self.address not in self._cache:
-      self.contract = self.w3.eth.contract(
+    if self.address not in self._contracts:
+      self._contracts[self.address] = self.w3.eth.contract(
         address=self.address,
         abi=self.abi_service.get_abi("ERC20")
       )
+    self.contract = self._contracts[self.address]
 
-      decimals = self.contract.functions.decimals().call()
-      symbol = self.contract.functions.symbol().call()
-      name = self.contract.functions.name().call()
-
-      self._cache[self.address] = {
-        "name": name,
-        "decimals": decimals,
-        "symbol": symbol,
-      }
-
-    self.decimals = self._cache[self.address]["decimals"]
-    self.symbol = self._cache[self.address]["symbol"]
-    self.name = self._cache[self.address]["name"]
+    metadata = TokenRegistry.get(chain_id, self.address, self.contract)
+    self.decimals = metadata.decimals
+    self.symbol = metadata.symbol
+    self.name = metadata.name
 
   def to_human(self, raw_amount: int) -> float:
     return float(Decimal(raw_amount) / Decimal(10 ** self.decimals))
@@ -134,6 +136,23 @@ class Token:
   def to_raw(self, human_amount: float) -> int:
     return int(Decimal(human_amount) * Decimal(10 ** self.decimals))
 
+  def add_balance_of(self, multicall: "Multicall", owner: str) -> int:
+    """Queues balanceOf(owner) on a multicall batch, the batch result is the human amount."""
+    return multicall.add(self.contract.functions.balanceOf(owner), self.to_human)
+
+  def net_transfer(self, receipt, owner: str) -> int:
+    """Raw amount owner received minus sent in the Transfer logs of a receipt."""
+    owner = owner.lower()
+    net = 0
+    for event in self.contract.events.Transfer().process_receipt(receipt, errors=DISCARD):
+      if event["address"].lower() != self.address.lower():
+        continue
+      if event["args"]["to"].lower() == owner:
+        net += event["args"]["value"]
+      if event["args"]["from"].lower() == owner:
+        net -= event["args"]["value"]
+    return net
+
   def format(self, raw_amount: int, precision: int = 6) -> str:
     human = self.to_human(raw_amount)
     return f"{human:.{precision}f} {self.symbol}"
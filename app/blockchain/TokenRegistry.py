@@ -0,0 +1,85 @@
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from web3.contract import Contract as Web3Contract
+
+from common.logger import get_logger
+
+logger = get_logger()
+
+
+@dataclass(frozen=True)
+class TokenMetadata:
+  chain_id: int
+  address: str
+  name: str
+  symbol: str
+  decimals: int
+
+
+class TokenRegistry:
+  """
+  Process-wide ERC-20 metadata (name, symbol, decimals) keyed by (chain_id, checksum address).
+
+  Loaded once from METADATA_FILE; unknown tokens are read from the chain on first use and
+  appended to the file, so later runs never query metadata over RPC.
+  """
+  METADATA_FILE = Path(__file__).resolve().parent / "token_metadata.json"
+  _metadata: dict[tuple[int, str], TokenMetadata] | None = None
+  _lock = threading.Lock()
+
+  @classmethod
+  def get(cls, chain_id: int, address: str, contract: Web3Contract | None = None) -> TokenMetadata:
+    """Returns the metadata of the token; `contract` is only used to fetch tokens not in the registry."""
+    key = (chain_id, address)
+    metadata = cls._load().get(key)
+    if metadata is not None:
+      return metadata
+
+    if contract is None:
+      raise KeyError(f"No metadata for token {address} on chain {chain_id}")
+
+    with cls._lock:
+      if key not in cls._metadata:
+        cls._metadata[key] = TokenMetadata(
+          chain_id=chain_id,
+          address=address,
+          name=contract.functions.name().call(),
+          symbol=contract.functions.symbol().call(),
+          decimals=contract.functions.decimals().call(),
+        )
+        logger.info(f"Registered token metadata {cls._metadata[key]}")
+        cls._save()
+    return cls._metadata[key]
+
+  @classmethod
+  def _load(cls) -> dict[tuple[int, str], TokenMetadata]:
+    if cls._metadata is None:
+      with cls._lock:
+        if cls._metadata is None:
+          metadata = {}
+          try:
+            with open(cls.METADATA_FILE, "r") as f:
+              for entry in json.load(f):
+                token = TokenMetadata(**entry)
+                metadata[(token.chain_id, token.address)] = token
+          except FileNotFoundError:
+            logger.warning(f"Token metadata file not found: {cls.METADATA_FILE}")
+          cls._metadata = metadata
+    return cls._metadata
+
+  @classmethod
+  def _save(cls) -> None:
+    # Caller holds the lock. Written to a temp file first so a crash never leaves a truncated file
+    entries = sorted((asdict(token) for token in cls._metadata.values()), key=lambda e: (e["chain_id"], e["address"]))
+    tmp_path = cls.METADATA_FILE.with_suffix(".json.tmp")
+    try:
+      with open(tmp_path, "w") as f:
+        json.dump(entries, f, indent=2)
+        f.write("\n")
+      os.replace(tmp_path, cls.METADATA_FILE)
+    except OSError as e:
+      logger.warning(f"Could not persist token metadata to {cls.METADATA_FILE}: {e}")
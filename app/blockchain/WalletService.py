@@ -1,5 +1,5 @@
+import asyncio
 import os
-import time
 
 import dotenv
 from eth_account import Account
@@ -7,60 +7,137 @@ from eth_account.signers.local import LocalAccount
 from eth_typing import Hash32, HexStr
 from hexbytes import HexBytes
 from web3 import Web3
+from web3.exceptions import TimeExhausted, TransactionNotFound
+from web3.types import TxParams
 
 from Configurations import DEFAULT_TIMEOUT_ORDERS
-from blockchain.Token import Token
+from blockchain.BlockWatcher import BlockWatcher
+from blockchain.GasOracle import GasOracle, GasTemplate
+from blockchain.Multicall import Multicall
+from blockchain.NonceManager import NonceManager
+from blockchain.Token import Token, Tokens
+from blockchain.Web3Provider import Web3Provider
 from common.logger import get_logger
 
 dotenv.load_dotenv()
 
 
 class WalletService:
+  TRANSFER_TOPIC = "0x" + Web3.keccak(text="Transfer(address,address,uint256)").hex()
+
   def __init__(self):
     self.logger = get_logger()
-    self.w3 = Web3(Web3.HTTPProvider(os.getenv("RPC_URL")))
+    self.w3 = Web3Provider.get_web3()
     self.wallet: LocalAccount = Account.from_key(os.getenv("PRIVATE_KEY"))
+    self.chain_id = Web3Provider.get_chain_id()
+    self.gas_oracle = GasOracle.shared()
+    self.nonce_manager = NonceManager.for_address(self.wallet.address)
+    self.block_watcher = BlockWatcher.shared()
+
+  def get_balances(self, tokens: list[Token]) -> dict[Tokens, float]:
+    """Returns the wallet's token balances plus ETH, read with a single multicall."""
+    multicall = Multicall(self.w3, self.chain_id)
+    for token in tokens:
+      token.add_balance_of(multicall, self.wallet.address)
+    multicall.add_eth_balance(self.wallet.address, lambda raw: float(self.w3.from_wei(raw, "ether")))
+    *token_balances, eth = multicall.execute()
+
+    balances = {token.token: balance for token, balance in zip(tokens, token_balances)}
+    balances[Tokens.ETH] = eth
+    return balances
+
+  def get_transfer_costs(self, token: Token, eth_price: float) -> float:
+    """Expected cost of an ERC-20 transfer from the cached gas usage, no estimate_gas round trip."""
+    return self.gas_oracle.estimate_cost_eth(GasTemplate.ERC20_TRANSFER) * eth_price
 
-  async def get_transfer_costs(self, token: Token, eth_price: float) -> float:
-    tx = token.contract.functions.transfer(
-      self.wallet.address,
-      1
-    ).build_transaction({
-      "from": self.wallet.address,
-      "nonce": self.w3.eth.get_transaction_count(self.wallet.address),
-    })
-    gas = self.w3.eth.estimate_gas(tx)
-    gas_price_wei = tx.get("maxFeePerGas") or self.w3.eth.gas_price
-    gas_cost_eth = float(self.w3.from_wei(gas * gas_price_wei, "ether"))
-    return gas_cost_eth * eth_price
-
-  def wait_tx_is_mined(self, tx_hash: Hash32 | HexBytes | HexStr, timeout: int = DEFAULT_TIMEOUT_ORDERS):
+  def sign_and_send(self, tx: TxParams) -> HexBytes:
+    """Signs with the wallet and broadcasts using the next local nonce (see NonceManager)."""
+    return self.nonce_manager.sign_and_send(self.wallet, tx)
+
+  def rebroadcast(self, raw_transaction: bytes) -> None:
+    """Sends an already signed transaction again, e.g. after a restart; a known or mined one is fine."""
+    try:
+      self.w3.eth.send_raw_transaction(raw_transaction)
+    except Exception as e:
+      message = str(e).lower()
+      if "already known" not in message and "nonce too low" not in message:
+        raise
+      self.logger.info(f"Rebroadcast skipped, transaction already known or mined: {e}")
+
+  async def wait_tx_is_mined(self, tx_hash: Hash32 | HexBytes | HexStr, timeout: int = DEFAULT_TIMEOUT_ORDERS):
+    """
+    Waits for the receipt without blocking the event loop: checks once and then again on every new
+    block from the BlockWatcher. Raises TimeExhausted after timeout seconds; cancelling the awaiting
+    task stops the wait.
+    """
+    tx_hash = HexBytes(tx_hash)
     self.logger.info(f"Waiting for transaction {tx_hash.hex()} to be mined...")
-    receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout)
+    async_w3 = await Web3Provider.get_async_web3()
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+      try:
+        receipt = await async_w3.eth.get_transaction_receipt(tx_hash)
+        break
+      except TransactionNotFound:
+        pass
+
+      remaining = deadline - asyncio.get_running_loop().time()
+      try:
+        if remaining <= 0:
+          raise asyncio.TimeoutError
+        await self.block_watcher.wait_for_block(timeout=remaining)
+      except asyncio.TimeoutError:
+        self.nonce_manager.mark_dropped(tx_hash)
+        raise TimeExhausted(f"Transaction {tx_hash.hex()} is not in the chain after {timeout} seconds")
+
     self.logger.info(
       f"Transaction {tx_hash.hex()} mined in block {receipt.blockNumber} with status {receipt.status}")
     return receipt
 
-  def wait_till_coins_arrive(self, token: Token, timeout_seconds: int = DEFAULT_TIMEOUT_ORDERS) -> bool:
-    self.logger.info(f"Waiting for {token.symbol} to arrive in wallet {self.wallet.address}...")
-
-    balance_before = token.contract.functions.balanceOf(self.wallet.address).call()
-    start_time = time.time()
+  async def wait_till_coins_arrive(self, token: Token, amount: float, fee_tolerance: float = 0.0,
+                                   timeout_seconds: int = DEFAULT_TIMEOUT_ORDERS,
+                                   from_block: int | None = None) -> bool:
+    """
+    Waits for an ERC-20 Transfer of token to the wallet of amount, less at most fee_tolerance (fees the
+    sender deducts from it), checked with a get_logs filter on every new block from from_block
+    (default: the block the wait started in). Other incoming transfers, e.g. swap outputs, are
+    ignored. Returns False on timeout.
+    """
+    self.logger.info(f"Waiting for {amount} {token.symbol} to arrive in wallet {self.wallet.address}...")
+    async_w3 = await Web3Provider.get_async_web3()
+    log_filter = {
+      "address": token.address,
+      "topics": [self.TRANSFER_TOPIC, None, "0x" + HexBytes(self.wallet.address).rjust(32, b"\0").hex()]
+    }
+    min_raw = token.to_raw(max(amount - fee_tolerance, 0.0))
+    # to_raw truncates the binary float, the sent amount can be one raw unit above it
+    max_raw = token.to_raw(amount) + 1
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
+    if from_block is None:
+      from_block = await async_w3.eth.block_number
 
     while True:
-      elapsed_time = time.time() - start_time
-      if elapsed_time > timeout_seconds:
+      to_block = await async_w3.eth.block_number
+      if to_block >= from_block:
+        logs = await async_w3.eth.get_logs({**log_filter, "fromBlock": from_block, "toBlock": to_block})
+        for log in logs:
+          received = int.from_bytes(HexBytes(log["data"]), "big")
+          if min_raw <= received <= max_raw:
+            self.logger.info(
+              f"Coins arrived! Received {token.to_human(received)} {token.symbol} in block {log['blockNumber']} "
+              f"(Wait time: {int(loop.time() - start_time)}s)"
+            )
+            return True
+          self.logger.debug(f"Ignoring incoming transfer of {token.to_human(received)} {token.symbol}")
+        from_block = to_block + 1
+
+      remaining = timeout_seconds - (loop.time() - start_time)
+      try:
+        if remaining <= 0:
+          raise asyncio.TimeoutError
+        await self.block_watcher.wait_for_block(from_block, timeout=remaining)
+      except asyncio.TimeoutError:
         self.logger.warning(
           f"Timeout: Coins ({token.symbol}) did not arrive within {timeout_seconds // 60} minutes.")
         return False
-
-      balance_after = token.contract.functions.balanceOf(self.wallet.address).call()
-
-      if balance_after > balance_before:
-        self.logger.info(
-          f"Coins arrived! Balance before: {token.to_human(balance_before)}, "
-          f"after: {token.to_human(balance_after)} (Wait time: {int(elapsed_time)}s)"
-        )
-        return True
-
-      time.sleep(5)
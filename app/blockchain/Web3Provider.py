@@ -0,0 +1,70 @@
+import os
+import threading
+
+import aiohttp
+import dotenv
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import AsyncWeb3, Web3
+
+from Configurations import RPC_POOL_CONNECTIONS, RPC_POOL_MAXSIZE, RPC_TIMEOUT_SECONDS
+
+dotenv.load_dotenv()
+
+
+class Web3Provider:
+  """
+  Process-wide registry of Web3 clients, one per RPC URL (default: RPC_URL).
+
+  All sync clients of a URL share one keep-alive requests.Session whose connection pool holds
+  RPC_POOL_MAXSIZE connections, the async client uses an aiohttp session with the same limit.
+  The chain ID is read once per URL.
+  """
+  _web3: dict[str, Web3] = {}
+  _async_web3: dict[str, AsyncWeb3] = {}
+  _chain_ids: dict[str, int] = {}
+  _lock = threading.Lock()
+
+  @classmethod
+  def get_web3(cls, rpc_url: str | None = None) -> Web3:
+    rpc_url = cls._resolve_url(rpc_url)
+    if rpc_url not in cls._web3:
+      with cls._lock:
+        if rpc_url not in cls._web3:
+          session = requests.Session()
+          adapter = HTTPAdapter(pool_connections=RPC_POOL_CONNECTIONS, pool_maxsize=RPC_POOL_MAXSIZE)
+          session.mount("http://", adapter)
+          session.mount("https://", adapter)
+          cls._web3[rpc_url] = Web3(Web3.HTTPProvider(
+            rpc_url,
+            request_kwargs={"timeout": RPC_TIMEOUT_SECONDS},
+            session=session
+          ))
+    return cls._web3[rpc_url]
+
+  @classmethod
+  async def get_async_web3(cls, rpc_url: str | None = None) -> AsyncWeb3:
+    """Async client for the URL; its aiohttp session is bound to the event loop of the first call."""
+    rpc_url = cls._resolve_url(rpc_url)
+    if rpc_url not in cls._async_web3:
+      provider = AsyncWeb3.AsyncHTTPProvider(rpc_url, request_kwargs={"timeout": RPC_TIMEOUT_SECONDS})
+      await provider.cache_async_session(aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=RPC_POOL_MAXSIZE, keepalive_timeout=60),
+        timeout=aiohttp.ClientTimeout(total=RPC_TIMEOUT_SECONDS)
+      ))
+      cls._async_web3[rpc_url] = AsyncWeb3(provider)
+    return cls._async_web3[rpc_url]
+
+  @classmethod
+  def get_chain_id(cls, rpc_url: str | None = None) -> int:
+    rpc_url = cls._resolve_url(rpc_url)
+    if rpc_url not in cls._chain_ids:
+      cls._chain_ids[rpc_url] = cls.get_web3(rpc_url).eth.chain_id
+    return cls._chain_ids[rpc_url]
+
+  @staticmethod
+  def _resolve_url(rpc_url: str | None) -> str:
+    rpc_url = rpc_url or os.getenv("RPC_URL")
+    if not rpc_url:
+      raise EnvironmentError("Missing required environment variable: RPC_URL")
+    return rpc_url
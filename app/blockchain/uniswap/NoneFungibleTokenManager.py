@@ -1,16 +1,15 @@
-import os
 
 import dotenv
-from web3 import Web3
 
 from blockchain.AbiService import AbiService
+from blockchain.Web3Provider import Web3Provider
 
 dotenv.load_dotenv()
 
 
 class NoneFungibleTokenManager:
   def __init__(self, address):
-    self.w3 = Web3(Web3.HTTPProvider(os.getenv("RPC_URL")))
+    self.w3 = Web3Provider.get_web3()
     self.abi_service = AbiService()
     self.contract = self.w3.eth.contract(
       address=self.w3.to_checksum_address(address),
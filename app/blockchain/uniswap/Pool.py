@@ -7,11 +7,19 @@ from eth_account import Account
 from eth_account.datastructures import SignedTransaction
 from eth_account.signers.local import LocalAccount
 from uniswap_universal_router_decoder import FunctionRecipient, RouterCodec
-from web3 import Web3
 
 from blockchain.AbiService import AbiService
 from blockchain.Contract import Contract
+from blockchain.GasOracle import GasOracle, GasTemplate
+from blockchain.Multicall import Multicall
+from blockchain.NonceManager import NonceManager
+from blockchain.RpcBatch import RpcBatch
 from blockchain.Token import Token, Tokens
+from blockchain.Web3Provider import Web3Provider
+from blockchain.uniswap.PoolMirror import PoolMirror
+from blockchain.uniswap.SqrtPriceTable import SqrtPriceTable
+from blockchain.uniswap.SwapSimulator import SwapSimulator
+from blockchain.uniswap.SwapTxTemplate import SwapTxTemplate
 from common.logger import get_logger
 
 load_dotenv()
@@ -19,12 +27,17 @@ getcontext().prec = 80
 
 
 class Pool:
+  # tickBitmap words searched for the next initialized tick, and read per JSON-RPC batch
+  MAX_BITMAP_WORDS = 100
+  BITMAP_WORDS_PER_BATCH = 8
+
   def __init__(self, address: str):
     self.logger = get_logger()
     self.abi_service = AbiService()
-    self.w3 = Web3(Web3.HTTPProvider(os.getenv("RPC_URL")))
+    self.w3 = Web3Provider.get_web3()
 
-    self.chain_id = self.w3.eth.chain_id
+    self.chain_id = Web3Provider.get_chain_id()
+    self.gas_oracle = GasOracle.shared()
     self.pool_contract = self.w3.eth.contract(
       address=self.w3.to_checksum_address(address),
       abi=self.abi_service.get_abi("Pool"))
@@ -36,14 +49,34 @@ class Pool:
 
     self.quoter = Contract.UNISWAP_V3_QUOTER.get_contract(self.w3, self.chain_id)
     self.wallet: LocalAccount = Account.from_key(os.getenv("PRIVATE_KEY"))
+    self.nonce_manager = NonceManager.for_address(self.wallet.address)
 
     self.universal_router = Contract.UNIVERSAL_ROUTER.get_contract(self.w3, self.chain_id)
     self.permit2 = Contract.PERMIT2.get_contract(self.w3, self.chain_id)
 
+    # Loaded on demand via load_mirror(); until then tick lookups and quotes go to the node
+    self.mirror = PoolMirror(self.w3, self.chain_id, self.pool_contract, self.tick_spacing)
+    self.simulator = SwapSimulator(self.mirror, self.fee)
+    self.sqrt_price_table = SqrtPriceTable.for_tick_spacing(self.tick_spacing)
+    # Pre-encoded swap calldata per input token address; fixed per direction, so encoded once here
+    self._swap_templates: dict[str, SwapTxTemplate] = self._build_swap_templates()
+
+  def load_mirror(self):
+    """Loads the local pool mirror used by depth queries and offline quotes, and warms its sqrt prices."""
+    self.mirror.load()
+    # Computed at startup so the first quote doesn't pay for it on the hot path
+    self.sqrt_price_table.warm(self.mirror.iter_stop_ticks())
+
+  def sync_mirror(self, to_block: int | None = None) -> int:
+    """Applies new pool events to the local pool mirror (up to the latest block by default)."""
+    return self.mirror.sync(to_block)
+
   def get_pool_state(self):
-    """Fetches the current state of the pool."""
-    slot0 = self.pool_contract.functions.slot0().call()
-    liquidity = self.pool_contract.functions.liquidity().call()
+    """Fetches the current state of the pool with one eth_call."""
+    multicall = Multicall(self.w3, self.chain_id)
+    multicall.add(self.pool_contract.functions.slot0())
+    multicall.add(self.pool_contract.functions.liquidity())
+    slot0, liquidity = multicall.execute()
     return {
       "sqrtPriceX96": slot0[0],
       "tick": slot0[1],
@@ -52,27 +85,68 @@ class Pool:
 
   def get_ask(self, token_in: Token, amount_out: float):
     token_out = self.token1 if token_in.address == self.token0.address else self.token0
+    ask_amount = self._quote_exact_output(token_in, token_out, token_out.to_raw(amount_out))
+    return token_out.to_human(ask_amount)
+
+  def get_bid(self, token_in: Token, amount_in: float):
+    token_out = self.token1 if token_in.address == self.token0.address else self.token0
+    bid_amount = self._quote_exact_input(token_in, token_out, token_in.to_raw(amount_in))
+    return token_out.to_human(bid_amount)
+
+  def get_quotes(self, ask_token_in: Token, amount_out: float, bid_token_in: Token, amount_in: float) -> tuple[
+    float, float
+  ]:
+    """Returns (ask, bid) like get_ask/get_bid, batching both quoter calls when not simulating locally."""
+    if self.mirror.is_loaded:
+      return self.get_ask(ask_token_in, amount_out), self.get_bid(bid_token_in, amount_in)
+
+    ask_token_out = self.token1 if ask_token_in.address == self.token0.address else self.token0
+    bid_token_out = self.token1 if bid_token_in.address == self.token0.address else self.token0
+    multicall = Multicall(self.w3, self.chain_id)
+    multicall.add(self.quoter.functions.quoteExactOutputSingle({
+      "tokenIn": ask_token_in.address,
+      "tokenOut": ask_token_out.address,
+      "fee": self.fee,
+      "amount": ask_token_out.to_raw(amount_out),
+      "sqrtPriceLimitX96": 0
+    }))
+    multicall.add(self.quoter.functions.quoteExactInputSingle({
+      "tokenIn": bid_token_in.address,
+      "tokenOut": bid_token_out.address,
+      "fee": self.fee,
+      "amountIn": bid_token_in.to_raw(amount_in),
+      "sqrtPriceLimitX96": 0
+    }))
+    ask_quote, bid_quote = multicall.execute()
+    return ask_token_out.to_human(ask_quote[0]), bid_token_out.to_human(bid_quote[0])
+
+  def _quote_exact_input(self, token_in: Token, token_out: Token, amount_in: int) -> int:
+    """Raw output amount for an exact input swap, simulated locally when the mirror is loaded."""
+    if self.mirror.is_loaded:
+      return self.simulator.quote_exact_input_single(token_in.address == self.token0.address, amount_in)
+
     quote_params = {
       "tokenIn": token_in.address,
       "tokenOut": token_out.address,
       "fee": self.fee,
-      "amount": token_out.to_raw(amount_out),
+      "amountIn": amount_in,
       "sqrtPriceLimitX96": 0
     }
-    ask_amount = self.quoter.functions.quoteExactOutputSingle(quote_params).call()
-    return token_out.to_human(ask_amount[0])
+    return self.quoter.functions.quoteExactInputSingle(quote_params).call()[0]
+
+  def _quote_exact_output(self, token_in: Token, token_out: Token, amount_out: int) -> int:
+    """Raw input amount for an exact output swap, simulated locally when the mirror is loaded."""
+    if self.mirror.is_loaded:
+      return self.simulator.quote_exact_output_single(token_in.address == self.token0.address, amount_out)
 
-  def get_bid(self, token_in: Token, amount_in: float):
-    token_out = self.token1 if token_in.address == self.token0.address else self.token0
     quote_params = {
       "tokenIn": token_in.address,
       "tokenOut": token_out.address,
       "fee": self.fee,
-      "amountIn": token_in.to_raw(amount_in),
+      "amount": amount_out,
       "sqrtPriceLimitX96": 0
     }
-    bid_amount = self.quoter.functions.quoteExactInputSingle(quote_params).call()
-    return token_out.to_human(bid_amount[0])
+    return self.quoter.functions.quoteExactOutputSingle(quote_params).call()[0]
 
   def get_volume_until_price(self, token_in: Token, min_price: float) -> float:
     """
@@ -129,8 +203,7 @@ class Pool:
 
       # If we reached a tick, cross it
       if current_sqrt_x96 == step_sqrt_x96:
-        tick_info = self.pool_contract.functions.ticks(next_tick).call()
-        liquidity_net = tick_info[1]
+        liquidity_net = self._get_liquidity_net(next_tick)
 
         if zero_for_one:
           liquidity -= liquidity_net
@@ -168,7 +241,7 @@ class Pool:
     return int(math.sqrt(price_ratio) * (2 ** 96))
 
   def _tick_to_sqrt_price_x96(self, tick: int) -> int:
-    return int((1.0001 ** (tick / 2)) * (2 ** 96))
+    return self.sqrt_price_table.get_sqrt_ratio_at_tick(tick)
 
   def _get_next_initialized_tick(self, current_tick: int, zero_for_one: bool) -> int:
     """Finds the next initialized tick using the TickBitmap contract function."""
@@ -176,33 +249,52 @@ class Pool:
 
     if zero_for_one:
       # Moving down (selling token0)
-      word_pos = (compressed - 1) >> 8
-      bit_pos = (compressed - 1) & 0xFF
-      for _ in range(100):  # Limit iterations for performance
-        bitmap = self.pool_contract.functions.tickBitmap(word_pos).call()
-        mask = (1 << (bit_pos + 1)) - 1
-        masked = bitmap & mask
-        if masked:
-          next_bit = masked.bit_length() - 1
-          return ((word_pos << 8) + next_bit) * self.tick_spacing
-        word_pos -= 1
-        bit_pos = 255
-      return -887272  # Minimum tick boundary
+      start_word = (compressed - 1) >> 8
+      start_bit = (compressed - 1) & 0xFF
+      direction = -1
     else:
       # Moving up (selling token1)
-      word_pos = (compressed + 1) >> 8
-      bit_pos = (compressed + 1) & 0xFF
-      for _ in range(100):
-        bitmap = self.pool_contract.functions.tickBitmap(word_pos).call()
-        mask = ~((1 << bit_pos) - 1) & ((1 << 256) - 1)
-        masked = bitmap & mask
-        if masked:
-          lsb = masked & -masked
-          next_bit = lsb.bit_length() - 1
-          return ((word_pos << 8) + next_bit) * self.tick_spacing
-        word_pos += 1
-        bit_pos = 0
-      return 887272  # Maximum tick boundary
+      start_word = (compressed + 1) >> 8
+      start_bit = (compressed + 1) & 0xFF
+      direction = 1
+
+    # Words are read ahead in batches, usually the first batch already holds the next tick
+    for offset in range(0, self.MAX_BITMAP_WORDS, self.BITMAP_WORDS_PER_BATCH):
+      word_positions = [
+        start_word + direction * i
+        for i in range(offset, min(offset + self.BITMAP_WORDS_PER_BATCH, self.MAX_BITMAP_WORDS))
+      ]
+      for word_pos, bitmap in zip(word_positions, self._get_tick_bitmap_words(word_positions)):
+        if zero_for_one:
+          bit_pos = start_bit if word_pos == start_word else 255
+          mask = (1 << (bit_pos + 1)) - 1
+          masked = bitmap & mask
+          if masked:
+            next_bit = masked.bit_length() - 1
+            return ((word_pos << 8) + next_bit) * self.tick_spacing
+        else:
+          bit_pos = start_bit if word_pos == start_word else 0
+          mask = ~((1 << bit_pos) - 1) & ((1 << 256) - 1)
+          masked = bitmap & mask
+          if masked:
+            lsb = masked & -masked
+            next_bit = lsb.bit_length() - 1
+            return ((word_pos << 8) + next_bit) * self.tick_spacing
+
+    return -887272 if zero_for_one else 887272  # Minimum / maximum tick boundary
+
+  def _get_tick_bitmap_words(self, word_positions: list[int]) -> list[int]:
+    if self.mirror.is_loaded:
+      return [self.mirror.get_word(word_pos) for word_pos in word_positions]
+    with RpcBatch(self.w3) as batch:
+      for word_pos in word_positions:
+        batch.add_call(self.pool_contract.functions.tickBitmap(word_pos))
+    return [result.unwrap() for result in batch.results]
+
+  def _get_liquidity_net(self, tick: int) -> int:
+    if self.mirror.is_loaded:
+      return self.mirror.get_liquidity_net(tick)
+    return self.pool_contract.functions.ticks(tick).call()[1]
 
   def get_token(self, token: Tokens) -> Token:
     if token.to_address(self.chain_id) == self.token0.address:
@@ -220,41 +312,70 @@ class Pool:
     else:
       raise ValueError(f"Token {token} not found in pool")
 
-  async def swap(self, token_in: Tokens, amount_in: float, eth_price: float, min_amount_out: float = None) -> str:
-    gas, tx = self.prepare_order_tx(token_in, amount_in, min_amount_out)
-    costs = gas * eth_price
-    self.logger.info(f"Swap costs: {costs:.2}$")
-    signed: SignedTransaction = self.w3.eth.account.sign_transaction(tx, self.wallet.key)
-    tx_hash = self.w3.eth.send_raw_transaction(signed.raw_transaction)
-    return tx_hash.hex()
+  def _build_swap_templates(self) -> dict[str, SwapTxTemplate]:
+    """Swap calldata for both directions, so a firing swap only patches in its values, signs and sends."""
+    return {
+      input_token.address: SwapTxTemplate(
+        router_address=self.universal_router.address,
+        sender=self.wallet.address,
+        chain_id=self.chain_id,
+        token_in=input_token.address,
+        fee=self.fee,
+        token_out=output_token.address
+      )
+      for input_token, output_token in ((self.token0, self.token1), (self.token1, self.token0))
+    }
 
-  async def get_swap_costs(self, token_in: Tokens, amount_in: float, min_amount_out: float, eth_price: float,
-                           static=False) -> float:
+  def get_swap_template(self, token_in: Tokens) -> SwapTxTemplate | None:
+    return self._swap_templates.get(self.get_token(token_in).address)
 
-    if static:
-      # 1. Get current Base Fee
-      latest_block = self.w3.eth.get_block('latest')
-      base_fee = latest_block['baseFeePerGas']
+  def swap(self, token_in: Tokens, amount_in: float, eth_price: float, min_amount_out: float = None) -> str:
+    nonce, signed = self.sign_swap(token_in, amount_in, eth_price, min_amount_out)
+    return self.send_swap(nonce, signed.raw_transaction)
 
-      # 2. Your manual Priority Fee (0.01 Gwei)
-      prio_fee = self.w3.to_wei(0.01, 'gwei')
+  def sign_swap(self, token_in: Tokens, amount_in: float, eth_price: float,
+                min_amount_out: float = None) -> tuple[int, SignedTransaction]:
+    """Builds and signs a swap with the next nonce; send_swap() sends it, e.g. after persisting the raw tx."""
+    template = self.get_swap_template(token_in)
+    if template is not None and min_amount_out is not None:
+      gas, tx = self._patch_order_tx(template, token_in, amount_in, min_amount_out)
+    else:
+      gas, tx = self.prepare_order_tx(token_in, amount_in, min_amount_out)
+    costs = gas * eth_price
+    self.logger.info(f"Swap costs: {costs:.2}$")
+    return self.nonce_manager.sign(self.wallet, tx)
 
-      # 3. Calculate your specific Max Fee per Gas
-      # We add a 12.5% buffer to the base fee to ensure the tx remains
-      # valid even if the base fee rises in the next block.
-      max_fee_per_gas = int(base_fee * 1.125) + prio_fee
+  def send_swap(self, nonce: int, raw_transaction: bytes) -> str:
+    return self.nonce_manager.send(nonce, raw_transaction).hex()
 
-      # 4. Calculate total cost using your precise gas_used
-      gas_used = 280493
-      gas_in_wei = gas_used * max_fee_per_gas
+  def get_swap_costs(self, token_in: Tokens, amount_in: float, min_amount_out: float, eth_price: float,
+                     static=False) -> float:
 
-      # 5. Convert and return USD
-      gas_costs_eth = self.w3.from_wei(gas_in_wei, "ether")
-      return float(gas_costs_eth) * eth_price
+    if static:
+      # Cached gas usage of a V3 swap, priced at the next block's base fee plus a 12.5% buffer
+      # so the estimate still holds if the base fee rises in the block after.
+      gas_costs_eth = self.gas_oracle.estimate_cost_eth(GasTemplate.V3_SWAP, base_fee_multiplier=1.125)
+      return gas_costs_eth * eth_price
     else:
       gas, _ = self.prepare_order_tx(token_in, amount_in, min_amount_out)
       return gas * eth_price
 
+  def _patch_order_tx(self, template: SwapTxTemplate, token_in: Tokens, amount_in: float,
+                      min_amount_out: float) -> tuple[float, dict]:
+    """Swap transaction from a prepared template: no quote, no gas estimate, no codec on the hot path."""
+    input_token = self.get_token(token_in)
+    output_token = self.get_opposite_token(token_in)
+    gas = self.gas_oracle.get_snapshot()
+    gas_used = self.gas_oracle.gas_used(GasTemplate.V3_SWAP)
+    tx = template.build(
+      amount_in=input_token.to_raw(amount_in),
+      amount_out_min=output_token.to_raw(min_amount_out),
+      gas=gas,
+      gas_used=gas_used
+    )
+    estimated_actual_cost = self.w3.from_wei(gas.cost_wei(gas_used), "ether")
+    return float(estimated_actual_cost), tx
+
   def prepare_order_tx(self, token_in: Tokens, amount_in: float, min_amount_out: float):
     input_token = self.get_token(token_in)
     output_token = self.get_opposite_token(token_in)
@@ -281,28 +402,18 @@ class Pool:
     # .permit2_permit(data, self.wallet.sign_message(signable_message))
 
     if min_amount_out is None:
-      quote_params = {
-        "tokenIn": input_token.address,
-        "tokenOut": output_token.address,
-        "fee": self.fee,
-        "amountIn": input_token.to_raw(amount_in),
-        "sqrtPriceLimitX96": 0
-      }
-      bid_amount = self.quoter.functions.quoteExactInputSingle(quote_params).call()
-      min_amount_out = int(bid_amount[0] * 0.9999)
+      bid_amount = self._quote_exact_input(input_token, output_token, input_token.to_raw(amount_in))
+      min_amount_out = int(bid_amount * 0.9999)
     else:
       min_amount_out = output_token.to_raw(min_amount_out)
 
-    # 1. Fetch current network conditions
-    latest_block = self.w3.eth.get_block('latest')
-    base_fee = latest_block['baseFeePerGas']
-
-    # 2. Define your tiny priority fee (0.01 Gwei)
-    prio_fee = self.w3.to_wei(0.01, 'gwei')
+    # 1. Network conditions of the next block (refreshed once per block by the gas oracle)
+    gas = self.gas_oracle.get_snapshot()
 
     # Standard practice is (Base Fee * 2) + Prio Fee to handle block volatility
     # If you want to be strictly cheap, use (Base Fee + Prio Fee), but it might fail if base fee rises 1%
-    max_fee = int(base_fee * 1.2) + prio_fee
+    max_fee = gas.max_fee_per_gas(1.2)
+    prio_fee = gas.priority_fee
 
     tx = (
       codec.encode
@@ -318,7 +429,8 @@ class Pool:
       .build_transaction(
         sender=self.wallet.address,
         value=0,
-        nonce=self.w3.eth.get_transaction_count(self.wallet.address),
+        # Placeholder for cost estimates, sign_and_send assigns the reserved nonce
+        nonce=self.nonce_manager.peek(),
         chain_id=self.chain_id,
         deadline=codec.get_default_deadline(),
         ur_address=self.universal_router.address
@@ -327,9 +439,9 @@ class Pool:
     tx['maxFeePerGas'] = max_fee
     tx['maxPriorityFeePerGas'] = prio_fee
 
-    current_base_fee = self.w3.eth.get_block('latest')['baseFeePerGas']
+    self.gas_oracle.record_gas_used(GasTemplate.V3_SWAP, tx['gas'])
 
     # This is what you will likely actually pay
-    estimated_actual_cost = self.w3.from_wei(tx['gas'] * (current_base_fee + prio_fee), "ether")
+    estimated_actual_cost = self.w3.from_wei(gas.cost_wei(tx['gas']), "ether")
 
     return float(estimated_actual_cost), tx
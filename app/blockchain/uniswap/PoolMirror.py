@@ -0,0 +1,225 @@
+from web3 import Web3
+from web3._utils.events import get_event_data
+from web3.contract import Contract as Web3Contract
+
+from blockchain.Multicall import Multicall
+from blockchain.uniswap.TickMath import TickMath
+from common.logger import get_logger
+
+
+class PoolMirror:
+  """
+  Local mirror of a Uniswap V3 pool's price, active liquidity, tick bitmap and per-tick liquidity.
+
+  The mirror is loaded once from the pool contract and afterwards kept current from the
+  pool's Mint/Burn/Swap events, so depth queries and quotes need no node round trips.
+  """
+  MINT_EVENT_SIGNATURE = "Mint(address,address,int24,int24,uint128,uint256,uint256)"
+  BURN_EVENT_SIGNATURE = "Burn(address,int24,int24,uint128,uint256,uint256)"
+  SWAP_EVENT_SIGNATURE = "Swap(address,address,int256,int256,uint160,uint128,int24)"
+  # Reads per aggregate3 eth_call while loading, small enough for the node's eth_call gas cap
+  LOAD_CALLS_PER_MULTICALL = 500
+
+  def __init__(self, w3: Web3, chain_id: int, pool_contract: Web3Contract, tick_spacing: int):
+    self.logger = get_logger()
+    self.w3 = w3
+    self.chain_id = chain_id
+    self.pool_contract = pool_contract
+    self.tick_spacing = tick_spacing
+
+    self.sqrt_price_x96 = 0
+    self.tick = 0
+    self.liquidity = 0
+    self.words: dict[int, int] = {}
+    self.liquidity_gross: dict[int, int] = {}
+    self.liquidity_net: dict[int, int] = {}
+    self.synced_block: int | None = None
+
+    self.mint_topic = "0x" + Web3.keccak(text=self.MINT_EVENT_SIGNATURE).hex()
+    self.burn_topic = "0x" + Web3.keccak(text=self.BURN_EVENT_SIGNATURE).hex()
+    self.swap_topic = "0x" + Web3.keccak(text=self.SWAP_EVENT_SIGNATURE).hex()
+    self.mint_event_abi = self.pool_contract.events.Mint()._get_event_abi()
+    self.burn_event_abi = self.pool_contract.events.Burn()._get_event_abi()
+    self.swap_event_abi = self.pool_contract.events.Swap()._get_event_abi()
+
+  @property
+  def is_loaded(self) -> bool:
+    return self.synced_block is not None
+
+  def load(self, block_number: int | None = None) -> None:
+    """
+    Reads slot0, liquidity, the full tick bitmap and all initialized ticks at a single block, batched
+    into Multicall3 aggregate calls of LOAD_CALLS_PER_MULTICALL reads instead of one eth_call each.
+    """
+    if block_number is None:
+      block_number = self.w3.eth.block_number
+
+    functions = self.pool_contract.functions
+    slot0, liquidity = self._read_at(block_number, [functions.slot0(), functions.liquidity()])
+
+    min_word, max_word = self._word_range()
+    word_positions = list(range(min_word, max_word + 1))
+    bitmaps = self._read_at(block_number, [functions.tickBitmap(word_pos) for word_pos in word_positions])
+    words = {word_pos: bitmap for word_pos, bitmap in zip(word_positions, bitmaps) if bitmap}
+
+    ticks = list(self._iter_initialized_ticks(words))
+    tick_infos = self._read_at(block_number, [functions.ticks(tick) for tick in ticks])
+    liquidity_gross = {tick: tick_info[0] for tick, tick_info in zip(ticks, tick_infos)}
+    liquidity_net = {tick: tick_info[1] for tick, tick_info in zip(ticks, tick_infos)}
+
+    self.sqrt_price_x96 = slot0[0]
+    self.tick = slot0[1]
+    self.liquidity = liquidity
+    self.words = words
+    self.liquidity_gross = liquidity_gross
+    self.liquidity_net = liquidity_net
+    self.synced_block = block_number
+    self.logger.info(
+      f"Pool mirror loaded at block {block_number}: {len(words)} bitmap words, {len(liquidity_net)} ticks")
+
+  def sync(self, to_block: int | None = None) -> int:
+    """Applies Mint/Burn/Swap events since the last synced block. Returns the number of applied events."""
+    if not self.is_loaded:
+      self.load(to_block)
+      return 0
+
+    if to_block is None:
+      to_block = self.w3.eth.block_number
+    if to_block <= self.synced_block:
+      return 0
+
+    logs = self.w3.eth.get_logs({
+      "fromBlock": self.synced_block + 1,
+      "toBlock": to_block,
+      "address": self.pool_contract.address,
+      "topics": [[self.mint_topic, self.burn_topic, self.swap_topic]]
+    })
+
+    for log in logs:
+      self.apply_log(log)
+
+    self.synced_block = to_block
+    if logs:
+      self.logger.debug(f"Pool mirror applied {len(logs)} pool event(s) up to block {to_block}")
+    return len(logs)
+
+  def apply_log(self, log) -> None:
+    topic0 = "0x" + log["topics"][0].hex().removeprefix("0x")
+    if topic0 == self.mint_topic:
+      decoded = get_event_data(self.w3.codec, self.mint_event_abi, log)
+      self.apply_mint(decoded.args.tickLower, decoded.args.tickUpper, decoded.args.amount)
+    elif topic0 == self.burn_topic:
+      decoded = get_event_data(self.w3.codec, self.burn_event_abi, log)
+      self.apply_burn(decoded.args.tickLower, decoded.args.tickUpper, decoded.args.amount)
+    elif topic0 == self.swap_topic:
+      decoded = get_event_data(self.w3.codec, self.swap_event_abi, log)
+      self.apply_swap(decoded.args.sqrtPriceX96, decoded.args.tick, decoded.args.liquidity)
+
+  def apply_mint(self, tick_lower: int, tick_upper: int, amount: int) -> None:
+    if amount <= 0:
+      return
+    self._update_tick(tick_lower, amount, amount)
+    self._update_tick(tick_upper, amount, -amount)
+    if tick_lower <= self.tick < tick_upper:
+      self.liquidity += amount
+
+  def apply_burn(self, tick_lower: int, tick_upper: int, amount: int) -> None:
+    # Burns with amount 0 only poke fees and do not touch tick liquidity
+    if amount <= 0:
+      return
+    self._update_tick(tick_lower, -amount, -amount)
+    self._update_tick(tick_upper, -amount, amount)
+    if tick_lower <= self.tick < tick_upper:
+      self.liquidity -= amount
+
+  def apply_swap(self, sqrt_price_x96: int, tick: int, liquidity: int) -> None:
+    # Swap events carry the complete post-swap price state
+    self.sqrt_price_x96 = sqrt_price_x96
+    self.tick = tick
+    self.liquidity = liquidity
+
+  def get_word(self, word_pos: int) -> int:
+    return self.words.get(word_pos, 0)
+
+  def get_liquidity_net(self, tick: int) -> int:
+    return self.liquidity_net.get(tick, 0)
+
+  def next_initialized_tick_within_one_word(self, tick: int, lte: bool) -> tuple[int, bool]:
+    """Port of TickBitmap.nextInitializedTickWithinOneWord against the mirrored bitmap."""
+    compressed = tick // self.tick_spacing
+
+    if lte:
+      word_pos = compressed >> 8
+      bit_pos = compressed & 0xFF
+      masked = self.get_word(word_pos) & ((1 << (bit_pos + 1)) - 1)
+      if masked:
+        return (compressed - (bit_pos - (masked.bit_length() - 1))) * self.tick_spacing, True
+      return (compressed - bit_pos) * self.tick_spacing, False
+
+    word_pos = (compressed + 1) >> 8
+    bit_pos = (compressed + 1) & 0xFF
+    masked = self.get_word(word_pos) & ~((1 << bit_pos) - 1)
+    if masked:
+      lsb = (masked & -masked).bit_length() - 1
+      return (compressed + 1 + (lsb - bit_pos)) * self.tick_spacing, True
+    return (compressed + 1 + (0xFF - bit_pos)) * self.tick_spacing, False
+
+  def _update_tick(self, tick: int, gross_delta: int, net_delta: int) -> None:
+    gross_before = self.liquidity_gross.get(tick, 0)
+    gross_after = gross_before + gross_delta
+
+    if gross_after <= 0:
+      self.liquidity_gross.pop(tick, None)
+      self.liquidity_net.pop(tick, None)
+      if gross_before > 0:
+        self._flip_tick(tick)
+      return
+
+    self.liquidity_gross[tick] = gross_after
+    self.liquidity_net[tick] = self.liquidity_net.get(tick, 0) + net_delta
+    if gross_before == 0:
+      self._flip_tick(tick)
+
+  def _flip_tick(self, tick: int) -> None:
+    compressed = tick // self.tick_spacing
+    word_pos = compressed >> 8
+    bit_pos = compressed & 0xFF
+    word = self.words.get(word_pos, 0) ^ (1 << bit_pos)
+    if word:
+      self.words[word_pos] = word
+    else:
+      self.words.pop(word_pos, None)
+
+  def iter_stop_ticks(self):
+    """Ticks a swap step can stop at: initialized ticks and the first and last tick of every bitmap word."""
+    yield from self._iter_initialized_ticks(self.words)
+    min_word, max_word = self._word_range()
+    for word_pos in range(min_word, max_word + 1):
+      for compressed in (word_pos << 8, (word_pos << 8) + 255):
+        tick = compressed * self.tick_spacing
+        if TickMath.MIN_TICK <= tick <= TickMath.MAX_TICK:
+          yield tick
+
+  def _read_at(self, block_number: int, functions: list) -> list:
+    """Reads the functions through Multicall3 in chunks, all pinned to block_number."""
+    results = []
+    for start in range(0, len(functions), self.LOAD_CALLS_PER_MULTICALL):
+      multicall = Multicall(self.w3, self.chain_id)
+      for function in functions[start:start + self.LOAD_CALLS_PER_MULTICALL]:
+        multicall.add(function)
+      results += multicall.execute(block_identifier=block_number)
+    return results
+
+  def _word_range(self) -> tuple[int, int]:
+    min_compressed = TickMath.MIN_TICK // self.tick_spacing
+    max_compressed = TickMath.MAX_TICK // self.tick_spacing
+    return min_compressed >> 8, max_compressed >> 8
+
+  def _iter_initialized_ticks(self, words: dict[int, int]):
+    for word_pos in sorted(words):
+      bitmap = words[word_pos]
+      while bitmap:
+        lsb = bitmap & -bitmap
+        bit_pos = lsb.bit_length() - 1
+        yield ((word_pos << 8) + bit_pos) * self.tick_spacing
+        bitmap ^= lsb
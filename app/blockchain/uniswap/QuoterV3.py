@@ -1,9 +1,8 @@
-import os
 
 import dotenv
-from web3 import Web3
 
 from blockchain.AbiService import AbiService
+from blockchain.Web3Provider import Web3Provider
 
 dotenv.load_dotenv()
 
@@ -21,7 +20,7 @@ class QuoteResult:
 class QuoterV3:
   def __init__(self, quoter_address):
     self.quoter_address = quoter_address
-    self.w3 = Web3(Web3.HTTPProvider(os.getenv("RPC_URL")))
+    self.w3 = Web3Provider.get_web3()
     self.abi_service = AbiService()
 
     self.contract = self.w3.eth.contract(address=self.quoter_address, abi=self.abi_service.get_abi("QuoterV3"))
@@ -0,0 +1,102 @@
+class SqrtPriceMath:
+  """Integer port of Uniswap V3 FullMath/UnsafeMath/SqrtPriceMath, including their rounding rules."""
+  Q96 = 1 << 96
+  MAX_UINT160 = (1 << 160) - 1
+  MAX_UINT256 = (1 << 256) - 1
+
+  @staticmethod
+  def mul_div(a: int, b: int, denominator: int) -> int:
+    result = a * b // denominator
+    if result > SqrtPriceMath.MAX_UINT256:
+      raise OverflowError("mul_div overflow")
+    return result
+
+  @staticmethod
+  def mul_div_rounding_up(a: int, b: int, denominator: int) -> int:
+    result = -(-(a * b) // denominator)
+    if result > SqrtPriceMath.MAX_UINT256:
+      raise OverflowError("mul_div_rounding_up overflow")
+    return result
+
+  @staticmethod
+  def div_rounding_up(x: int, y: int) -> int:
+    return -(-x // y)
+
+  @staticmethod
+  def get_next_sqrt_price_from_amount0_rounding_up(sqrt_price_x96: int, liquidity: int, amount: int,
+                                                   add: bool) -> int:
+    if amount == 0:
+      return sqrt_price_x96
+    numerator1 = liquidity << 96
+    product = amount * sqrt_price_x96
+
+    if add:
+      # Same overflow branches as the Solidity implementation, they round differently
+      if product <= SqrtPriceMath.MAX_UINT256:
+        denominator = numerator1 + product
+        if denominator <= SqrtPriceMath.MAX_UINT256:
+          return SqrtPriceMath.mul_div_rounding_up(numerator1, sqrt_price_x96, denominator)
+      return SqrtPriceMath.div_rounding_up(numerator1, numerator1 // sqrt_price_x96 + amount)
+
+    if product > SqrtPriceMath.MAX_UINT256 or numerator1 <= product:
+      raise ValueError("Insufficient liquidity for amount0 output")
+    result = SqrtPriceMath.mul_div_rounding_up(numerator1, sqrt_price_x96, numerator1 - product)
+    if result > SqrtPriceMath.MAX_UINT160:
+      raise OverflowError("Sqrt price overflow")
+    return result
+
+  @staticmethod
+  def get_next_sqrt_price_from_amount1_rounding_down(sqrt_price_x96: int, liquidity: int, amount: int,
+                                                     add: bool) -> int:
+    if add:
+      result = sqrt_price_x96 + (amount << 96) // liquidity
+      if result > SqrtPriceMath.MAX_UINT160:
+        raise OverflowError("Sqrt price overflow")
+      return result
+
+    quotient = SqrtPriceMath.div_rounding_up(amount << 96, liquidity)
+    if sqrt_price_x96 <= quotient:
+      raise ValueError("Insufficient liquidity for amount1 output")
+    return sqrt_price_x96 - quotient
+
+  @staticmethod
+  def get_next_sqrt_price_from_input(sqrt_price_x96: int, liquidity: int, amount_in: int,
+                                     zero_for_one: bool) -> int:
+    if sqrt_price_x96 <= 0 or liquidity <= 0:
+      raise ValueError("Sqrt price and liquidity must be positive")
+    if zero_for_one:
+      return SqrtPriceMath.get_next_sqrt_price_from_amount0_rounding_up(sqrt_price_x96, liquidity, amount_in, True)
+    return SqrtPriceMath.get_next_sqrt_price_from_amount1_rounding_down(sqrt_price_x96, liquidity, amount_in, True)
+
+  @staticmethod
+  def get_next_sqrt_price_from_output(sqrt_price_x96: int, liquidity: int, amount_out: int,
+                                      zero_for_one: bool) -> int:
+    if sqrt_price_x96 <= 0 or liquidity <= 0:
+      raise ValueError("Sqrt price and liquidity must be positive")
+    if zero_for_one:
+      return SqrtPriceMath.get_next_sqrt_price_from_amount1_rounding_down(sqrt_price_x96, liquidity, amount_out, False)
+    return SqrtPriceMath.get_next_sqrt_price_from_amount0_rounding_up(sqrt_price_x96, liquidity, amount_out, False)
+
+  @staticmethod
+  def get_amount0_delta(sqrt_ratio_a_x96: int, sqrt_ratio_b_x96: int, liquidity: int, round_up: bool) -> int:
+    if sqrt_ratio_a_x96 > sqrt_ratio_b_x96:
+      sqrt_ratio_a_x96, sqrt_ratio_b_x96 = sqrt_ratio_b_x96, sqrt_ratio_a_x96
+    if sqrt_ratio_a_x96 <= 0:
+      raise ValueError("Sqrt ratio must be positive")
+
+    numerator1 = liquidity << 96
+    numerator2 = sqrt_ratio_b_x96 - sqrt_ratio_a_x96
+    if round_up:
+      return SqrtPriceMath.div_rounding_up(
+        SqrtPriceMath.mul_div_rounding_up(numerator1, numerator2, sqrt_ratio_b_x96),
+        sqrt_ratio_a_x96
+      )
+    return SqrtPriceMath.mul_div(numerator1, numerator2, sqrt_ratio_b_x96) // sqrt_ratio_a_x96
+
+  @staticmethod
+  def get_amount1_delta(sqrt_ratio_a_x96: int, sqrt_ratio_b_x96: int, liquidity: int, round_up: bool) -> int:
+    if sqrt_ratio_a_x96 > sqrt_ratio_b_x96:
+      sqrt_ratio_a_x96, sqrt_ratio_b_x96 = sqrt_ratio_b_x96, sqrt_ratio_a_x96
+    if round_up:
+      return SqrtPriceMath.mul_div_rounding_up(liquidity, sqrt_ratio_b_x96 - sqrt_ratio_a_x96, SqrtPriceMath.Q96)
+    return SqrtPriceMath.mul_div(liquidity, sqrt_ratio_b_x96 - sqrt_ratio_a_x96, SqrtPriceMath.Q96)
@@ -0,0 +1,41 @@
+from typing import Iterable
+
+from blockchain.uniswap.TickMath import TickMath
+
+
+class SqrtPriceTable:
+  """
+  Exact sqrt prices (Q64.96) of the ticks a pool actually uses, keyed by tick.
+
+  Only the ticks swaps and depth walks stop at are precomputed: the pool's initialized ticks and
+  the bitmap word boundaries (see `warm`, called when the mirror is loaded). Any other tick is
+  computed with TickMath on first lookup and kept, so the table grows with the ticks in use
+  instead of holding all ~1.77M ticks of spacing 1.
+  """
+  _tables: dict[int, "SqrtPriceTable"] = {}
+
+  def __init__(self, tick_spacing: int):
+    self.tick_spacing = tick_spacing
+    self._sqrt_prices: dict[int, int] = {}
+
+  @classmethod
+  def for_tick_spacing(cls, tick_spacing: int) -> "SqrtPriceTable":
+    """Returns the process-wide table for a tick spacing."""
+    if tick_spacing not in cls._tables:
+      cls._tables[tick_spacing] = cls(tick_spacing)
+    return cls._tables[tick_spacing]
+
+  def warm(self, ticks: Iterable[int]) -> None:
+    """Precomputes the sqrt prices of ticks, off the hot path."""
+    for tick in ticks:
+      if tick not in self._sqrt_prices:
+        self._sqrt_prices[tick] = TickMath.get_sqrt_ratio_at_tick(tick)
+
+  def get_sqrt_ratio_at_tick(self, tick: int) -> int:
+    sqrt_price = self._sqrt_prices.get(tick)
+    if sqrt_price is None:
+      sqrt_price = self._sqrt_prices[tick] = TickMath.get_sqrt_ratio_at_tick(tick)
+    return sqrt_price
+
+  def __len__(self) -> int:
+    return len(self._sqrt_prices)
@@ -0,0 +1,70 @@
+from blockchain.uniswap.SqrtPriceMath import SqrtPriceMath
+
+
+class SwapMath:
+  """Integer port of Uniswap V3 SwapMath."""
+  FEE_DENOMINATOR = 1_000_000
+
+  @staticmethod
+  def compute_swap_step(sqrt_ratio_current_x96: int, sqrt_ratio_target_x96: int, liquidity: int,
+                        amount_remaining: int, fee_pips: int) -> tuple[int, int, int, int]:
+    """
+    Computes a single swap step within one tick range.
+
+    Returns:
+      tuple[int, int, int, int]: (sqrt_ratio_next_x96, amount_in, amount_out, fee_amount)
+    """
+    zero_for_one = sqrt_ratio_current_x96 >= sqrt_ratio_target_x96
+    exact_in = amount_remaining >= 0
+    amount_in = 0
+    amount_out = 0
+
+    if exact_in:
+      amount_remaining_less_fee = SqrtPriceMath.mul_div(
+        amount_remaining, SwapMath.FEE_DENOMINATOR - fee_pips, SwapMath.FEE_DENOMINATOR)
+      if zero_for_one:
+        amount_in = SqrtPriceMath.get_amount0_delta(sqrt_ratio_target_x96, sqrt_ratio_current_x96, liquidity, True)
+      else:
+        amount_in = SqrtPriceMath.get_amount1_delta(sqrt_ratio_current_x96, sqrt_ratio_target_x96, liquidity, True)
+
+      if amount_remaining_less_fee >= amount_in:
+        sqrt_ratio_next_x96 = sqrt_ratio_target_x96
+      else:
+        sqrt_ratio_next_x96 = SqrtPriceMath.get_next_sqrt_price_from_input(
+          sqrt_ratio_current_x96, liquidity, amount_remaining_less_fee, zero_for_one)
+    else:
+      if zero_for_one:
+        amount_out = SqrtPriceMath.get_amount1_delta(sqrt_ratio_target_x96, sqrt_ratio_current_x96, liquidity, False)
+      else:
+        amount_out = SqrtPriceMath.get_amount0_delta(sqrt_ratio_current_x96, sqrt_ratio_target_x96, liquidity, False)
+
+      if -amount_remaining >= amount_out:
+        sqrt_ratio_next_x96 = sqrt_ratio_target_x96
+      else:
+        sqrt_ratio_next_x96 = SqrtPriceMath.get_next_sqrt_price_from_output(
+          sqrt_ratio_current_x96, liquidity, -amount_remaining, zero_for_one)
+
+    reached_target = sqrt_ratio_target_x96 == sqrt_ratio_next_x96
+
+    if zero_for_one:
+      if not (reached_target and exact_in):
+        amount_in = SqrtPriceMath.get_amount0_delta(sqrt_ratio_next_x96, sqrt_ratio_current_x96, liquidity, True)
+      if not (reached_target and not exact_in):
+        amount_out = SqrtPriceMath.get_amount1_delta(sqrt_ratio_next_x96, sqrt_ratio_current_x96, liquidity, False)
+    else:
+      if not (reached_target and exact_in):
+        amount_in = SqrtPriceMath.get_amount1_delta(sqrt_ratio_current_x96, sqrt_ratio_next_x96, liquidity, True)
+      if not (reached_target and not exact_in):
+        amount_out = SqrtPriceMath.get_amount0_delta(sqrt_ratio_current_x96, sqrt_ratio_next_x96, liquidity, False)
+
+    # Cap the output amount to not exceed the remaining output amount
+    if not exact_in and amount_out > -amount_remaining:
+      amount_out = -amount_remaining
+
+    if exact_in and sqrt_ratio_next_x96 != sqrt_ratio_target_x96:
+      # We didn't reach the target, so take the remainder of the maximum input as fee
+      fee_amount = amount_remaining - amount_in
+    else:
+      fee_amount = SqrtPriceMath.mul_div_rounding_up(amount_in, fee_pips, SwapMath.FEE_DENOMINATOR - fee_pips)
+
+    return sqrt_ratio_next_x96, amount_in, amount_out, fee_amount
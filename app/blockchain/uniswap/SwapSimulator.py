@@ -0,0 +1,115 @@
+from dataclasses import dataclass
+
+from blockchain.uniswap.PoolMirror import PoolMirror
+from blockchain.uniswap.SqrtPriceTable import SqrtPriceTable
+from blockchain.uniswap.SwapMath import SwapMath
+from blockchain.uniswap.TickMath import TickMath
+
+
+@dataclass(frozen=True)
+class SwapResult:
+  amount0: int
+  amount1: int
+  sqrt_price_x96_after: int
+  tick_after: int
+  liquidity_after: int
+  initialized_ticks_crossed: int
+
+
+class SwapSimulator:
+  """
+  Replays UniswapV3Pool.swap against the locally mirrored pool state.
+  Quotes match QuoterV2 quoteExactInputSingle/quoteExactOutputSingle without any eth_call.
+  """
+
+  def __init__(self, mirror: PoolMirror, fee: int):
+    self.mirror = mirror
+    self.fee = fee
+    self.sqrt_price_table = SqrtPriceTable.for_tick_spacing(mirror.tick_spacing)
+
+  def swap(self, zero_for_one: bool, amount_specified: int, sqrt_price_limit_x96: int = 0) -> SwapResult:
+    """
+    Simulates a swap. A positive amount_specified is an exact input, a negative one an exact output.
+    A limit of 0 behaves like the quoter and swaps until MIN/MAX sqrt ratio.
+    """
+    if amount_specified == 0:
+      raise ValueError("amount_specified must not be 0")
+    if not self.mirror.is_loaded:
+      raise RuntimeError("Pool mirror is not loaded")
+
+    if sqrt_price_limit_x96 == 0:
+      sqrt_price_limit_x96 = TickMath.MIN_SQRT_RATIO + 1 if zero_for_one else TickMath.MAX_SQRT_RATIO - 1
+
+    sqrt_price_x96 = self.mirror.sqrt_price_x96
+    if zero_for_one and not TickMath.MIN_SQRT_RATIO < sqrt_price_limit_x96 < sqrt_price_x96:
+      raise ValueError("Invalid sqrt price limit for zero_for_one swap")
+    if not zero_for_one and not sqrt_price_x96 < sqrt_price_limit_x96 < TickMath.MAX_SQRT_RATIO:
+      raise ValueError("Invalid sqrt price limit for one_for_zero swap")
+
+    exact_input = amount_specified > 0
+    amount_remaining = amount_specified
+    amount_calculated = 0
+    tick = self.mirror.tick
+    liquidity = self.mirror.liquidity
+    ticks_crossed = 0
+
+    while amount_remaining != 0 and sqrt_price_x96 != sqrt_price_limit_x96:
+      sqrt_price_start_x96 = sqrt_price_x96
+      tick_next, initialized = self.mirror.next_initialized_tick_within_one_word(tick, zero_for_one)
+      tick_next = max(TickMath.MIN_TICK, min(TickMath.MAX_TICK, tick_next))
+      sqrt_price_next_x96 = self.sqrt_price_table.get_sqrt_ratio_at_tick(tick_next)
+
+      if zero_for_one:
+        sqrt_price_target_x96 = max(sqrt_price_next_x96, sqrt_price_limit_x96)
+      else:
+        sqrt_price_target_x96 = min(sqrt_price_next_x96, sqrt_price_limit_x96)
+
+      sqrt_price_x96, amount_in, amount_out, fee_amount = SwapMath.compute_swap_step(
+        sqrt_price_x96, sqrt_price_target_x96, liquidity, amount_remaining, self.fee)
+
+      if exact_input:
+        amount_remaining -= amount_in + fee_amount
+        amount_calculated -= amount_out
+      else:
+        amount_remaining += amount_out
+        amount_calculated += amount_in + fee_amount
+
+      if sqrt_price_x96 == sqrt_price_next_x96:
+        if initialized:
+          liquidity_net = self.mirror.get_liquidity_net(tick_next)
+          liquidity += -liquidity_net if zero_for_one else liquidity_net
+          if liquidity < 0:
+            raise ValueError(f"Negative liquidity after crossing tick {tick_next}")
+          ticks_crossed += 1
+        tick = tick_next - 1 if zero_for_one else tick_next
+      elif sqrt_price_x96 != sqrt_price_start_x96:
+        tick = TickMath.get_tick_at_sqrt_ratio(sqrt_price_x96)
+
+    if zero_for_one == exact_input:
+      amount0, amount1 = amount_specified - amount_remaining, amount_calculated
+    else:
+      amount0, amount1 = amount_calculated, amount_specified - amount_remaining
+
+    return SwapResult(
+      amount0=amount0,
+      amount1=amount1,
+      sqrt_price_x96_after=sqrt_price_x96,
+      tick_after=tick,
+      liquidity_after=liquidity,
+      initialized_ticks_crossed=ticks_crossed
+    )
+
+  def quote_exact_input_single(self, zero_for_one: bool, amount_in: int, sqrt_price_limit_x96: int = 0) -> int:
+    """Returns the raw output amount, like QuoterV2.quoteExactInputSingle."""
+    result = self.swap(zero_for_one, amount_in, sqrt_price_limit_x96)
+    return -(result.amount1 if zero_for_one else result.amount0)
+
+  def quote_exact_output_single(self, zero_for_one: bool, amount_out: int, sqrt_price_limit_x96: int = 0) -> int:
+    """Returns the raw input amount, like QuoterV2.quoteExactOutputSingle."""
+    result = self.swap(zero_for_one, -amount_out, sqrt_price_limit_x96)
+    amount_in, amount_out_received = (
+      (result.amount0, -result.amount1) if zero_for_one else (result.amount1, -result.amount0))
+    # The quoter reverts when the pool cannot deliver the full output without a price limit
+    if sqrt_price_limit_x96 == 0 and amount_out_received != amount_out:
+      raise ValueError(f"Insufficient pool liquidity for output {amount_out}, received {amount_out_received}")
+    return amount_in
@@ -0,0 +1,76 @@
+import time
+
+from eth_abi import encode
+from web3.types import TxParams
+
+from blockchain.GasOracle import GasSnapshot
+
+
+class SwapTxTemplate:
+  """
+  Pre-encoded Universal Router calldata for a single-hop V3 exact-input swap of one direction.
+
+  execute(bytes commands, bytes[] inputs, uint256 deadline) with the single command
+  V3_SWAP_EXACT_IN and input (recipient=MSG_SENDER, amountIn, amountOutMin, path, payerIsUser=True).
+  Every argument except amountIn, amountOutMin and the deadline is fixed per direction, so the
+  calldata is encoded once and those three 32-byte slots are patched in place per trade.
+  """
+  EXECUTE_SELECTOR = bytes.fromhex("3593564c")
+  V3_SWAP_EXACT_IN = 0x00
+  MSG_SENDER = "0x0000000000000000000000000000000000000001"
+  DEADLINE_SECONDS = 180
+  GAS_LIMIT_MULTIPLIER = 1.25
+
+  # Byte offsets into the calldata (selector included), see _encode_execute for the layout
+  _DEADLINE_OFFSET = 4 + 0x40
+  _INPUT_OFFSET = 4 + 0x100
+  _AMOUNT_IN_OFFSET = _INPUT_OFFSET + 0x20
+  _AMOUNT_OUT_MIN_OFFSET = _INPUT_OFFSET + 0x40
+
+  def __init__(self, router_address: str, sender: str, chain_id: int, token_in: str, fee: int, token_out: str):
+    self.router_address = router_address
+    self.sender = sender
+    self.chain_id = chain_id
+    self.token_in = token_in
+    self.token_out = token_out
+    self.path = bytes.fromhex(token_in[2:]) + fee.to_bytes(3, "big") + bytes.fromhex(token_out[2:])
+    self._calldata = self._encode_execute(self.path)
+
+  def build(self, amount_in: int, amount_out_min: int, gas: GasSnapshot, gas_used: int,
+            base_fee_multiplier: float = 1.2, deadline: int | None = None) -> TxParams:
+    """Transaction with the trade values patched in; the nonce is assigned when signing."""
+    if deadline is None:
+      deadline = int(time.time()) + self.DEADLINE_SECONDS
+
+    calldata = bytearray(self._calldata)
+    calldata[self._AMOUNT_IN_OFFSET:self._AMOUNT_IN_OFFSET + 32] = amount_in.to_bytes(32, "big")
+    calldata[self._AMOUNT_OUT_MIN_OFFSET:self._AMOUNT_OUT_MIN_OFFSET + 32] = amount_out_min.to_bytes(32, "big")
+    calldata[self._DEADLINE_OFFSET:self._DEADLINE_OFFSET + 32] = deadline.to_bytes(32, "big")
+
+    return {
+      "type": 2,
+      "chainId": self.chain_id,
+      "from": self.sender,
+      "to": self.router_address,
+      "value": 0,
+      "data": "0x" + calldata.hex(),
+      "gas": int(gas_used * self.GAS_LIMIT_MULTIPLIER),
+      "maxFeePerGas": gas.max_fee_per_gas(base_fee_multiplier),
+      "maxPriorityFeePerGas": gas.priority_fee,
+    }
+
+  @classmethod
+  def _encode_execute(cls, path: bytes) -> bytes:
+    # Layout after the selector:
+    #   0x00 offset(commands) | 0x20 offset(inputs) | 0x40 deadline
+    #   0x60 len(commands)=1  | 0x80 command byte (padded)
+    #   0xa0 len(inputs)=1    | 0xc0 offset(inputs[0]) | 0xe0 len(inputs[0])
+    #   0x100 inputs[0]: recipient | amountIn | amountOutMin | offset(path) | payerIsUser | path
+    swap_input = encode(
+      ["address", "uint256", "uint256", "bytes", "bool"],
+      [cls.MSG_SENDER, 0, 0, path, True]
+    )
+    return cls.EXECUTE_SELECTOR + encode(
+      ["bytes", "bytes[]", "uint256"],
+      [bytes([cls.V3_SWAP_EXACT_IN]), [swap_input], 0]
+    )
@@ -30,20 +30,19 @@ class AccountManager:
     }
 
   def get_wallet_balances(self):
-    usdc = self.usdc.to_human(self.usdc.contract.functions.balanceOf(self.wallet.address).call())
-    eurc = self.eurc.to_human(self.eurc.contract.functions.balanceOf(self.wallet.address).call())
-    eth_raw = self.wallet_service.w3.eth.get_balance(self.wallet.address)
-    eth = float(self.wallet_service.w3.from_wei(eth_raw, "ether"))
-
+    balances = self.wallet_service.get_balances([self.usdc, self.eurc])
     return {
-      Tokens.USDC: usdc,
-      Tokens.EURC: eurc,
-      Tokens.ETH: eth
+      Tokens.USDC: balances[Tokens.USDC],
+      Tokens.EURC: balances[Tokens.EURC],
+      Tokens.ETH: balances[Tokens.ETH]
     }
 
   def get_total_balances(self):
-    coinbase_balances = self.get_coinbase_balances()
-    wallet_balances = self.get_wallet_balances()
+    return self.sum_balances(self.get_coinbase_balances(), self.get_wallet_balances())
+
+  @staticmethod
+  def sum_balances(coinbase_balances: dict[Tokens, float], wallet_balances: dict[Tokens, float]):
+    """Totals of already fetched Coinbase and wallet balances."""
     return {
       Tokens.USDC: coinbase_balances[Tokens.USDC] + wallet_balances[Tokens.USDC],
       Tokens.EURC: coinbase_balances[Tokens.EURC] + wallet_balances[Tokens.EURC],
@@ -0,0 +1,56 @@
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from common.logger import get_logger
+
+
+class ConcurrentFetcher:
+  """
+  Runs blocking fetches (REST, RPC) concurrently on a thread pool so a gather stage takes as
+  long as its slowest call instead of the sum of all calls.
+
+  Only plain functions run in the pool; coroutines belong on the event loop and are rejected.
+  A timed out fetch stops being awaited but its thread runs on, so irreversible calls (broadcasts,
+  order placement) go through `send`, which has no timeout.
+  """
+  DEFAULT_MAX_WORKERS = 8
+  DEFAULT_TIMEOUT_SECONDS = 15.0
+
+  def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, timeout: float = DEFAULT_TIMEOUT_SECONDS):
+    self.logger = get_logger()
+    self.timeout = timeout
+    self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+
+  async def fetch(self, fetch: Callable[[], Any], timeout: float | None = None) -> Any:
+    """Runs one read in the pool. Raises TimeoutError if it takes longer than the timeout."""
+    loop = asyncio.get_running_loop()
+    return await asyncio.wait_for(
+      loop.run_in_executor(self._executor, self._run, fetch),
+      timeout=timeout if timeout is not None else self.timeout
+    )
+
+  async def gather(self, *fetches: Callable[[], Any], timeout: float | None = None) -> list[Any]:
+    """Runs all fetches concurrently and returns their results in order; the first failure is raised."""
+    return list(await asyncio.gather(*(self.fetch(fetch, timeout) for fetch in fetches)))
+
+  async def send(self, send: Callable[[], Any]) -> Any:
+    """
+    Runs an irreversible call in the pool and waits until it returned or raised. It has no timeout:
+    a timed out send could still go out after the caller gave up on it.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(self._executor, self._run, send)
+
+  def shutdown(self):
+    self._executor.shutdown(wait=False, cancel_futures=True)
+
+  @staticmethod
+  def _run(fetch: Callable[[], Any]) -> Any:
+    result = fetch()
+    if inspect.iscoroutine(result):
+      # asyncio.run would spin up a new event loop per call in the worker thread
+      result.close()
+      raise TypeError(f"{fetch} returned a coroutine, await it on the event loop instead")
+    return result
@@ -1,6 +1,7 @@
 from datetime import datetime
+from enum import StrEnum
 
-from sqlalchemy import BigInteger, Boolean, DateTime, ForeignKey, Integer, String, func
+from sqlalchemy import JSON, BigInteger, Boolean, DateTime, ForeignKey, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from database.database import Base
@@ -14,6 +15,20 @@ class IndexedStatus(Base):
   synced: Mapped[bool] = mapped_column(Boolean, nullable=False)
 
 
+class IndexedRange(Base):
+  """
+  An indexed block range that is not final yet: the hash of its last block to detect a reorg, and
+  the undo data (position rows before the range, inserted event tx hashes) to roll it back.
+  """
+  __tablename__ = "indexed_ranges"
+
+  id: Mapped[int] = mapped_column(primary_key=True)
+  from_block: Mapped[int] = mapped_column(Integer, nullable=False)
+  to_block: Mapped[int] = mapped_column(Integer, unique=True, nullable=False)
+  block_hash: Mapped[str] = mapped_column(String(66), nullable=False)
+  undo: Mapped[dict] = mapped_column(JSON, nullable=False)
+
+
 class MintEvent(Base):
   __tablename__ = "mint_events"
 
@@ -71,3 +86,36 @@ class Position(Base):
     back_populates="position",
     cascade="all, delete-orphan"
   )
+
+
+class TaskState(StrEnum):
+  PENDING = "PENDING"
+  RUNNING = "RUNNING"
+  DONE = "DONE"
+  FAILED = "FAILED"
+  CANCELLED = "CANCELLED"
+
+
+class TaskRecord(Base):
+  """An executor task of the persistent queue, with its constructor payload and progress checkpoint."""
+  __tablename__ = "executor_tasks"
+
+  id: Mapped[str] = mapped_column(String(32), primary_key=True)
+  task_type: Mapped[str] = mapped_column(String(64), nullable=False)
+  priority: Mapped[int] = mapped_column(Integer, nullable=False)
+  state: Mapped[str] = mapped_column(String(16), nullable=False, index=True)
+  payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+  checkpoint: Mapped[dict] = mapped_column(JSON, nullable=False)
+  error: Mapped[str | None] = mapped_column(String, nullable=True)
+  claimed_by: Mapped[str | None] = mapped_column(String(128), nullable=True)
+  # Renewed by the claiming process while it runs; once it ran out another process may claim the task
+  lease_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+  created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+  updated_at: Mapped[datetime] = mapped_column(
+    DateTime(timezone=True),
+    server_default=func.now(),
+    onupdate=func.now(),
+    server_onupdate=func.now(),
+    nullable=False
+  )
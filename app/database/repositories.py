@@ -1,7 +1,11 @@
+from datetime import timedelta
+
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from common.logger import get_logger
-from database.models import CollectEvent, IndexedStatus, MintEvent, Position
+from database.models import CollectEvent, IndexedRange, IndexedStatus, MintEvent, Position, TaskRecord, TaskState
 
 
 class IndexedBlockRepository:
@@ -16,14 +20,37 @@ class IndexedBlockRepository:
       self.db.commit()
     return row
 
-  def set_latest(self, block_number: int) -> None:
+  def set_latest(self, block_number: int, commit: bool = True) -> None:
+    """Moves the checkpoint; commit=False leaves it to the caller's transaction (e.g. with a range's events)."""
     row = self.db.query(IndexedStatus).first()
     if row:
       row.latest_block = block_number
     else:
       row = IndexedStatus(latest_block=block_number, synced=False)
       self.db.add(row)
-    self.db.commit()
+    if commit:
+      self.db.commit()
+
+
+class IndexedRangeRepository:
+  """Journal of the not yet final ranges. Writes are part of the caller's transaction."""
+
+  def __init__(self, db: Session):
+    self.db = db
+
+  def add(self, from_block: int, to_block: int, block_hash: str, undo: dict) -> None:
+    self.db.add(IndexedRange(from_block=from_block, to_block=to_block, block_hash=block_hash, undo=undo))
+
+  def get_unfinalized(self) -> list[IndexedRange]:
+    """Newest range first."""
+    return self.db.query(IndexedRange).order_by(IndexedRange.to_block.desc()).all()
+
+  def delete(self, indexed_range: IndexedRange) -> None:
+    self.db.delete(indexed_range)
+
+  def finalize(self, up_to_block: int) -> int:
+    """Drops the undo data of ranges at or below up_to_block; they can't be reorged anymore."""
+    return self.db.query(IndexedRange).filter(IndexedRange.to_block <= up_to_block).delete()
 
 
 class MintEventsRepository:
@@ -49,6 +76,16 @@ class MintEventsRepository:
     self.db.add(event)
     self.db.commit()
 
+  def insert_many(self, rows: list[dict]) -> None:
+    """Inserts a batch of mint rows in one statement, known tx hashes are skipped. Not committed."""
+    if not rows:
+      return
+    self.db.execute(insert(MintEvent).values(rows).on_conflict_do_nothing(index_elements=[MintEvent.tx_hash]))
+
+  def delete_by_tx_hashes(self, tx_hashes: list[str]) -> None:
+    if tx_hashes:
+      self.db.query(MintEvent).filter(MintEvent.tx_hash.in_(tx_hashes)).delete()
+
 
 class CollectEventsRepository:
   def __init__(self, db: Session):
@@ -70,6 +107,16 @@ class CollectEventsRepository:
     self.db.add(event)
     self.db.commit()
 
+  def insert_many(self, rows: list[dict]) -> None:
+    """Inserts a batch of collect rows in one statement, known tx hashes are skipped. Not committed."""
+    if not rows:
+      return
+    self.db.execute(insert(CollectEvent).values(rows).on_conflict_do_nothing(index_elements=[CollectEvent.tx_hash]))
+
+  def delete_by_tx_hashes(self, tx_hashes: list[str]) -> None:
+    if tx_hashes:
+      self.db.query(CollectEvent).filter(CollectEvent.tx_hash.in_(tx_hashes)).delete()
+
 
 class PositionRepository:
   def __init__(self, db: Session):
@@ -93,3 +140,114 @@ class PositionRepository:
 
   def get_by_token_id(self, token_id: int) -> Position | None:
     return self.db.query(Position).filter_by(token_id=token_id).first()
+
+  def get_by_token_ids(self, token_ids: list[int]) -> list[Position]:
+    if not token_ids:
+      return []
+    return self.db.query(Position).filter(Position.token_id.in_(token_ids)).all()
+
+  def upsert_many(self, rows: list[dict]) -> dict[int, int]:
+    """
+    Inserts or updates (by token_id) a batch of position rows in one statement. Not committed.
+    Returns token_id -> position id of the written rows.
+    """
+    if not rows:
+      return {}
+    statement = insert(Position).values(rows)
+    statement = statement.on_conflict_do_update(
+      index_elements=[Position.token_id],
+      set_={
+        **{
+          column: statement.excluded[column]
+          for column in rows[0]
+          if column != "token_id"
+        },
+        "updated_at": func.now(),
+      }
+    ).returning(Position.token_id, Position.id)
+    return {token_id: position_id for token_id, position_id in self.db.execute(statement)}
+
+  def delete_by_token_ids(self, token_ids: list[int]) -> None:
+    if token_ids:
+      self.db.query(Position).filter(Position.token_id.in_(token_ids)).delete()
+
+
+class TaskRecordRepository:
+  UNFINISHED_STATES = (TaskState.PENDING, TaskState.RUNNING)
+
+  def __init__(self, db: Session):
+    self.db = db
+
+  def upsert_many(self, rows: list[dict], lease: timedelta) -> None:
+    """
+    Writes a batch of task rows (inserts and state updates) in one statement and transaction. The
+    writer claims the rows and leases them for `lease` from now.
+    """
+    if not rows:
+      return
+    lease_until = func.now() + lease
+    statement = insert(TaskRecord).values([{**row, "lease_until": lease_until} for row in rows])
+    statement = statement.on_conflict_do_update(
+      index_elements=[TaskRecord.id],
+      set_={
+        "priority": statement.excluded.priority,
+        "state": statement.excluded.state,
+        "checkpoint": statement.excluded.checkpoint,
+        "error": statement.excluded.error,
+        "claimed_by": statement.excluded.claimed_by,
+        "lease_until": statement.excluded.lease_until,
+        "updated_at": func.now(),
+      }
+    )
+    self.db.execute(statement)
+    self.db.commit()
+
+  def renew_leases(self, owner: str, lease: timedelta) -> int:
+    """Extends the lease of the unfinished tasks claimed by owner; returns the number of renewed rows."""
+    count = (
+      self.db.query(TaskRecord)
+      .filter(TaskRecord.claimed_by == owner, TaskRecord.state.in_(self.UNFINISHED_STATES))
+      .update({TaskRecord.lease_until: func.now() + lease}, synchronize_session=False)
+    )
+    self.db.commit()
+    return count
+
+  def claim_unfinished(self, owner: str, lease: timedelta) -> list[TaskRecord]:
+    """
+    Claims the pending and running tasks that are unclaimed, already owner's, or whose lease ran
+    out; tasks of a live process stay with it. Rows another process is claiming at the same time
+    are skipped (FOR UPDATE SKIP LOCKED) instead of waiting for its transaction.
+    """
+    rows = (
+      self.db.query(TaskRecord)
+      .filter(
+        TaskRecord.state.in_(self.UNFINISHED_STATES),
+        or_(
+          TaskRecord.claimed_by.is_(None),
+          TaskRecord.claimed_by == owner,
+          TaskRecord.lease_until.is_(None),
+          TaskRecord.lease_until < func.now(),
+        )
+      )
+      .order_by(TaskRecord.created_at)
+      .with_for_update(skip_locked=True)
+      .all()
+    )
+    for row in rows:
+      row.claimed_by = owner
+      row.lease_until = func.now() + lease
+    self.db.commit()
+    return rows
+
+  def get_leased_seconds(self, owner: str) -> float | None:
+    """Seconds until the last live lease of another process on an unfinished task runs out, None if there is none."""
+    remaining = (
+      self.db.query(func.max(func.extract("epoch", TaskRecord.lease_until - func.now())))
+      .filter(
+        TaskRecord.state.in_(self.UNFINISHED_STATES),
+        TaskRecord.claimed_by != owner,
+        TaskRecord.lease_until > func.now()
+      )
+      .scalar()
+    )
+    return float(remaining) if remaining is not None else None
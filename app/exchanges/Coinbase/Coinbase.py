@@ -11,12 +11,13 @@ from coinbase import jwt_generator
 from coinbase.rest import RESTClient
 from coinbase.rest.types.orders_types import GetOrderResponse
 from coinbase.rest.types.product_types import GetProductBookResponse, ListProductsResponse, Product
-from web3 import Web3
 
 from app.Configurations import DEFAULT_TIMEOUT_ORDERS
 from app.exchanges.Coinbase.DepositAdresses import DepositAddresses
+from app.exchanges.Coinbase.OrderBook import OrderBook
 from app.exchanges.Coinbase.Responses.TransactionList import Transaction, TransactionList
 from app.exchanges.Exchange import Exchange
+from blockchain.GasOracle import GasOracle, GasTemplate
 from blockchain.Network import Network
 from blockchain.Token import Token, Tokens
 from common.logger import get_logger
@@ -39,8 +40,9 @@ class Coinbase:
     if not self.api_key or not self.api_secret:
       raise EnvironmentError("Missing Coinbase API credentials")
 
+    self.rest_client = RESTClient(api_key=self.api_key, api_secret=self.api_secret)
     self.product = self.get_product(token0, token1)
-    self.w3 = Web3(Web3.HTTPProvider(os.getenv("RPC_URL")))
+    self.gas_oracle = GasOracle.shared()
 
   def _generate_jwt(self, request_method: str, request_path: str) -> str:
     """Generate JWT for Coinbase API authentication."""
@@ -72,7 +74,8 @@ class Coinbase:
     return len(increment_str.split(".")[1].rstrip('0'))
 
   def create_order(self, token0: Tokens, token1: Tokens, side: str, type_: str, amount: float,
-                   price: Optional[float] = None):
+                   price: Optional[float] = None, client_order_id: str | None = None):
+    """Places an order. Coinbase creates one order per client_order_id and returns that one for a repeated ID."""
     side = side.lower()
     type_ = type_.lower()
     if side not in ('buy', 'sell') or type_ not in ('limit', 'market'):
@@ -87,9 +90,9 @@ class Coinbase:
 
     order_configuration: dict
     if type_ == "market":
-      market_config = {"base_size": str(amount)}
+      market_config = {"base_size": f"{float(amount):.{base_prec}f}"}
       if side == "buy":
-        market_config = {"quote_size": str(amount)}
+        market_config = {"quote_size": f"{float(amount):.{quote_prec}f}"}
       order_configuration = {"market_market_ioc": market_config}
     else:
       base_size = amount / price if side == "buy" else amount
@@ -102,7 +105,7 @@ class Coinbase:
       }
 
     payload = {
-      "client_order_id": str(uuid.uuid4()),
+      "client_order_id": client_order_id or str(uuid.uuid4()),
       "product_id": self.product.product_id,
       "side": side.upper(),
       "order_configuration": order_configuration,
@@ -113,6 +116,18 @@ class Coinbase:
     self.logger.info(f"Order created: {order_id if order_id else 'None'}")
     return order
 
+  def get_order_by_client_id(self, client_order_id: str, limit: int = 100) -> dict | None:
+    """Looks up one of the last `limit` orders of the product by its client_order_id, None if it doesn't exist."""
+    response = self._advanced_trade_request(
+      "GET",
+      "/api/v3/brokerage/orders/historical/batch",
+      params={"product_ids": self.product.product_id, "limit": limit},
+    )
+    for order in response.get("orders", []):
+      if order.get("client_order_id") == client_order_id:
+        return {"id": order["order_id"], "status": order.get("status", "").lower(), "raw": {"order": order}}
+    return None
+
   def get_eth_price(self):
     ticker = self._advanced_trade_request("GET", "/api/v3/brokerage/products/ETH-USD/ticker")
     trades = ticker.get("trades", [])
@@ -140,7 +155,8 @@ class Coinbase:
   async def wait_order_filled(self, order_id: str, timeout: int = DEFAULT_TIMEOUT_ORDERS):
     end_time = asyncio.get_event_loop().time() + timeout
     while asyncio.get_event_loop().time() < end_time:
-      order_response = self._advanced_trade_request("GET", f"/api/v3/brokerage/orders/historical/{order_id}")
+      order_response = await asyncio.to_thread(
+        self._advanced_trade_request, "GET", f"/api/v3/brokerage/orders/historical/{order_id}")
       order = order_response.get("order", {})
       status = order.get("status", "").lower()
       if status in ('filled', 'cancelled', 'canceled'):
@@ -181,11 +197,9 @@ class Coinbase:
 
     return 0.0
 
-  async def estimate_withdrawal_fees(self) -> float:
+  def estimate_withdrawal_fees(self) -> float:
     """Return hardcoded withdrawal fees for a given token."""
-    gas_price_gwei = self.w3.eth.gas_price / 1e9
-    gas_limit = 65000
-    fee_eth = gas_price_gwei * gas_limit / 1e9
+    fee_eth = self.gas_oracle.estimate_cost_eth(GasTemplate.ERC20_TRANSFER)
     fee_usd = fee_eth * self.get_eth_price()
     return max(fee_usd * 2 + 0.01, 0.11)  # Ensure a minimum fee of $0.11
 
@@ -236,9 +250,7 @@ class Coinbase:
     return deposit_addresses.get_address(network)
 
   def get_product(self, token0: Tokens, token1: Tokens) -> Product:
-    client = RESTClient(api_key=self.api_key, api_secret=self.api_secret)
-
-    products_response: ListProductsResponse = client.get_products()
+    products_response: ListProductsResponse = self.rest_client.get_products()
 
     # Iterate over all products
     for p in products_response.products:
@@ -278,13 +290,16 @@ class Coinbase:
     return json.loads(response.text)
 
   def get_product_book(self, product_id, limit=None, aggregation_price_increment=None) -> GetProductBookResponse:
-    client = RESTClient(api_key=self.api_key, api_secret=self.api_secret)
+    return self.rest_client.get_product_book(product_id=product_id, level=2, limit=limit,
+                                             aggregation_price_increment=aggregation_price_increment)
 
-    return client.get_product_book(product_id=product_id, level=2, limit=limit,
-                                   aggregation_price_increment=aggregation_price_increment)
+  def get_order_book(self, product_id: str | None = None, limit=None) -> OrderBook:
+    """L2 book of the product (default: own product) converted once into prefix-sum arrays."""
+    return OrderBook.from_product_book(self.get_product_book(product_id or self.product.product_id, limit=limit))
 
-  def withdrawal(self, token: Tokens, dest_address: str, amount: float, network: Network) -> dict:
-    """Initiate a withdrawal and return the transaction ID"""
+  def withdrawal(self, token: Tokens, dest_address: str, amount: float, network: Network,
+                 idem: str | None = None) -> dict:
+    """Initiate a withdrawal and return the transaction ID. Requests with the same idem key execute once."""
     account_uuid = self.get_account_uuid(token)
 
     jwt_token = self._generate_jwt("POST", f"/v2/accounts/{account_uuid}/transactions")
@@ -317,7 +332,7 @@ class Coinbase:
     }  # TODO: PROD
 
     # Optional but recommended for idempotence
-    payload["idem"] = str(uuid.uuid4())
+    payload["idem"] = idem or str(uuid.uuid4())
 
     # Send POST request
     response = requests.post(
@@ -400,7 +415,7 @@ class Coinbase:
   async def wait_till_withdrawal_confirmed(self, token: Tokens, tx_id: str, timeout: int = DEFAULT_TIMEOUT_ORDERS):
     end_time = asyncio.get_event_loop().time() + timeout
     while asyncio.get_event_loop().time() < end_time:
-      tx = self.v2_list_transaction(token, tx_id)
+      tx = await asyncio.to_thread(self.v2_list_transaction, token, tx_id)
       if tx.status == "completed":
         self.logger.info(f"Withdrawal {tx_id} confirmed on network {tx.network.network_name}")
         return True
@@ -408,15 +423,17 @@ class Coinbase:
     self.logger.warning(f"Timeout waiting for withdrawal {tx_id} to be confirmed")
     return False
 
-  async def wait_till_deposit_arrives(self, send_token: Token, timeout: int = DEFAULT_TIMEOUT_ORDERS):
+  async def wait_till_deposit_arrives(self, send_token: Token, timeout: int = DEFAULT_TIMEOUT_ORDERS,
+                                      balance_before: float | None = None):
     end_time = asyncio.get_event_loop().time() + timeout
 
-    balance_before = float(self.get_account_balances(send_token.token, "free"))
+    if balance_before is None:
+      balance_before = float(await asyncio.to_thread(self.get_account_balances, send_token.token, "free"))
     self.logger.info(f"Waiting for {send_token.token} deposit. Starting balance: {balance_before}")
 
     while asyncio.get_event_loop().time() < end_time:
       try:
-        balance_after = float(self.get_account_balances(send_token.token, "free"))
+        balance_after = float(await asyncio.to_thread(self.get_account_balances, send_token.token, "free"))
 
         if balance_after > balance_before:
           diff = balance_after - balance_before
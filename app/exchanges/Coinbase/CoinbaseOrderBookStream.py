@@ -0,0 +1,230 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+from coinbase import jwt_generator
+from websockets.asyncio.client import connect
+
+from common.logger import get_logger
+from exchanges.Coinbase.OrderBook import OrderBook, OrderBookSide
+
+
+class Level2Book:
+  """
+  Local L2 book maintained from Advanced Trade level2 messages.
+
+  sequence_num is shared by all channels of one connection, so any skipped number means a
+  lost message and the book is marked out of sync until the next snapshot.
+  """
+
+  def __init__(self, product_id: str):
+    self.product_id = product_id
+    self.bids: dict[float, float] = {}
+    self.asks: dict[float, float] = {}
+    self.last_sequence: int | None = None
+    self.in_sync = False
+    self.last_message_at = 0.0
+    self._version = 0
+    self._cached_version = -1
+    self._cached_book: OrderBook | None = None
+    self._best_bid: float | None = None
+    self._best_ask: float | None = None
+
+  def reset(self) -> None:
+    self.bids.clear()
+    self.asks.clear()
+    self._best_bid = None
+    self._best_ask = None
+    self.last_sequence = None
+    self.in_sync = False
+    self._version += 1
+
+  def apply_message(self, message: dict) -> bool:
+    """Applies one websocket message. Returns False on a sequence gap, the caller has to resync."""
+    sequence = message.get("sequence_num")
+    if sequence is not None:
+      if self.last_sequence is not None and sequence != self.last_sequence + 1:
+        self.in_sync = False
+        return False
+      self.last_sequence = sequence
+    self.last_message_at = time.monotonic()
+
+    if message.get("channel") != "l2_data":
+      return True
+
+    for event in message.get("events", []):
+      if event.get("product_id") != self.product_id:
+        continue
+      if event.get("type") == "snapshot":
+        self.bids.clear()
+        self.asks.clear()
+        self._best_bid = None
+        self._best_ask = None
+        self.in_sync = True
+      for update in event.get("updates", []):
+        price = float(update["price_level"])
+        size = float(update["new_quantity"])
+        if update["side"] == "bid":
+          self._update_bid(price, size)
+        else:
+          self._update_ask(price, size)
+      self._version += 1
+    return True
+
+  def top_of_book(self) -> tuple[float | None, float | None]:
+    """(best bid, best ask), tracked incrementally and only rescanned when the best level is removed."""
+    if self._best_bid is None and self.bids:
+      self._best_bid = max(self.bids)
+    if self._best_ask is None and self.asks:
+      self._best_ask = min(self.asks)
+    return self._best_bid, self._best_ask
+
+  def _update_bid(self, price: float, size: float):
+    if size > 0:
+      self.bids[price] = size
+      if self._best_bid is not None and price > self._best_bid:
+        self._best_bid = price
+    else:
+      self.bids.pop(price, None)
+      if price == self._best_bid:
+        self._best_bid = None
+
+  def _update_ask(self, price: float, size: float):
+    if size > 0:
+      self.asks[price] = size
+      if self._best_ask is not None and price < self._best_ask:
+        self._best_ask = price
+    else:
+      self.asks.pop(price, None)
+      if price == self._best_ask:
+        self._best_ask = None
+
+  def get_order_book(self) -> OrderBook | None:
+    """Current book as prefix-sum arrays, rebuilt only when levels changed since the last call."""
+    if not self.in_sync:
+      return None
+    if self._cached_version != self._version:
+      self._cached_book = OrderBook(
+        product_id=self.product_id,
+        bids=self._to_side(self.bids, is_ask=False),
+        asks=self._to_side(self.asks, is_ask=True)
+      )
+      self._cached_version = self._version
+    return self._cached_book
+
+  @staticmethod
+  def _to_side(levels: dict[float, float], is_ask: bool) -> OrderBookSide:
+    prices = np.fromiter(sorted(levels, reverse=not is_ask), dtype=np.float64, count=len(levels))
+    sizes = np.fromiter((levels[price] for price in prices), dtype=np.float64, count=len(levels))
+    return OrderBookSide(prices, sizes, is_ask)
+
+
+class CoinbaseOrderBookStream:
+  """
+  Keeps a Level2Book current over the Advanced Trade websocket (level2 + heartbeats channels).
+  Reconnects with a fresh snapshot on sequence gaps, silence or connection errors.
+  """
+  WS_URL = "wss://advanced-trade-ws.coinbase.com"
+  STALE_AFTER_SECONDS = 5.0
+  RECONNECT_DELAY_SECONDS = 2.0
+
+  def __init__(self, product_id: str, api_key: str, api_secret: str):
+    self.logger = get_logger()
+    self.product_id = product_id
+    self.api_key = api_key
+    self.api_secret = api_secret
+    self.book = Level2Book(product_id)
+    self._top_of_book_listeners: list[Callable[[], None]] = []
+
+  def add_top_of_book_listener(self, listener: Callable[[], None]) -> None:
+    """Registers a callback for changes of the best bid or ask price while the book is in sync."""
+    self._top_of_book_listeners.append(listener)
+
+  @property
+  def is_ready(self) -> bool:
+    return self.book.in_sync and time.monotonic() - self.book.last_message_at < self.STALE_AFTER_SECONDS
+
+  def get_order_book(self) -> OrderBook | None:
+    """Latest local book, None while not synced or stale (callers fall back to REST)."""
+    if not self.is_ready:
+      return None
+    return self.book.get_order_book()
+
+  async def run(self):
+    self.logger.info(f"Starting Coinbase level2 stream for {self.product_id}...")
+    while True:
+      try:
+        await self._stream()
+      except Exception as e:
+        self.logger.error(f"Coinbase level2 stream error: {e}")
+      self.book.reset()
+      await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+
+  async def _stream(self):
+    async with connect(self.WS_URL, max_size=None) as websocket:
+      for channel in ("heartbeats", "level2"):
+        await websocket.send(json.dumps(self._subscribe_message(channel)))
+
+      while True:
+        raw = await asyncio.wait_for(websocket.recv(), timeout=self.STALE_AFTER_SECONDS)
+        message = json.loads(raw)
+        if message.get("type") == "error":
+          raise ConnectionError(f"Coinbase websocket error: {message.get('message')}")
+        top_before = self.book.top_of_book()
+        if not self.book.apply_message(message):
+          self.logger.warning(
+            f"Level2 sequence gap after {self.book.last_sequence}, got {message.get('sequence_num')}. Resyncing...")
+          return
+        if self.book.in_sync and self.book.top_of_book() != top_before:
+          self._notify_top_of_book()
+
+  def _notify_top_of_book(self):
+    for listener in list(self._top_of_book_listeners):
+      try:
+        listener()
+      except Exception as e:
+        self.logger.error(f"Top of book listener error: {e}")
+
+  def _subscribe_message(self, channel: str) -> dict:
+    return {
+      "type": "subscribe",
+      "product_ids": [self.product_id],
+      "channel": channel,
+      "jwt": jwt_generator.build_ws_jwt(self.api_key, self.api_secret.replace("\\n", "\n"))
+    }
+
+
+class ReplayOrderBookStream:
+  """Stand-in for CoinbaseOrderBookStream that feeds recorded level2 messages (JSON lines) into a Level2Book."""
+
+  def __init__(self, product_id: str, messages: list[dict] | None = None, path: str | Path | None = None):
+    self.product_id = product_id
+    self.book = Level2Book(product_id)
+    if messages is None:
+      messages = [json.loads(line) for line in Path(path).read_text().splitlines() if line.strip()] if path else []
+    self.messages = messages
+    self.position = 0
+
+  @property
+  def is_ready(self) -> bool:
+    return self.book.in_sync
+
+  def get_order_book(self) -> OrderBook | None:
+    return self.book.get_order_book()
+
+  def step(self, count: int = 1) -> bool:
+    """Applies the next count messages. Returns False once the recording is exhausted."""
+    for _ in range(count):
+      if self.position >= len(self.messages):
+        return False
+      if not self.book.apply_message(self.messages[self.position]):
+        self.book.reset()
+      self.position += 1
+    return True
+
+  async def run(self):
+    while self.step():
+      await asyncio.sleep(0)
@@ -0,0 +1,96 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+
+class OrderBookSide:
+  """
+  One side of a Coinbase L2 book as NumPy arrays, best level first.
+
+  Cumulative sizes and notionals are prefix sums with a leading 0, so the cost of filling any
+  quantity and the volume until a limit price are binary searches instead of level walks.
+  """
+
+  def __init__(self, prices: np.ndarray, sizes: np.ndarray, is_ask: bool):
+    self.is_ask = is_ask
+    self.prices = prices
+    self.sizes = sizes
+    self.cum_sizes = np.concatenate(([0.0], np.cumsum(sizes)))
+    self.cum_notionals = np.concatenate(([0.0], np.cumsum(prices * sizes)))
+    # Ascending search keys: asks are ascending already, bids are descending
+    self._price_keys = prices if is_ask else -prices
+
+  @classmethod
+  def from_entries(cls, entries, is_ask: bool) -> "OrderBookSide":
+    """Converts SDK book entries (price/size strings) once per book update."""
+    levels = [(float(entry.price), float(entry.size)) for entry in entries]
+    levels = [(price, size) for price, size in levels if size > 0]
+    prices = np.array([price for price, _ in levels], dtype=np.float64)
+    sizes = np.array([size for _, size in levels], dtype=np.float64)
+    return cls(prices, sizes, is_ask)
+
+  def __len__(self) -> int:
+    return len(self.prices)
+
+  @property
+  def depth(self) -> float:
+    return float(self.cum_sizes[-1])
+
+  @property
+  def best_price(self) -> float | None:
+    return float(self.prices[0]) if len(self.prices) else None
+
+  def notional(self, quantity: float) -> float:
+    """Quote amount for filling quantity, capped at the book depth."""
+    return float(self.notional_many(np.array([quantity]))[0])
+
+  def notional_many(self, quantities: np.ndarray) -> np.ndarray:
+    """Vectorized notional() for many candidate quantities."""
+    quantities = np.clip(np.asarray(quantities, dtype=np.float64), 0.0, self.depth)
+    if not len(self.prices):
+      return np.zeros_like(quantities)
+    levels = np.minimum(np.searchsorted(self.cum_sizes, quantities, side="right") - 1, len(self.prices) - 1)
+    return self.cum_notionals[levels] + (quantities - self.cum_sizes[levels]) * self.prices[levels]
+
+  def vwap(self, quantity: float) -> float | None:
+    """Average fill price for quantity (partial fill if the book is shorter), None for an empty fill."""
+    filled = min(quantity, self.depth)
+    if filled <= 0:
+      return None
+    return self.notional(filled) / filled
+
+  def vwap_many(self, quantities: np.ndarray) -> np.ndarray:
+    """Vectorized vwap(), NaN where nothing can be filled."""
+    filled = np.clip(np.asarray(quantities, dtype=np.float64), 0.0, self.depth)
+    with np.errstate(divide="ignore", invalid="ignore"):
+      return np.where(filled > 0, self.notional_many(filled) / filled, np.nan)
+
+  def quantity_for_notional(self, notional: float) -> float:
+    """Inverse of notional(): the quantity that can be filled for a quote amount."""
+    if not len(self.prices):
+      return 0.0
+    level = int(np.searchsorted(self.cum_notionals, notional, side="right")) - 1
+    if level >= len(self.prices):
+      return self.depth
+    return float(self.cum_sizes[level] + (notional - self.cum_notionals[level]) / self.prices[level])
+
+  def volume_until(self, limit_price: float) -> float:
+    """Total size of the levels strictly better than limit_price (below it for asks, above it for bids)."""
+    key = limit_price if self.is_ask else -limit_price
+    return float(self.cum_sizes[np.searchsorted(self._price_keys, key, side="left")])
+
+
+@dataclass(frozen=True)
+class OrderBook:
+  product_id: str
+  bids: OrderBookSide
+  asks: OrderBookSide
+
+  @classmethod
+  def from_product_book(cls, response) -> "OrderBook":
+    pricebook = response.pricebook
+    return cls(
+      product_id=pricebook.product_id,
+      bids=OrderBookSide.from_entries(pricebook.bids, is_ask=False),
+      asks=OrderBookSide.from_entries(pricebook.asks, is_ask=True)
+    )
@@ -6,15 +6,15 @@ from threading import Thread
 from typing import Literal, Tuple
 
 import dotenv
-from eth_account.datastructures import SignedTransaction
 from eth_account.signers.local import LocalAccount
-from web3 import Web3
 from web3.middleware import ExtraDataToPOAMiddleware
 from web3.types import TxParams, TxReceipt
 
 from app.Configurations import DEFAULT_TIMEOUT_ORDERS
 from app.blockchain.Contract import Contract
+from blockchain.NonceManager import NonceManager
 from blockchain.Token import Tokens
+from blockchain.Web3Provider import Web3Provider
 from common.logger import get_logger
 
 ChainName = Literal[
@@ -55,10 +55,11 @@ class IDEX(ABC):
     if not node_url:
       raise ValueError(f"No NODE_URL set for chain '{chain}'")
 
-    self.w3 = Web3(Web3.HTTPProvider(node_url))
+    self.w3 = Web3Provider.get_web3(node_url)
 
-    self.chain_id = self.w3.eth.chain_id
+    self.chain_id = Web3Provider.get_chain_id(node_url)
     self.wallet: LocalAccount = self.w3.eth.account.from_key(os.getenv("PRIVATE_KEY"))
+    self.nonce_manager = NonceManager.for_address(self.wallet.address)
 
     self.universal_router = Contract.UNIVERSAL_ROUTER.get_contract(self.w3, self.chain_id)
     self.permit2 = Contract.PERMIT2.get_contract(self.w3, self.chain_id)
@@ -67,7 +68,9 @@ class IDEX(ABC):
     self.usdc_contract = Contract.USDC.get_contract(self.w3, self.chain_id)
     self.usdc_decimals = self.eurc_contract.functions.decimals().call()
     self.eurc_decimals = self.eurc_contract.functions.decimals().call()
-    if chain in {"bsc", "unichain", "polygon", "worldchain", "avalanche"}:
+    # The Web3 instance is shared per RPC URL, inject the POA middleware only once
+    if chain in {"bsc", "unichain", "polygon", "worldchain", "avalanche"} and \
+        ExtraDataToPOAMiddleware not in self.w3.middleware_onion:
       self.w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
 
     self.ticker = {
@@ -152,7 +155,7 @@ class IDEX(ABC):
       amount_sell
     ).build_transaction({
       "from": self.wallet.address,
-      "nonce": self.w3.eth.get_transaction_count(self.wallet.address),
+      "nonce": self.nonce_manager.peek(),
     })
 
     estimated_gas = self.w3.eth.estimate_gas(tx)
@@ -160,6 +163,5 @@ class IDEX(ABC):
     gas_costs = self.w3.from_wei((estimated_gas * self.w3.eth.gas_price), "ether")
     self.logger.info(f"Gas costs: {gas_costs:.18f} ETH - {float(gas_costs) * self.get_bid_ask()['ask']}")
 
-    signed: SignedTransaction = self.wallet.sign_transaction(tx)
-    tx_hash = self.w3.eth.send_raw_transaction(signed.raw_transaction)
+    tx_hash = self.nonce_manager.sign_and_send(self.wallet, tx)
     self.logger.info(f"Approval tx sent: {tx_hash.hex()}")
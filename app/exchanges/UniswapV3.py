@@ -1,6 +1,5 @@
 from typing import Literal, Tuple
 
-from eth_account.datastructures import SignedTransaction
 from uniswap_universal_router_decoder import FunctionRecipient, RouterCodec
 from web3.types import TxParams, Wei
 
@@ -95,7 +94,7 @@ class UniswapV3(IDEX):
         .build_transaction(
           sender=self.wallet.address,
           value=0,
-          nonce=self.w3.eth.get_transaction_count(self.wallet.address),
+          nonce=self.nonce_manager.peek(),
           chain_id=self.chain_id,
           deadline=codec.get_default_deadline(),
           ur_address=self.universal_router.address
@@ -146,7 +145,7 @@ class UniswapV3(IDEX):
         .build_transaction(
           sender=self.wallet.address,
           value=amount_in,
-          nonce=self.w3.eth.get_transaction_count(self.wallet.address),
+          nonce=self.nonce_manager.peek(),
           chain_id=self.chain_id,
           deadline=codec.get_default_deadline(),
           ur_address=self.universal_router.address
@@ -165,8 +164,7 @@ class UniswapV3(IDEX):
     """Perform a UniswapV3 swap."""
 
     gas, tx = await self.prepare_order_tx(side, type_, amount, price)
-    signed: SignedTransaction = self.w3.eth.account.sign_transaction(tx, self.wallet.key)
-    tx_hash = self.w3.eth.send_raw_transaction(signed.raw_transaction)
+    tx_hash = self.nonce_manager.sign_and_send(self.wallet, tx)
     return tx_hash.hex()
 
   def get_ask(self):
@@ -1,9 +1,33 @@
+import uuid
 from abc import ABC, abstractmethod
+from enum import StrEnum
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+if TYPE_CHECKING:
+  from execution.TaskContext import TaskContext
+
+
+class TaskLane(StrEnum):
+  """Concurrency lanes of the Executor, each with its own limit of parallel tasks."""
+  ONCHAIN = "ONCHAIN"
+  COINBASE = "COINBASE"
+  TRANSFERS = "TRANSFERS"
 
 
 class BasicTask(ABC):
+  lane: TaskLane = TaskLane.ONCHAIN
+
   def __init__(self, priority: int = 10):
     self.priority = priority
+    self.task_id = uuid.uuid4().hex
+    # Progress of a started task (sent tx hash, order ID, ...), persisted so a restart resumes it
+    self.checkpoint: dict[str, Any] = {}
+    self.checkpoint_listener: Callable[["BasicTask"], Awaitable[None]] | None = None
+
+  @property
+  def dedup_key(self) -> tuple[str, str | None]:
+    """Tasks with the same key are queued or running at most once. Default: one per task type."""
+    return self.__class__.__name__, None
 
   @abstractmethod
   async def run(self):
@@ -13,3 +37,19 @@ class BasicTask(ABC):
   def build_control_message(self) -> str | None:
     """Optional aggregated status message consumed by ControlService."""
     return None
+
+  def to_payload(self) -> dict[str, Any] | None:
+    """JSON constructor arguments for the persistent task queue, None if the task is not persisted."""
+    return None
+
+  @classmethod
+  def restore(cls, payload: dict[str, Any], checkpoint: dict[str, Any],
+              context: "TaskContext") -> "BasicTask | None":
+    """Rebuilds a persisted task after a restart. None drops it (e.g. an opportunity that went stale)."""
+    return None
+
+  async def save_checkpoint(self, **values: Any) -> None:
+    """Records progress and waits until it is persisted, before the next irreversible step."""
+    self.checkpoint.update(values)
+    if self.checkpoint_listener:
+      await self.checkpoint_listener(self)
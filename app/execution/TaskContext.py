@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+
+from blockchain.WalletService import WalletService
+from blockchain.uniswap.Pool import Pool
+from common.AccountManager import AccountManager
+from exchanges.Coinbase.Coinbase import Coinbase
+
+
+@dataclass(frozen=True)
+class TaskContext:
+  """Live services a persisted task needs to be rebuilt after a restart."""
+  coinbase: Coinbase
+  pool: Pool
+  wallet_service: WalletService
+  account_manager: AccountManager
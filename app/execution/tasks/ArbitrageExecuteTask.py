@@ -1,23 +1,34 @@
 import asyncio
+import time
+import uuid
+from functools import partial
+from typing import Any
 
 from hexbytes import HexBytes
 
+from blockchain.GasOracle import GasTemplate
 from blockchain.Token import Tokens
 from blockchain.WalletService import WalletService
 from blockchain.uniswap.Pool import Pool
-from common.AccountManager import AccountManager
+from common.ConcurrentFetcher import ConcurrentFetcher
 from common.logger import get_logger
 from exchanges.Coinbase.Coinbase import Coinbase
-from execution.BasicTask import BasicTask
+from execution.BasicTask import BasicTask, TaskLane
+from execution.TaskContext import TaskContext
 
 
 class ArbitrageExecuteTask(BasicTask):
+  lane = TaskLane.ONCHAIN
+  # Wait for the final state of an order after cancelling it, or of a market order
+  CANCEL_TIMEOUT_SECONDS = 30
+  # Net EURC of a one-legged trade below this is left as is (about the Coinbase minimum order size)
+  MIN_HEDGE_EURC = 1.0
+
   def __init__(
       self,
       coinbase: Coinbase,
       pool: Pool,
       wallet_service: WalletService,
-      account_manager: AccountManager,
       sell_coinbase_buy_uni: bool,
       t1_stat_amount: float,
       t1_expected_outcome: float,
@@ -33,7 +44,7 @@ class ArbitrageExecuteTask(BasicTask):
     self.coinbase = coinbase
     self.pool = pool
     self.wallet_service = wallet_service
-    self.account_manager = account_manager
+    self.fetcher = ConcurrentFetcher(max_workers=2)
 
     self.sell_coinbase_buy_uni = sell_coinbase_buy_uni
     self.t1_start_amount = t1_stat_amount
@@ -44,75 +55,304 @@ class ArbitrageExecuteTask(BasicTask):
     self.cb_available_volume = cb_available_volume
     self.eth_price = eth_price
     self.execution_summary: str | None = None
+    # Seconds per leg from task start: "<leg>_placed" and "<leg>_confirmed" for uniswap/coinbase
+    self.leg_latencies: dict[str, float] = {}
+
+  def to_payload(self) -> dict[str, Any] | None:
+    return {
+      "sell_coinbase_buy_uni": self.sell_coinbase_buy_uni,
+      "t1_stat_amount": self.t1_start_amount,
+      "t1_expected_outcome": self.t1_expected_outcome,
+      "t2_expected_outcome": self.t2_expected_outcome,
+      "cb_price": self.cb_price,
+      "pool_liquidity": self.pool_liquidity,
+      "cb_available_volume": self.cb_available_volume,
+      "eth_price": self.eth_price,
+      "priority": self.priority,
+    }
+
+  @classmethod
+  def restore(cls, payload: dict[str, Any], checkpoint: dict[str, Any],
+              context: TaskContext) -> "ArbitrageExecuteTask | None":
+    # Prices of an opportunity that was never acted on are stale after a restart. Once a leg is out,
+    # the task resumes: placed legs are only confirmed, a missing leg is placed to close the hedge.
+    if not checkpoint:
+      return None
+    return cls(
+      coinbase=context.coinbase,
+      pool=context.pool,
+      wallet_service=context.wallet_service,
+      **payload
+    )
 
   async def run(self):
-    total_before = self.account_manager.get_total_balances()
-    eth_before = total_before.get(Tokens.ETH)
+    try:
+      await self._execute()
+    finally:
+      self.fetcher.shutdown()
+
+  async def _execute(self):
+    started_at = time.perf_counter()
+
+    # Both legs go out at the same time, neither waits on the other's round trip. A failing leg
+    # doesn't abort the other one: an open order is cancelled and what did execute is hedged below.
+    tx_hash, order = await asyncio.gather(
+      self._timed("uniswap_placed", started_at, self._place_uniswap_leg()),
+      self._timed("coinbase_placed", started_at, self._place_coinbase_leg()),
+      return_exceptions=True
+    )
+    if isinstance(tx_hash, BaseException):
+      self.logger.error(f"Uniswap swap not sent: {tx_hash}")
+      tx_hash = None
+    if isinstance(order, BaseException):
+      self.logger.error(f"Coinbase order not placed: {order}")
+      order = None
+    else:
+      self.logger.info(f"Coinbase order created: {order}")
+
+    receipt, filled_order = await asyncio.gather(
+      self._timed("uniswap_confirmed", started_at, self._confirm_uniswap_leg(tx_hash, order)),
+      self._timed("coinbase_confirmed", started_at, self._confirm_coinbase_leg(order))
+    )
+    self.logger.info(f"Leg latencies: {self._format_latencies()}")
+
+    swap_done = receipt is not None and receipt.status == 1
+    order_done = filled_order is not None and filled_order["status"] == "filled"
+    if swap_done:
+      self.pool.gas_oracle.record_gas_used(GasTemplate.V3_SWAP, receipt.gasUsed)
+
+    profit_usdc, profit_eurc, eth_fees_cost_usd = self._reconcile(receipt, filled_order)
+    hedge_order = None
+    if not (swap_done and order_done) and abs(profit_eurc) >= self.MIN_HEDGE_EURC:
+      try:
+        hedge_order = await self._hedge(profit_eurc)
+      except Exception as e:
+        self.logger.error(f"Hedging {profit_eurc:.4f} EURC on Coinbase failed: {e}")
+      profit_usdc, profit_eurc = self._reconcile_coinbase(profit_usdc, profit_eurc, hedge_order)
+
+    total_profit_in_usdc = profit_usdc + profit_eurc * self.cb_price + eth_fees_cost_usd
+    if swap_done and order_done:
+      headline = "✅ Arb done"
+    else:
+      headline = (
+        f"{'↩️ Arb unwound' if abs(profit_eurc) < self.MIN_HEDGE_EURC else '⚠️ Arb unhedged'} | "
+        f"Uniswap: {self._uniswap_state(tx_hash, receipt)} | "
+        f"Coinbase: {self._coinbase_state(order, filled_order)} | "
+        f"Hedge: {self._coinbase_state(hedge_order, hedge_order) if hedge_order else 'none'}"
+      )
+    self.execution_summary = (
+      f"{headline} | PnL: {total_profit_in_usdc:.2f} USDC\n"
+      f"USDC: {profit_usdc:.2f} | EURC: {profit_eurc:.2f} | Fee: ${eth_fees_cost_usd:.2f}\n"
+      f"Max drainable liquidity(Pool): {self.pool_liquidity:.4f} | Max drainable Volume(CB): {self.cb_available_volume:.4f}\n"
+      f"Latency: {self._format_latencies()}"
+    )
+    self.logger.info(self.execution_summary)
+    if not (swap_done and order_done):
+      # Fails the task, the summary above still goes out as its control message
+      raise RuntimeError(f"Arbitrage incomplete, net EURC after the hedge: {profit_eurc:.4f}")
+    self.logger.info("Arbitrage execution completed")
+
+  async def _hedge(self, unhedged_eurc: float) -> dict | None:
+    """
+    Flattens the EURC a one-legged trade left over with a Coinbase market order: surplus EURC is
+    sold, missing EURC bought back. Returns the final state of the hedge order, None on a timeout.
+    """
+    # Derived from the task like the Coinbase leg, so a resumed task doesn't hedge twice
+    client_order_id = str(uuid.uuid5(uuid.UUID(self.task_id), "hedge"))
+    await self.save_checkpoint(hedge_client_order_id=client_order_id)
+    if unhedged_eurc > 0:
+      side, amount = "sell", unhedged_eurc
+    else:
+      # Market buys are sized in the quote currency
+      side, amount = "buy", -unhedged_eurc * self.cb_price
+    self.logger.warning(f"Hedging {unhedged_eurc:.4f} EURC: market {side} of {amount:.4f} on Coinbase")
+    order = await self.fetcher.send(partial(
+      self.coinbase.create_order,
+      token0=self.pool.token0.token,
+      token1=self.pool.token1.token,
+      side=side,
+      type_="market",
+      amount=amount,
+      client_order_id=client_order_id
+    ))
+    if not order["id"]:
+      raise RuntimeError(f"Coinbase rejected the hedge order: {order['raw']}")
+    await self.save_checkpoint(hedge_order_id=order["id"])
+    return await self.coinbase.wait_order_filled(order["id"], timeout=self.CANCEL_TIMEOUT_SECONDS)
+
+  async def _confirm_uniswap_leg(self, tx_hash: str | None, order: dict | None):
+    """Receipt of the swap, None if it was not sent or not mined; then the Coinbase order is cancelled."""
+    receipt = None
+    if tx_hash is not None:
+      try:
+        receipt = await self.wallet_service.wait_tx_is_mined(HexBytes(tx_hash))
+      except Exception as e:
+        self.logger.error(f"Uniswap swap {tx_hash} not mined: {e}")
+    if receipt is not None and receipt.status != 1:
+      self.logger.error(f"Uniswap swap {HexBytes(tx_hash).hex()} reverted")
+
+    if (receipt is None or receipt.status != 1) and order is not None:
+      # wait_order_filled of the Coinbase leg returns once the cancel went through
+      await self._cancel_order(order["id"], "the Uniswap swap did not go through")
+    return receipt
+
+  async def _confirm_coinbase_leg(self, order: dict | None) -> dict | None:
+    """Final state of the Coinbase order; an order still open after the wait is cancelled."""
+    if order is None:
+      return None
+    filled_order = await self.coinbase.wait_order_filled(order["id"])
+    if filled_order is None:
+      # A GTC order must not stay in the book once the opportunity is gone
+      await self._cancel_order(order["id"], "it is not filled")
+      filled_order = await self.coinbase.wait_order_filled(order["id"], timeout=self.CANCEL_TIMEOUT_SECONDS)
+    if not filled_order or filled_order["status"] != "filled":
+      self.logger.error(f"Coinbase order {order['id']} not filled: {filled_order}")
+    return filled_order
+
+  async def _cancel_order(self, order_id: str, reason: str) -> None:
+    self.logger.warning(f"Cancelling Coinbase order {order_id}: {reason}")
+    await self.fetcher.send(partial(self.coinbase.cancel_order, order_id))
+
+  @staticmethod
+  def _uniswap_state(tx_hash: str | None, receipt) -> str:
+    if tx_hash is None:
+      return "not sent"
+    if receipt is None:
+      return "not mined"
+    return "swapped" if receipt.status == 1 else "reverted"
+
+  @staticmethod
+  def _coinbase_state(order: dict | None, filled_order: dict | None) -> str:
+    if order is None:
+      return "not placed"
+    if filled_order is None:
+      return "open"
+    filled_size = float(filled_order.get("raw", {}).get("order", {}).get("filled_size") or 0.0)
+    return f"{filled_order['status']} ({filled_size:.4f} filled)"
+
+  async def _place_uniswap_leg(self) -> str:
+    if "raw_tx" in self.checkpoint:
+      # Signed before a restart: the same transaction is sent again, never a second swap
+      self.logger.info(f"Resuming Uniswap leg {self.checkpoint['tx_hash']}")
+      await self.fetcher.send(partial(self.wallet_service.rebroadcast, HexBytes(self.checkpoint["raw_tx"])))
+      return self.checkpoint["tx_hash"]
 
     if self.sell_coinbase_buy_uni:
       self.logger.info(f"Executing buy on Uniswap for {self.t1_expected_outcome}")
-      tx_hash = await self.pool.swap(
+      sign_swap = partial(
+        self.pool.sign_swap,
         token_in=Tokens.USDC,
         amount_in=self.t1_start_amount,
         eth_price=self.eth_price,
         min_amount_out=self.t1_expected_outcome * 0.999
       )
+    else:
+      self.logger.info(
+        f"Executing sell on Uniswap for {self.t1_expected_outcome} with expected outcome {self.t2_expected_outcome}")
+      sign_swap = partial(
+        self.pool.sign_swap,
+        token_in=Tokens.EURC,
+        amount_in=self.t1_expected_outcome,
+        eth_price=self.eth_price,
+        min_amount_out=self.t2_expected_outcome * 0.999
+      )
+    # Signing reserves a nonce, so it is not abandoned on a timeout either
+    nonce, signed = await self.fetcher.send(sign_swap)
+    try:
+      await self.save_checkpoint(raw_tx=signed.raw_transaction.hex(), tx_hash=signed.hash.hex())
+    except Exception:
+      self.pool.nonce_manager.release(nonce)
+      raise
+    return await self.fetcher.send(partial(self.pool.send_swap, nonce, signed.raw_transaction))
+
+  async def _place_coinbase_leg(self) -> dict:
+    if "order_id" in self.checkpoint:
+      self.logger.info(f"Coinbase leg already placed: {self.checkpoint['order_id']}")
+      return {"id": self.checkpoint["order_id"], "status": "open"}
+
+    if "client_order_id" in self.checkpoint:
+      # Interrupted around create_order: the order may exist without its ID having been saved
+      client_order_id = self.checkpoint["client_order_id"]
+      order = await self.fetcher.fetch(partial(self.coinbase.get_order_by_client_id, client_order_id))
+      if order is not None:
+        self.logger.info(f"Coinbase leg already placed: {order['id']} (client order {client_order_id})")
+        await self.save_checkpoint(order_id=order["id"])
+        return order
+    else:
+      # Derived from the task, so a repeated create_order returns the existing order instead of a second one
+      client_order_id = str(uuid.UUID(self.task_id))
+      await self.save_checkpoint(client_order_id=client_order_id)
+
+    if self.sell_coinbase_buy_uni:
       self.logger.info(
         f"Executing sell on Coinbase for {self.t1_start_amount} with expected outcome {self.t2_expected_outcome}")
-      order = self.coinbase.create_order(
+      create_order = partial(
+        self.coinbase.create_order,
         token0=self.pool.token0.token,
         token1=self.pool.token1.token,
         side="sell",
         type_="limit",
         amount=self.t1_expected_outcome,
-        price=self.cb_price
+        price=self.cb_price,
+        client_order_id=client_order_id
       )
-      self.logger.info(f"Coinbase sell order created: {order}")
     else:
-      self.logger.info(
-        f"Executing sell on Uniswap for {self.t1_expected_outcome} with expected outcome {self.t2_expected_outcome}")
-      tx_hash = await self.pool.swap(
-        token_in=Tokens.EURC,
-        amount_in=self.t1_expected_outcome,
-        eth_price=self.eth_price,
-        min_amount_out=self.t2_expected_outcome * 0.999
-      )
       self.logger.info(f"Executing buy on Coinbase for {self.t1_start_amount}")
-      order = self.coinbase.create_order(
+      create_order = partial(
+        self.coinbase.create_order,
         token0=self.pool.token0.token,
         token1=self.pool.token1.token,
         side="buy",
         type_="limit",
         amount=self.t1_start_amount,
-        price=self.cb_price
+        price=self.cb_price,
+        client_order_id=client_order_id
       )
-      self.logger.info(f"Coinbase buy order created: {order}")
-
-    await self.coinbase.wait_order_filled(order['id'])
-    self.logger.info(f"Coinbase order filled: {order['id']}")
+    order = await self.fetcher.send(create_order)
+    if not order["id"]:
+      raise RuntimeError(f"Coinbase rejected the order: {order['raw']}")
+    await self.save_checkpoint(order_id=order["id"])
+    return order
 
-    self.wallet_service.wait_tx_is_mined(HexBytes(tx_hash))
-
-    await asyncio.sleep(10)
+  def _reconcile(self, receipt, filled_order: dict | None) -> tuple[float, float, float]:
+    """(USDC delta, EURC delta, gas cost in USD) from the swap receipt and the Coinbase fill, either may be None."""
+    if receipt is None:
+      return self._reconcile_coinbase(0.0, 0.0, filled_order) + (0.0,)
+    wallet = self.wallet_service.wallet.address
+    usdc = self.pool.get_token(Tokens.USDC)
+    eurc = self.pool.get_token(Tokens.EURC)
+    profit_usdc, profit_eurc = self._reconcile_coinbase(
+      usdc.to_human(usdc.net_transfer(receipt, wallet)),
+      eurc.to_human(eurc.net_transfer(receipt, wallet)),
+      filled_order
+    )
 
-    total_after = self.account_manager.get_total_balances()
-    eth_after = total_after.get(Tokens.ETH)
-    profit_usdc = total_after.get(Tokens.USDC) - total_before.get(Tokens.USDC)
-    profit_eurc = total_after.get(Tokens.EURC) - total_before.get(Tokens.EURC)
+    gas_cost_wei = receipt.gasUsed * receipt.effectiveGasPrice
+    eth_fees_cost_usd = -float(self.pool.w3.from_wei(gas_cost_wei, "ether")) * self.eth_price
+    return profit_usdc, profit_eurc, eth_fees_cost_usd
 
-    eth_fees = eth_after - eth_before
-    eth_fees_cost_usd = eth_fees * self.eth_price
+  @staticmethod
+  def _reconcile_coinbase(profit_usdc: float, profit_eurc: float, filled_order: dict | None) -> tuple[float, float]:
+    """Adds the Coinbase fill (a partial fill of a cancelled order too) to the USDC and EURC deltas."""
+    order = (filled_order or {}).get("raw", {}).get("order", {})
+    filled_size = float(order.get("filled_size") or 0.0)
+    filled_value = float(order.get("filled_value") or 0.0)
+    total_fees = float(order.get("total_fees") or 0.0)
+    if order.get("side", "").upper() == "BUY":
+      profit_eurc += filled_size
+      profit_usdc -= filled_value + total_fees
+    else:
+      profit_eurc -= filled_size
+      profit_usdc += filled_value - total_fees
+    return profit_usdc, profit_eurc
 
-    total_profit_in_usdc = profit_usdc + profit_eurc * self.cb_price + eth_fees_cost_usd
-    self.execution_summary = (
-      f"✅ Arb done | PnL: {total_profit_in_usdc:.2f} USDC\n"
-      f"USDC: {profit_usdc:.2f} | EURC: {profit_eurc:.2f} | Fee: ${eth_fees_cost_usd:.2f}\n"
-      f"Max drainable liquidity(Pool): {self.pool_liquidity:.4f} | Max drainable Volume(CB): {self.cb_available_volume:.4f}"
-    )
-    self.logger.info(self.execution_summary)
+  async def _timed(self, leg: str, started_at: float, awaitable):
+    result = await awaitable
+    self.leg_latencies[leg] = time.perf_counter() - started_at
+    return result
 
-    await asyncio.sleep(10)
-    self.logger.info("Arbitrage execution completed")
+  def _format_latencies(self) -> str:
+    return " | ".join(f"{leg}={seconds * 1000:.0f}ms" for leg, seconds in self.leg_latencies.items())
 
   def build_control_message(self) -> str | None:
     return self.execution_summary
@@ -1,17 +1,22 @@
+import uuid
+from typing import Any
+
 import dotenv
 
 from blockchain.Network import Network
-from blockchain.Token import Token
+from blockchain.Token import Token, Tokens
 from blockchain.WalletService import WalletService
 from common.AccountManager import AccountManager
 from common.logger import get_logger
 from exchanges.Coinbase.Coinbase import Coinbase
-from execution.BasicTask import BasicTask
+from execution.BasicTask import BasicTask, TaskLane
+from execution.TaskContext import TaskContext
 
 dotenv.load_dotenv()
 
 
 class CoinbaseWithdrawalTask(BasicTask):
+  lane = TaskLane.COINBASE
 
   def __init__(
       self,
@@ -34,34 +39,78 @@ class CoinbaseWithdrawalTask(BasicTask):
     self.account_manager = account_manager
     self.execution_summary: str | None = None
 
+  def to_payload(self) -> dict[str, Any] | None:
+    return {
+      "token": self.token.token.name,
+      "destination": self.destination,
+      "amount": self.amount,
+      "priority": self.priority,
+    }
+
+  @classmethod
+  def restore(cls, payload: dict[str, Any], checkpoint: dict[str, Any],
+              context: TaskContext) -> "CoinbaseWithdrawalTask | None":
+    return cls(
+      coinbase=context.coinbase,
+      wallet_service=context.wallet_service,
+      account_manager=context.account_manager,
+      token=context.pool.get_token(Tokens[payload["token"]]),
+      destination=payload["destination"],
+      amount=payload["amount"],
+      priority=payload["priority"]
+    )
+
   async def run(self):
-    raw_coinbase_balance = self.account_manager.get_coinbase_balances().get(self.token.token)
+    if "withdraw_amount" not in self.checkpoint:
+      raw_coinbase_balance = self.account_manager.get_coinbase_balances().get(self.token.token)
 
-    if self.amount is not None:
-      withdraw_amount = self.amount
-      if raw_coinbase_balance < withdraw_amount:
-        raise ValueError(
-          f"Insufficient funds. Have {raw_coinbase_balance}, requested {self.amount} {self.token.symbol}")
-    else:
-      withdraw_amount = raw_coinbase_balance
+      if self.amount is not None:
+        withdraw_amount = self.amount
+        if raw_coinbase_balance < withdraw_amount:
+          raise ValueError(
+            f"Insufficient funds. Have {raw_coinbase_balance}, requested {self.amount} {self.token.symbol}")
+      else:
+        withdraw_amount = raw_coinbase_balance
 
-    if withdraw_amount <= 0:
-      raise ValueError(f"Withdraw amount must be greater than 0 (Balance: {raw_coinbase_balance})")
+      if withdraw_amount <= 0:
+        raise ValueError(f"Withdraw amount must be greater than 0 (Balance: {raw_coinbase_balance})")
 
-    self.logger.info(f"Withdrawing {withdraw_amount}{self.token.token.name} from Coinbase to {self.destination}")
-    response = self.coinbase.withdrawal(self.token.token, self.destination, withdraw_amount, Network.ETH)
-    self.logger.info(f"Withdrawal response: {response}")
+      # Arrival is searched from this block on, also when the task resumes after a restart
+      from_block = self.wallet_service.w3.eth.block_number
+      await self.save_checkpoint(withdraw_amount=withdraw_amount, from_block=from_block)
+    else:
+      withdraw_amount = self.checkpoint["withdraw_amount"]
+      self.logger.info(f"Resuming withdrawal of {withdraw_amount}{self.token.token.name} from Coinbase")
+
+    if "withdrawal_id" not in self.checkpoint:
+      self.logger.info(f"Withdrawing {withdraw_amount}{self.token.token.name} from Coinbase to {self.destination}")
+      # The task ID as idempotency key: a withdrawal repeated after a crash is not executed twice
+      response = self.coinbase.withdrawal(
+        self.token.token, self.destination, withdraw_amount, Network.ETH, idem=str(uuid.UUID(self.task_id)))
+      self.logger.info(f"Withdrawal response: {response}")
+      await self.save_checkpoint(withdrawal_id=response['data']['id'], withdrawal_fee=self._withdrawal_fee(response))
+    withdrawal_id = self.checkpoint["withdrawal_id"]
 
-    mined = self.wallet_service.wait_till_coins_arrive(self.token)
+    # Coinbase deducts its network fee from the sent amount
+    mined = await self.wallet_service.wait_till_coins_arrive(
+      self.token, withdraw_amount, fee_tolerance=self.checkpoint.get("withdrawal_fee", 0.0),
+      from_block=self.checkpoint["from_block"])
     if mined:
-      self.logger.info(f"Order filled: {response['data']['id']}")
+      self.logger.info(f"Order filled: {withdrawal_id}")
       self.execution_summary = (
         f"✅ Coinbase withdrawal complete | {self.token.symbol}: {withdraw_amount:.2f} "
-        f"| ID: {response['data']['id']}"
+        f"| ID: {withdrawal_id}"
       )
     else:
-      self.execution_summary = f"⚠️ Coinbase withdrawal timeout | ID: {response['data']['id']}"
-      self.logger.warning(f"Order not filled within timeout: {response['data']['id']}")
+      self.execution_summary = f"⚠️ Coinbase withdrawal timeout | ID: {withdrawal_id}"
+      self.logger.warning(f"Order not filled within timeout: {withdrawal_id}")
+
+  def _withdrawal_fee(self, response: dict) -> float:
+    """Network fee Coinbase charged on the withdrawal in the withdrawn token, 0 if it reports none."""
+    fee = response.get("data", {}).get("network", {}).get("transaction_fee") or {}
+    if fee.get("currency") != self.token.token.name:
+      return 0.0
+    return float(fee.get("amount") or 0.0)
 
   def build_control_message(self) -> str | None:
     return self.execution_summary
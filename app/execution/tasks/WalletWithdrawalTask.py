@@ -1,18 +1,24 @@
-import os
+
+from typing import Any
 
 import dotenv
-from web3 import Web3
+from hexbytes import HexBytes
 
-from blockchain.Token import Token
+from blockchain.GasOracle import GasOracle, GasTemplate
+from blockchain.Token import Token, Tokens
 from blockchain.WalletService import WalletService
+from blockchain.Web3Provider import Web3Provider
 from common.logger import get_logger
 from exchanges.Coinbase.Coinbase import Coinbase
-from execution.BasicTask import BasicTask
+from execution.BasicTask import BasicTask, TaskLane
+from execution.TaskContext import TaskContext
 
 dotenv.load_dotenv()
 
 
 class WalletWithdrawalTask(BasicTask):
+  lane = TaskLane.TRANSFERS
+
   def __init__(
       self,
       wallet_service: WalletService,
@@ -26,7 +32,7 @@ class WalletWithdrawalTask(BasicTask):
     super().__init__(priority)
     self.logger = get_logger()
     self.wallet_service = wallet_service
-    self.w3 = Web3(Web3.HTTPProvider(os.getenv("RPC_URL")))
+    self.w3 = Web3Provider.get_web3()
     self.send_token = send_token
     self.destination = destination
     self.amount = amount
@@ -34,7 +40,59 @@ class WalletWithdrawalTask(BasicTask):
     self.coinbase = coinbase
     self.execution_summary: str | None = None
 
+  def to_payload(self) -> dict[str, Any] | None:
+    return {
+      "send_token": self.send_token.token.name,
+      "destination": self.destination,
+      "eth_price": self.eth_price,
+      "amount": self.amount,
+      "priority": self.priority,
+    }
+
+  @classmethod
+  def restore(cls, payload: dict[str, Any], checkpoint: dict[str, Any],
+              context: TaskContext) -> "WalletWithdrawalTask | None":
+    return cls(
+      wallet_service=context.wallet_service,
+      send_token=context.pool.get_token(Tokens[payload["send_token"]]),
+      destination=payload["destination"],
+      eth_price=payload["eth_price"],
+      coinbase=context.coinbase,
+      amount=payload["amount"],
+      priority=payload["priority"]
+    )
+
   async def run(self):
+    if "raw_tx" in self.checkpoint:
+      # Signed before a restart: the same transaction is sent again, never a second transfer
+      raw_withdraw_amount = self.checkpoint["raw_withdraw_amount"]
+      tx_hash = HexBytes(self.checkpoint["tx_hash"])
+      self.logger.info(f"Resuming withdrawal transaction {tx_hash.hex()}")
+      self.wallet_service.rebroadcast(HexBytes(self.checkpoint["raw_tx"]))
+    else:
+      raw_withdraw_amount, tx_hash = await self._send_withdrawal()
+
+    is_mined = await self.wallet_service.wait_tx_is_mined(tx_hash, timeout=300)
+    self.logger.info("Tx mined.")
+    self.logger.info("Waiting till funds are available in coinbase...")
+    arrived_on_cb = await self.coinbase.wait_till_deposit_arrives(
+      self.send_token, balance_before=self.checkpoint["cb_balance_before"])
+
+    if arrived_on_cb and is_mined:
+      self.execution_summary = (
+        f"✅ Wallet→CB transfer done | {self.send_token.to_human(raw_withdraw_amount):.2f} "
+        f"{self.send_token.symbol} | Tx: {tx_hash.hex()[:10]}..."
+      )
+      self.logger.info(f"Withdrawal transaction completed: {tx_hash.hex()}")
+    else:
+      self.execution_summary = (
+        f"⚠️ Wallet→CB transfer incomplete | mined={is_mined} | cb_arrived={arrived_on_cb}"
+      )
+      self.logger.error(
+        f"Withdrawal transaction failed: Status mined: {is_mined}, Status coinbase: {arrived_on_cb}")
+
+
+  async def _send_withdrawal(self) -> tuple[int, HexBytes]:
     raw_wallet_balance = self.send_token.contract.functions.balanceOf(self.wallet_service.wallet.address).call()
 
     if self.amount is not None:
@@ -53,24 +111,24 @@ class WalletWithdrawalTask(BasicTask):
     self.logger.info(
       f"Withdrawing {self.send_token.to_human(raw_withdraw_amount)} {self.send_token.name} to {self.destination}")
 
-    latest_block = self.w3.eth.get_block('latest')
-    base_fee = latest_block['baseFeePerGas']
-    prio_fee = self.w3.to_wei(0.01, 'gwei')
-    max_fee_per_gas = int(base_fee * 1.125) + prio_fee
+    gas_oracle = GasOracle.shared()
+    gas = gas_oracle.get_snapshot()
+    prio_fee = gas.priority_fee
+    max_fee_per_gas = gas.max_fee_per_gas(1.125)
 
     tx = self.send_token.contract.functions.transfer(
       self.destination,
       raw_withdraw_amount
     ).build_transaction({
       "from": self.wallet_service.wallet.address,
-      "nonce": self.w3.eth.get_transaction_count(self.wallet_service.wallet.address),
+      "nonce": self.wallet_service.nonce_manager.peek(),
       "maxFeePerGas": max_fee_per_gas,
       'maxPriorityFeePerGas': prio_fee
     })
 
-    gas = self.w3.eth.estimate_gas(tx)
-    current_base_fee = self.w3.eth.get_block('latest')['baseFeePerGas']
-    estimated_actual_cost = float(self.w3.from_wei(tx['gas'] * (current_base_fee + prio_fee), "ether"))
+    # build_transaction already ran estimate_gas, its result refines the cached transfer gas
+    gas_oracle.record_gas_used(GasTemplate.ERC20_TRANSFER, tx['gas'])
+    estimated_actual_cost = float(self.w3.from_wei(gas.cost_wei(tx['gas']), "ether"))
 
     gas_cost_usd = estimated_actual_cost * self.eth_price
     self.logger.info(f"Estimated gas cost: {estimated_actual_cost:.18f} ETH = {gas_cost_usd:.4f} USD")
@@ -79,27 +137,17 @@ class WalletWithdrawalTask(BasicTask):
       raise ValueError(
         f"Estimated gas cost of ${gas_cost_usd:.2f} exceeds safety threshold. Aborting withdrawal.")
 
-    signed_tx = self.wallet_service.wallet.sign_transaction(tx)
-    tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+    cb_balance_before = float(self.coinbase.get_account_balances(self.send_token.token, "free"))
+    nonce, signed = self.wallet_service.nonce_manager.sign(self.wallet_service.wallet, tx)
+    await self.save_checkpoint(
+      raw_tx=signed.raw_transaction.hex(),
+      tx_hash=signed.hash.hex(),
+      raw_withdraw_amount=raw_withdraw_amount,
+      cb_balance_before=cb_balance_before
+    )
+    tx_hash = self.wallet_service.nonce_manager.send(nonce, signed.raw_transaction)
     self.logger.info(f"Withdrawal transaction sent: {tx_hash.hex()}")
-
-    is_mined = self.wallet_service.wait_tx_is_mined(tx_hash, timeout=300)
-    self.logger.info("Tx mined.")
-    self.logger.info("Waiting till funds are available in coinbase...")
-    arrived_on_cb = await self.coinbase.wait_till_deposit_arrives(self.send_token)
-
-    if arrived_on_cb and is_mined:
-      self.execution_summary = (
-        f"✅ Wallet→CB transfer done | {self.send_token.to_human(raw_withdraw_amount):.2f} "
-        f"{self.send_token.symbol} | Tx: {tx_hash.hex()[:10]}..."
-      )
-      self.logger.info(f"Withdrawal transaction completed: {tx_hash.hex()}")
-    else:
-      self.execution_summary = (
-        f"⚠️ Wallet→CB transfer incomplete | mined={is_mined} | cb_arrived={arrived_on_cb}"
-      )
-      self.logger.error(
-        f"Withdrawal transaction failed: Status mined: {is_mined}, Status coinbase: {arrived_on_cb}")
+    return raw_withdraw_amount, tx_hash
 
   def build_control_message(self) -> str | None:
     return self.execution_summary
@@ -4,7 +4,7 @@ import os
 from dataclasses import dataclass
 from typing import Awaitable
 
-from Configurations import COINBASE_EURC_USDC_TICKER, EURO_USDC_UNI_V3_POOL_ADDRESS
+from Configurations import COINBASE_EURC_USDC_TICKER, EURO_USDC_UNI_V3_POOL_ADDRESS, PERSISTENT_TASK_QUEUE
 from blockchain.Token import Tokens
 from common.TelegramServices import TelegramServices
 from common.logger import get_logger
@@ -13,6 +13,7 @@ from services.ControlService import ControlService
 from services.Executor import Executor
 from services.IndexerService import IndexerService
 from services.RuntimeState import RuntimeState
+from services.TaskStore import TaskStore
 from services.UniswapArbitrageAnalyzer import UniswapArbitrageAnalyzer
 from services.UniswapPositionAnalyzer import UniswapPositionAnalyzer
 
@@ -40,7 +41,7 @@ class Application:
     executor: Executor | None = None
 
     if config.arbitrage_bot_enabled:
-      executor = Executor(self.runtime_state)
+      executor = Executor(self.runtime_state, TaskStore(self.db) if PERSISTENT_TASK_QUEUE else None)
       self.runtime_state.register_task_snapshot_provider(executor.get_task_snapshot)
       tasks.append(executor.run())
 
@@ -0,0 +1,70 @@
+import asyncio
+import time
+from dataclasses import dataclass
+
+from blockchain.BlockWatcher import BlockWatcher
+from common.logger import get_logger
+from exchanges.Coinbase.CoinbaseOrderBookStream import CoinbaseOrderBookStream
+
+
+@dataclass(frozen=True)
+class TriggerEvent:
+  reason: str
+  triggered_at: float
+  block_number: int | None = None
+
+  def latency_ms(self) -> float:
+    """Milliseconds since the first event that caused this trigger."""
+    return (time.monotonic() - self.triggered_at) * 1000
+
+
+class CycleTrigger:
+  """
+  Wakes the analyzer on a new block or a change of the Coinbase top of book.
+  Events within DEBOUNCE_SECONDS of the first one are coalesced into a single cycle,
+  and MAX_INTERVAL_SECONDS without any event still triggers a cycle.
+  """
+  DEBOUNCE_SECONDS = 0.2
+  MAX_INTERVAL_SECONDS = 12.0
+
+  def __init__(self, block_watcher: BlockWatcher, order_book_stream: CoinbaseOrderBookStream | None = None):
+    self.logger = get_logger()
+    self.block_watcher = block_watcher
+    self.order_book_stream = order_book_stream
+    self._event: asyncio.Event | None = None
+    self._pending: TriggerEvent | None = None
+
+  def start(self):
+    self._event = asyncio.Event()
+    self.block_watcher.subscribe(self._on_block)
+    self.block_watcher.start()
+    if self.order_book_stream:
+      self.order_book_stream.add_top_of_book_listener(self._on_top_of_book)
+
+  async def wait(self) -> TriggerEvent:
+    """Waits for the next trigger, then debounces so bursts of updates cause one cycle."""
+    if self._event is None:
+      self.start()
+    try:
+      await asyncio.wait_for(self._event.wait(), timeout=self.MAX_INTERVAL_SECONDS)
+    except asyncio.TimeoutError:
+      self._notify("timeout")
+
+    await asyncio.sleep(self.DEBOUNCE_SECONDS)
+    event, self._pending = self._pending, None
+    self._event.clear()
+    return event
+
+  def _on_block(self, block_number: int):
+    self._notify("block", block_number)
+
+  def _on_top_of_book(self):
+    self._notify("book")
+
+  def _notify(self, reason: str, block_number: int | None = None):
+    # Keep the first event of a burst, the latency is measured from it
+    if self._pending is None:
+      self._pending = TriggerEvent(reason=reason, triggered_at=time.monotonic(), block_number=block_number)
+    elif block_number is not None and self._pending.block_number is None:
+      self._pending = TriggerEvent(self._pending.reason, self._pending.triggered_at, block_number)
+    self._event.set()
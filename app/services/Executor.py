@@ -1,34 +1,112 @@
 import asyncio
+import heapq
+import itertools
 import traceback
 
 from common.logger import get_logger
-from execution.BasicTask import BasicTask
-from execution.tasks.CoinbaseWithdrawalTask import CoinbaseWithdrawalTask
-from execution.tasks.WalletWithdrawalTask import WalletWithdrawalTask
+from database.models import TaskState
+from execution.BasicTask import BasicTask, TaskLane
+from execution.TaskContext import TaskContext
+from services.TaskStore import TaskStore
 
 
 class Executor:
-  def __init__(self, runtime_state=None):
+  """
+  Priority scheduler for execution tasks.
+
+  Pending tasks sit in a heap (highest priority first, FIFO within a priority). Every task runs
+  in its lane (on-chain, Coinbase, transfers) and each lane runs at most LANE_LIMITS tasks at
+  once, so e.g. a Coinbase withdrawal and a wallet withdrawal proceed in parallel. A task whose
+  dedup key is already queued or running is rejected, as is any task once MAX_PENDING tasks wait.
+
+  With a TaskStore the queue is persisted: unfinished tasks of the previous process are resumed
+  via `resume` instead of being cleared at startup.
+  """
+  LANE_LIMITS = {
+    TaskLane.ONCHAIN: 1,
+    TaskLane.COINBASE: 1,
+    TaskLane.TRANSFERS: 1,
+  }
+  MAX_PENDING = 16
+
+  def __init__(self, runtime_state=None, task_store: TaskStore | None = None):
     self.logger = get_logger()
     self.runtime_state = runtime_state
-    self.queue: list[BasicTask] = []
+    self.task_store = task_store
+    self._heap: list[tuple[int, int, BasicTask]] = []
+    self._sequence = itertools.count()
+    self._keys: set[tuple[str, str | None]] = set()
+    self._running: dict[TaskLane, set[BasicTask]] = {lane: set() for lane in TaskLane}
+    self._asyncio_tasks: set[asyncio.Task] = set()
+    self._wakeup: asyncio.Event | None = None
+    self._drained: asyncio.Event | None = None
+
+  @property
+  def task_count(self) -> int:
+    """Number of queued and running tasks."""
+    return len(self._heap) + sum(len(tasks) for tasks in self._running.values())
+
+  @property
+  def is_drained(self) -> bool:
+    return self.task_count == 0
+
+  def submit(self, task: BasicTask) -> bool:
+    """Queues a task. Returns False if an equal task is queued or running, or the queue is full."""
+    if task.dedup_key in self._keys:
+      self.logger.debug(f"Skip {task.__class__.__name__}: {task.dedup_key} already queued or running")
+      return False
+    if len(self._heap) >= self.MAX_PENDING:
+      self.logger.warning(f"Executor queue full ({self.MAX_PENDING} pending), rejecting {task.__class__.__name__}")
+      return False
+
+    heapq.heappush(self._heap, (-task.priority, next(self._sequence), task))
+    self._keys.add(task.dedup_key)
+    if self.task_store:
+      task.checkpoint_listener = self.task_store.save_checkpoint
+    self._record(task, TaskState.PENDING)
+    self._get_drained().clear()
+    self._get_wakeup().set()
+    return True
+
+  async def resume(self, context: TaskContext) -> None:
+    """Re-queues the tasks the previous process left pending or running (persistent queue only)."""
+    if not self.task_store:
+      return
+    for task in await self.task_store.claim_unfinished(context):
+      self.submit(task)
+
+  def has_task(self, task_type: type[BasicTask], key: str | None = None) -> bool:
+    return (task_type.__name__, key) in self._keys
+
+  async def wait_drained(self, timeout: float | None = None) -> None:
+    """Waits until no task is queued or running."""
+    if self.is_drained:
+      return
+    await asyncio.wait_for(self._get_drained().wait(), timeout=timeout)
 
   def clear_queue(self):
-    if self.queue:
-      self.logger.warning(f"Clearing executor queue with {len(self.queue)} pending task(s).")
-    self.queue.clear()
+    if self._heap:
+      self.logger.warning(f"Clearing executor queue with {len(self._heap)} pending task(s).")
+    for _, _, task in self._heap:
+      self._keys.discard(task.dedup_key)
+      self._record(task, TaskState.CANCELLED)
+    self._heap.clear()
+    self._signal_if_drained()
 
   def get_task_snapshot(self) -> list[str]:
     snapshot: list[str] = []
-    for task in sorted(self.queue, key=lambda t: t.priority, reverse=True):
+    running = [task for tasks in self._running.values() for task in tasks]
+    pending = [task for _, _, task in sorted(self._heap)]
+    for task in running + pending:
       amount = getattr(task, "amount", None)
-      t1_amount = getattr(task, "t1_stat_amount", None)
+      t1_amount = getattr(task, "t1_start_amount", None)
       amount_details = ""
       if isinstance(amount, (int, float)):
         amount_details = f" amount={amount:.4f}"
       elif isinstance(t1_amount, (int, float)):
         amount_details = f" amount={t1_amount:.4f}"
-      snapshot.append(f"{task.__class__.__name__}(prio={task.priority}{amount_details})")
+      state = " running" if task in running else ""
+      snapshot.append(f"{task.__class__.__name__}(prio={task.priority}{amount_details}{state})")
     return snapshot
 
   def _collect_task_event(self, task: BasicTask) -> None:
@@ -39,39 +117,82 @@ class Executor:
     if event_message:
       self.runtime_state.push_task_event(event_message)
 
-  def _pick_parallel_withdrawal_tasks(self) -> list[BasicTask]:
-    cb_task = next((task for task in self.queue if isinstance(task, CoinbaseWithdrawalTask)), None)
-    wallet_task = next((task for task in self.queue if isinstance(task, WalletWithdrawalTask)), None)
+  def _pop_runnable(self) -> list[BasicTask]:
+    """Pops the highest priority tasks whose lane has capacity, the others stay queued."""
+    runnable: list[BasicTask] = []
+    blocked: list[tuple[int, int, BasicTask]] = []
+    free = {lane: self.LANE_LIMITS[lane] - len(tasks) for lane, tasks in self._running.items()}
+    while self._heap:
+      entry = heapq.heappop(self._heap)
+      task = entry[2]
+      if free[task.lane] > 0:
+        free[task.lane] -= 1
+        runnable.append(task)
+      else:
+        blocked.append(entry)
+    for entry in blocked:
+      heapq.heappush(self._heap, entry)
+    return runnable
+
+  async def _run_task(self, task: BasicTask) -> None:
+    self.logger.info(f"Starting task {task.__class__.__name__} with priority {task.priority} [{task.lane}]")
+    self._record(task, TaskState.RUNNING)
+    try:
+      await task.run()
+      self._record(task, TaskState.DONE)
+      self.logger.info(f"Task {task.__class__.__name__} completed.")
+    except Exception as e:
+      self._record(task, TaskState.FAILED, str(e))
+      error_stack = traceback.format_exc()
+      self.logger.error(f"Stack trace:\n{error_stack}")
+      self.logger.error(f"Task {task.__class__.__name__} failed: {e}")
+    finally:
+      self._running[task.lane].discard(task)
+      self._keys.discard(task.dedup_key)
+      self._collect_task_event(task)
+      self._signal_if_drained()
+      self._get_wakeup().set()
+      await self._flush_store()
 
-    selected: list[BasicTask] = []
-    if cb_task:
-      selected.append(cb_task)
-    if wallet_task:
-      selected.append(wallet_task)
-    return selected
+  def _record(self, task: BasicTask, state: TaskState, error: str | None = None) -> None:
+    if self.task_store:
+      self.task_store.record(task, state, error)
 
-  async def _run_tasks_parallel(self, tasks: list[BasicTask]) -> None:
-    if not tasks:
+  async def _flush_store(self) -> None:
+    """Writes a finished task's final state right away, so a restart doesn't resume a finished task."""
+    if not self.task_store:
       return
-
-    self.logger.info(
-      "Starting parallel withdrawal tasks: " + ", ".join(task.__class__.__name__ for task in tasks)
-    )
-    results = await asyncio.gather(*(task.run() for task in tasks), return_exceptions=True)
-
-    for task, result in zip(tasks, results):
-      if task in self.queue:
-        self.queue.remove(task)
-
-      if isinstance(result, Exception):
-        self.logger.error(f"Task {task.__class__.__name__} failed: {result}")
-      else:
-        self.logger.info(f"Task {task.__class__.__name__} completed.")
-
-      self._collect_task_event(task)
+    try:
+      await self.task_store.flush()
+    except Exception as e:
+      # The state stays buffered for the store's periodic flush
+      self.logger.error(f"Flushing the final task state failed: {e}")
+
+  def _signal_if_drained(self) -> None:
+    if self.is_drained:
+      self._get_drained().set()
+
+  def _get_wakeup(self) -> asyncio.Event:
+    # Events are created lazily so they bind to the running event loop
+    if self._wakeup is None:
+      self._wakeup = asyncio.Event()
+    return self._wakeup
+
+  def _get_drained(self) -> asyncio.Event:
+    if self._drained is None:
+      self._drained = asyncio.Event()
+      if self.is_drained:
+        self._drained.set()
+    return self._drained
 
   async def run(self):
-    self.clear_queue()
+    if self.task_store:
+      # Unfinished tasks stay in the store and are picked up by resume()
+      store_task = asyncio.create_task(self.task_store.run())
+      self._asyncio_tasks.add(store_task)
+    else:
+      self.clear_queue()
+    wakeup = self._get_wakeup()
 
     while True:
       try:
@@ -79,36 +200,16 @@ class Executor:
           await asyncio.sleep(1)
           continue
 
-        if self.queue:
-          self.queue.sort(key=lambda t: t.priority)
-          parallel_tasks = self._pick_parallel_withdrawal_tasks()
-          if len(parallel_tasks) == 2:
-            await self._run_tasks_parallel(parallel_tasks)
-            continue
-          else:
-            self.logger.warning(f"Too many withdrawal tasks in queue, count: {len(parallel_tasks)}.")
-
-          task = self.queue[-1]
-          self.logger.info(f"Starting task {task.__class__.__name__} with priority {task.priority}")
-
-          await task.run()
-          self._collect_task_event(task)
-          self.queue.remove(task)
-          self.logger.info(f"Task {task.__class__.__name__} completed.")
-        else:
-          await asyncio.sleep(1)
+        wakeup.clear()
+        for task in self._pop_runnable():
+          self._running[task.lane].add(task)
+          asyncio_task = asyncio.create_task(self._run_task(task))
+          # The loop only keeps weak references to tasks
+          self._asyncio_tasks.add(asyncio_task)
+          asyncio_task.add_done_callback(self._asyncio_tasks.discard)
+
+        # Woken up by submit() or by a finishing task that frees its lane
+        await wakeup.wait()
       except Exception as e:
-        error_stack = traceback.format_exc()
-        self.logger.error(f"Stack trace:\n{error_stack}")
         self.logger.error(f"Queue Error: {e}")
-
-        if self.queue:
-          self.queue.sort(key=lambda t: t.priority)
-          failed_task = self.queue[-1]
-          self.queue.remove(failed_task)
-          self._collect_task_event(failed_task)
-          self.logger.warning(f"Removed failed task {failed_task.__class__.__name__} from queue.")
-        else:
-          self.logger.warning("Queue already empty after error; nothing to remove.")
-
         await asyncio.sleep(1)
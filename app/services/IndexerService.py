@@ -1,31 +1,78 @@
 import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from time import sleep
+from typing import Callable, Iterator, TypeVar
 
 from dotenv import load_dotenv
 from eth_account import Account
 from eth_account.signers.local import LocalAccount
-from web3 import Web3
+from eth_utils import event_abi_to_log_topic
+from hexbytes import HexBytes
+from sqlalchemy.orm import Session
 from web3._utils.events import get_event_data
+from web3.exceptions import BlockNotFound
+from web3.types import EventData
 
+from Configurations import INDEXER_CONFIRMATIONS, INDEXER_MAX_BLOCKS_PER_CALL, INDEXER_WORKERS
+from blockchain.LogWindow import LogWindow
+from blockchain.RpcBatch import RpcBatch
+from blockchain.Web3Provider import Web3Provider
 from blockchain.uniswap.NoneFungibleTokenManager import NoneFungibleTokenManager
 from blockchain.uniswap.Pool import Pool
 from common.logger import get_logger
 from database.database import Database
-from database.models import Position
-from database.repositories import (CollectEventsRepository, IndexedBlockRepository, MintEventsRepository,
-                                   PositionRepository)
+from database.repositories import (CollectEventsRepository, IndexedBlockRepository, IndexedRangeRepository,
+                                   MintEventsRepository, PositionRepository)
 
 load_dotenv()
 
+T = TypeVar("T")
+
+
+@dataclass
+class RangeLogs:
+  """Our decoded NFPM events of one block range in chain order, fetched by a backfill worker."""
+  from_block: int
+  to_block: int
+  events: list[EventData] = field(default_factory=list)
+  fetch_seconds: float = 0.0
+  # Hash of to_block, only for ranges that are not final yet
+  block_hash: str | None = None
+
+
+@dataclass
+class RangeBatch:
+  """DB rows built from one range's events, written in one transaction together with the checkpoint."""
+  # token_id -> positions row (without id), preloaded for every token ID of the range
+  positions: dict[int, dict] = field(default_factory=dict)
+  position_ids: dict[int, int] = field(default_factory=dict)
+  changed_positions: set[int] = field(default_factory=set)
+  mint_events: list[dict] = field(default_factory=list)
+  collect_events: list[dict] = field(default_factory=list)
+
 
 class IndexerService:
+  START_BLOCK = 24454082
+  # tokenIds OR'd into the topic filter of one get_logs call
+  MAX_TOKEN_TOPICS = 100
+  INITIAL_BLOCKS_PER_CALL = 2000
+  POSITION_COLUMNS = (
+    "token_id", "deposited_amount0", "deposited_amount1", "current_amount0", "current_amount1", "liquidity",
+    "tick_lower", "tick_upper", "is_active",
+  )
+  SYNCED_SLEEP_SECONDS = 10
+  ERROR_SLEEP_SECONDS = 5
+
   def __init__(self, db: Database, runtime_state=None):
     self._running = None
     self.logger = get_logger()
     self.db = db
     self.runtime_state = runtime_state
     self.account: LocalAccount = Account.from_key(os.getenv("PRIVATE_KEY"))
-    self.w3 = Web3(Web3.HTTPProvider(os.getenv("RPC_URL")))
+    self.w3 = Web3Provider.get_web3()
     if not self.w3.is_connected():
       self.logger.error("Failed to connect to Ethereum node. Check your RPC_URL.")
       raise ConnectionError("Failed to connect to Ethereum node.")
@@ -33,7 +80,6 @@ class IndexerService:
       self.logger.warning("Ethereum node is still syncing. Indexer will start once syncing is complete.")
       raise ValueError("Ethereum node is still syncing.")
     self.nftm = NoneFungibleTokenManager("0xC36442b4a4522E871399CD717aBDD847Ab11FE88")
-    self.event_signature_increase_liquidity = "IncreaseLiquidity(uint256,uint128,uint256,uint256)"
     self.pool = Pool("0x95DBB3C7546F22BCE375900AbFdd64a4E5bD73d6")
     self.transfer_abi = {
       "anonymous": False,
@@ -45,9 +91,34 @@ class IndexerService:
       "name": "Transfer",
       "type": "event"
     }
-    self.blocks_per_call = 2000
-
+    # Built once: topic0 -> event ABI for decoding, event name -> handler for applying
+    event_abis = [
+      self.nftm.contract.events.IncreaseLiquidity()._get_event_abi(),
+      self.nftm.contract.events.DecreaseLiquidity()._get_event_abi(),
+      self.nftm.contract.events.Collect()._get_event_abi(),
+    ]
+    self.event_decoders: dict[bytes, dict] = {bytes(event_abi_to_log_topic(abi)): abi for abi in event_abis}
+    self.event_handlers: dict[str, Callable[[RangeBatch, EventData], None]] = {
+      "IncreaseLiquidity": self.handle_increase_liquidity,
+      "DecreaseLiquidity": self.handle_decrease_liquidity,
+      "Collect": self.handle_collect,
+    }
+    self.transfer_topic = "0x" + bytes(event_abi_to_log_topic(self.transfer_abi)).hex()
+    self.wallet_topic = "0x" + HexBytes(self.account.address).rjust(32, b"\0").hex()
+    # NFPM token IDs ever transferred to our wallet, known up to owned_scanned_to
+    self.owned_token_ids: set[int] = set()
+    self.owned_scanned_to = self.START_BLOCK - 1
+    # Event logs and our (much sparser) Transfer logs get separate windows, their densities differ
+    self.log_window = LogWindow("NFPM events", self.INITIAL_BLOCKS_PER_CALL, INDEXER_MAX_BLOCKS_PER_CALL)
+    self.transfer_window = LogWindow("NFPM transfers", self.INITIAL_BLOCKS_PER_CALL, INDEXER_MAX_BLOCKS_PER_CALL)
+    self.workers = max(1, INDEXER_WORKERS)
+    self.confirmations = max(0, INDEXER_CONFIRMATIONS)
+    # Head - confirmations of the current pass; newer ranges may still be reorged
+    self.final_block = 0
+
+    self.session: Session = None
     self.block_repo: IndexedBlockRepository = None
+    self.range_repo: IndexedRangeRepository = None
     self.mint_repo: MintEventsRepository = None
     self.collect_repo: CollectEventsRepository = None
     self.position_repo: PositionRepository = None
@@ -81,223 +152,327 @@ class IndexerService:
         continue
 
       with self.db.session() as session:
+        self.session = session
         self.block_repo = IndexedBlockRepository(session)
+        self.range_repo = IndexedRangeRepository(session)
         self.mint_repo = MintEventsRepository(session)
         self.collect_repo = CollectEventsRepository(session)
         self.position_repo = PositionRepository(session)
 
-        starting_block = self.block_repo.get_latest()
-        latest_block = self.w3.eth.block_number
-
-        if starting_block.latest_block == 0:
-          starting_block.latest_block = 24454082
-
-        to_block = starting_block.latest_block + self.blocks_per_call
-        if to_block > latest_block:
-          to_block = latest_block
-          starting_block.synced = True
-          self.block_repo.set_latest(starting_block.latest_block)
-          self.logger.debug("Indexing complete")
-          sleep(10)
-
-        self.logger.info(f"Indexing blocks {starting_block.latest_block} - {to_block}...")
-
-        self.find_increase_liquidity_events(starting_block.latest_block, to_block)
-        self.find_decrease_liquidity_events(starting_block.latest_block, to_block)
-        self.find_collect_events(starting_block.latest_block, to_block)
-
-        self.block_repo.set_latest(to_block)
-
-  def decode_increase_liquidity_event(self, log):
-    """Decodes a Mint event log."""
-    event_abi = self.nftm.contract.events.IncreaseLiquidity()._get_event_abi()
-    decoded = get_event_data(self.w3.codec, event_abi, log)
-    liquidity = decoded.args.liquidity
-    amount0 = decoded.args.amount0
-    amount1 = decoded.args.amount1
-    token_id = decoded.args.tokenId
-
-    return {
-      "liquidity": liquidity,
-      "amount0": amount0,
-      "amount1": amount1,
-      "tokenId": token_id
-    }
-
-  def get_increase_liquidity_events(self, from_block, to_block):
-    """Fetches Mint events from the pool contract."""
-
-    return self.w3.eth.get_logs({
+        try:
+          latest_block = self.w3.eth.block_number
+          self.final_block = latest_block - self.confirmations
+          self.rollback_reorged_ranges()
+          self.finalize_ranges()
+
+          status = self.block_repo.get_latest()
+          from_block = status.latest_block + 1 if status.latest_block else self.START_BLOCK
+          if from_block > latest_block:
+            status.synced = True
+            self.block_repo.set_latest(status.latest_block)
+            self.logger.debug("Indexing complete")
+            sleep(self.SYNCED_SLEEP_SECONDS)
+            continue
+
+          # The tip is indexed right away, ranges above final_block are journaled until they are final
+          self.index_range(from_block, latest_block)
+        except Exception as e:
+          # The checkpoint only ever covers applied ranges, the next pass resumes right after it
+          session.rollback()
+          self.logger.error(f"Indexing failed after block {self.block_repo.get_latest().latest_block}: {e}")
+          sleep(self.ERROR_SLEEP_SECONDS)
+
+  def index_range(self, from_block: int, to_block: int):
+    """
+    Indexes from_block..to_block in chunks of the adaptive log window. Chunks are fetched
+    concurrently by up to `workers` threads but applied and checkpointed strictly in block order,
+    so a failed chunk stops the pass with indexed_block pointing at the end of the last applied chunk.
+    """
+    with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="indexer") as pool:
+      # Our token IDs must be known up to to_block before the event logs can be filtered on them
+      self.scan_owned_token_ids(pool, to_block)
+
+      chunks = self._chunks(self.log_window, from_block, to_block)
+      for range_logs in self._fetch_in_order(pool, chunks, self.fetch_range):
+        self.logger.info(
+          f"Indexing blocks {range_logs.from_block} - {range_logs.to_block}: {len(range_logs.events)} events "
+          f"fetched in {range_logs.fetch_seconds:.2f}s (window {self.log_window.size})")
+        self.apply_range(range_logs)
+
+    if to_block - from_block + 1 > self.log_window.size:
+      self.logger.info(f"Backfilled blocks {from_block} - {to_block}: {self.log_window.stats}")
+
+  def scan_owned_token_ids(self, pool: ThreadPoolExecutor, to_block: int):
+    """Adds the token IDs transferred to our wallet (mints included) up to to_block."""
+    chunks = self._chunks(self.transfer_window, self.owned_scanned_to + 1, to_block)
+    fetch = lambda chunk_from, chunk_to: self.transfer_window.fetch(self.get_token_ids_received, chunk_from, chunk_to)
+    for token_ids in self._fetch_in_order(pool, chunks, fetch):
+      new_token_ids = set(token_ids) - self.owned_token_ids
+      if new_token_ids:
+        self.logger.info(f"Found own position token IDs {sorted(new_token_ids)}")
+        self.owned_token_ids |= new_token_ids
+    self.owned_scanned_to = max(self.owned_scanned_to, to_block)
+
+  @staticmethod
+  def _chunks(window: LogWindow, from_block: int, to_block: int) -> Iterator[tuple[int, int]]:
+    """Consecutive ranges sized by the window at the time each one is submitted."""
+    start = from_block
+    while start <= to_block:
+      end = min(start + window.size - 1, to_block)
+      yield start, end
+      start = end + 1
+
+  def _fetch_in_order(self, pool: ThreadPoolExecutor, chunks: Iterator[tuple[int, int]],
+                      fetch: Callable[[int, int], T]) -> Iterator[T]:
+    """Runs fetch over the chunks in the pool and yields the results in chunk order."""
+    # At most two chunks per worker in flight, so a long backfill doesn't buffer all logs in memory
+    in_flight: deque[Future] = deque()
+    try:
+      for chunk in chunks:
+        in_flight.append(pool.submit(fetch, *chunk))
+        if len(in_flight) >= self.workers * 2:
+          break
+      while in_flight:
+        yield in_flight.popleft().result()
+        next_chunk = next(chunks, None)
+        if next_chunk:
+          in_flight.append(pool.submit(fetch, *next_chunk))
+    finally:
+      for future in in_flight:
+        future.cancel()
+
+  def get_token_ids_received(self, from_block: int, to_block: int) -> list[int]:
+    """NFPM Transfer logs filtered server-side on the `to` topic (our wallet)."""
+    logs = self.w3.eth.get_logs({
       "fromBlock": from_block,
       "toBlock": to_block,
       "address": self.nftm.contract.address,
-      "topics": ["0x" + Web3.keccak(text=self.event_signature_increase_liquidity).hex(), None]
-    })
-
-  def find_increase_liquidity_events(self, from_block: int, to_block: int):
-    logs = self.get_increase_liquidity_events(from_block, to_block)
-    for log in logs:
-      tx_hash = log["transactionHash"].hex()
-      tx = self.w3.eth.get_transaction(log["transactionHash"])
-
-      if tx["from"].lower() == self.account.address.lower():
-        decoded = self.decode_increase_liquidity_event(log)
-        pos_data = self.nftm.get_position(decoded['tokenId'])
-        pos = self.position_repo.get_active_by_token_id(decoded['tokenId'])
-
-        if pos is not None:
-          self.logger.info(f"Found increase liquidity event for token ID {decoded['tokenId']}.")
-          self.logger.info(
-            f"Current position: {self.pool.token0.format(pos.deposited_amount0)} and "
-            f"{self.pool.token1.format(pos.deposited_amount1)}")
-          pos.deposited_amount0 += decoded["amount0"]
-          pos.deposited_amount1 += decoded["amount1"]
-          self.logger.info(
-            f"Updated position: {self.pool.token0.format(pos.deposited_amount0)} and "
-            f"{self.pool.token1.format(pos.deposited_amount1)}")
-          self.position_repo.save(pos)
-        else:
-
-          self.logger.info(
-            f"Create new position with ID[{decoded['tokenId']}] {self.pool.token0.format(decoded["amount0"])} and "
-            f"{self.pool.token1.format(decoded["amount1"])}")
-
-          # 1. Fetch the pool state at the specific block of this transaction
-          # tx_hash is assumed to be available in your context
-          tx_receipt = self.w3.eth.get_transaction_receipt(tx_hash)
-          block_number = tx_receipt['blockNumber']
-
-          # 2. Get slot0 which contains the sqrtPriceX96 at that block
-          # This represents the 'p_initial' for your IL calculation
-          pool_data_at_mint = self.pool.pool_contract.functions.slot0().call(block_identifier=block_number)
-          sqrt_price_x96 = pool_data_at_mint[0]
-
-          # 3. Convert sqrtPriceX96 to a human-readable price (p_initial)
-          # Adjust decimals based on your token0 and token1 (e.g., 6 for USDC/EUROC)
-          dec0 = self.pool.token0.decimals
-          dec1 = self.pool.token1.decimals
-          p_initial = ((sqrt_price_x96 / (2 ** 96)) ** 2) * (10 ** (dec0 - dec1))
-
-          self.logger.info(f"Position Mint Price (p_initial): {p_initial}")
-
-          self.mint_repo.save_event(
-            tx_hash,
-            decoded['tokenId'],
-            decoded["liquidity"],
-            decoded["amount0"],
-            decoded["amount1"],
-            pos_data[5],
-            pos_data[6]
-          )
-
-          self.position_repo.save(
-            Position(
-              token_id=decoded['tokenId'],
-              deposited_amount0=decoded['amount0'],
-              deposited_amount1=decoded['amount1'],
-              current_amount0=decoded['amount0'],
-              current_amount1=decoded['amount1'],
-              liquidity=decoded['liquidity'],
-              tick_lower=pos_data[5],
-              tick_upper=pos_data[6],
-              is_active=True,
-
-            )
-          )
-
-  def get_collect_events(self, from_block, to_block):
-    nfpm_address = self.nftm.contract.address
-    # Correct signature for NFPM Collect event
-    event_signature = "Collect(uint256,address,uint256,uint256)"
-    topic0 = self.w3.keccak(text=event_signature).hex()
-
-    all_logs = self.w3.eth.get_logs({
-      "fromBlock": from_block,
-      "toBlock": to_block,
-      "address": nfpm_address,
-      "topics": ["0x" + topic0]
+      "topics": [self.transfer_topic, None, self.wallet_topic]
     })
-
-    my_events = []
-
-    for log in all_logs:
-      decoded_log = self.nftm.contract.events.Collect()._get_event_abi()
-      decoded = get_event_data(self.w3.codec, decoded_log, log)
-      if decoded.args.recipient == self.account.address:
-        my_events.append(log)
-
-    return my_events
-
-  def find_collect_events(self, indexing_block: int, to_block: int):
-    """Finds and processes Collect events for your wallet in a given block."""
-    for log in self.get_collect_events(indexing_block, to_block):
-      tx_hash = log["transactionHash"].hex()
-      tx = self.w3.eth.get_transaction(log["transactionHash"])
-
-      # Only consider transactions from your wallet
-      if tx["from"].lower() != self.account.address.lower():
-        continue
-
-      # Decode the Collect event
-      event_abi = self.nftm.contract.events.Collect()._get_event_abi()
-      decoded = get_event_data(self.w3.codec, event_abi, log)
-
-      token_id = decoded.args.tokenId
-      amount0 = decoded.args.amount0
-      amount1 = decoded.args.amount1
-
-      self.logger.info(f"Collect fees event in tx {tx_hash}")
+    return [get_event_data(self.w3.codec, self.transfer_abi, log).args.tokenId for log in logs]
+
+  def fetch_range(self, from_block: int, to_block: int) -> RangeLogs:
+    """RPC part of indexing a range: our IncreaseLiquidity, DecreaseLiquidity and Collect events."""
+    started_at = time.perf_counter()
+    # Taken before the logs: if the block is reorged in between, the next pass sees a changed hash
+    block_hash = None
+    if to_block > self.final_block:
+      block_hash = self.get_block_hash(to_block)
+      if block_hash is None:
+        # A reorg shortened the chain: journaling the range without a hash would never roll it back
+        raise RuntimeError(f"Block {to_block} not found, the chain was reorged below it; retrying the range")
+    logs = self.log_window.fetch(self.get_nfpm_logs, from_block, to_block)
+    events = [self.decode_event(log) for log in logs]
+    events = [
+      event for event in events
+      if event.event != "Collect" or event.args.recipient == self.account.address
+    ]
+    return RangeLogs(
+      from_block=from_block,
+      to_block=to_block,
+      events=events,
+      fetch_seconds=time.perf_counter() - started_at,
+      block_hash=block_hash
+    )
+
+  def apply_range(self, range_logs: RangeLogs):
+    """
+    DB part of indexing a range; must be called in block order. The events are folded into one
+    RangeBatch and written with a few bulk statements in a single transaction with the checkpoint,
+    so a range is either fully indexed or not at all.
+    """
+    batch = RangeBatch()
+    token_ids = sorted({event.args.tokenId for event in range_logs.events})
+    for position in self.position_repo.get_by_token_ids(token_ids):
+      batch.positions[position.token_id] = {column: getattr(position, column) for column in self.POSITION_COLUMNS}
+      batch.position_ids[position.token_id] = position.id
+    positions_before = {token_id: dict(row) for token_id, row in batch.positions.items()}
+
+    for event in range_logs.events:
+      self.event_handlers[event.event](batch, event)
+
+    try:
+      batch.position_ids |= self.position_repo.upsert_many(
+        [batch.positions[token_id] for token_id in sorted(batch.changed_positions)]
+      )
+      self.mint_repo.insert_many(batch.mint_events)
+      self.collect_repo.insert_many([
+        {**row, "position_id": batch.position_ids[row["token_id"]]}
+        for row in batch.collect_events
+      ])
+      if range_logs.block_hash:
+        self.range_repo.add(range_logs.from_block, range_logs.to_block, range_logs.block_hash, {
+          # None: the position didn't exist before the range
+          "positions": {str(token_id): positions_before.get(token_id) for token_id in batch.changed_positions},
+          "mint_tx_hashes": [row["tx_hash"] for row in batch.mint_events],
+          "collect_tx_hashes": [row["tx_hash"] for row in batch.collect_events],
+        })
+      self.block_repo.set_latest(range_logs.to_block, commit=False)
+      self.session.commit()
+    except Exception:
+      self.session.rollback()
+      raise
+
+  def rollback_reorged_ranges(self):
+    """
+    Compares the journaled ranges' last block hashes with the chain, newest first. Ranges up to
+    the first matching one (the fork point lies after it) are undone in one transaction and the
+    checkpoint is moved back, so the next pass re-indexes them from the canonical chain.
+    """
+    indexed_ranges = self.range_repo.get_unfinalized()
+    # All journaled hashes are checked in one JSON-RPC batch
+    with RpcBatch(self.w3) as batch:
+      for indexed_range in indexed_ranges:
+        batch.add_block_hash(indexed_range.to_block)
+
+    reorged = []
+    for indexed_range, result in zip(indexed_ranges, batch.results):
+      if result.unwrap() == indexed_range.block_hash:
+        break
+      reorged.append(indexed_range)
+    if not reorged:
+      return
+
+    self.logger.warning(
+      f"Reorg detected: rolling back blocks {reorged[-1].from_block} - {reorged[0].to_block} "
+      f"({len(reorged)} ranges)")
+    try:
+      for indexed_range in reorged:
+        undo = indexed_range.undo
+        self.collect_repo.delete_by_tx_hashes(undo["collect_tx_hashes"])
+        self.mint_repo.delete_by_tx_hashes(undo["mint_tx_hashes"])
+        restored = [row for row in undo["positions"].values() if row is not None]
+        created = [int(token_id) for token_id, row in undo["positions"].items() if row is None]
+        self.position_repo.delete_by_token_ids(created)
+        self.position_repo.upsert_many(restored)
+        self.range_repo.delete(indexed_range)
+      self.block_repo.set_latest(reorged[-1].from_block - 1, commit=False)
+      self.session.commit()
+    except Exception:
+      self.session.rollback()
+      raise
+
+  def finalize_ranges(self):
+    finalized = self.range_repo.finalize(self.final_block)
+    self.session.commit()
+    if finalized:
+      self.logger.debug(f"Finalized {finalized} indexed ranges up to block {self.final_block}")
+
+  def get_block_hash(self, block_number: int) -> str | None:
+    """None if the chain (after a reorg) doesn't reach block_number."""
+    try:
+      return "0x" + self.w3.eth.get_block(block_number)["hash"].hex()
+    except BlockNotFound:
+      return None
+
+  def get_nfpm_logs(self, from_block: int, to_block: int) -> list:
+    """
+    Handled NFPM events of our token IDs in chain order. Both topic0 and the indexed tokenId are
+    OR'd, so the node only returns our events: one call per MAX_TOKEN_TOPICS owned token IDs.
+    """
+    token_ids = sorted(self.owned_token_ids)
+    logs = []
+    for i in range(0, len(token_ids), self.MAX_TOKEN_TOPICS):
+      logs += self.w3.eth.get_logs({
+        "fromBlock": from_block,
+        "toBlock": to_block,
+        "address": self.nftm.contract.address,
+        "topics": [
+          ["0x" + topic.hex() for topic in self.event_decoders],
+          ["0x" + token_id.to_bytes(32, "big").hex() for token_id in token_ids[i:i + self.MAX_TOKEN_TOPICS]]
+        ]
+      })
+    return sorted(logs, key=lambda log: (log["blockNumber"], log["logIndex"]))
+
+  def decode_event(self, log) -> EventData:
+    return get_event_data(self.w3.codec, self.event_decoders[bytes(log["topics"][0])], log)
+
+  def handle_increase_liquidity(self, batch: RangeBatch, event: EventData):
+    tx_hash = event.transactionHash.hex()
+    token_id = event.args.tokenId
+    amount0 = event.args.amount0
+    amount1 = event.args.amount1
+    pos = batch.positions.get(token_id)
+    if pos is not None and pos["is_active"]:
+      self.logger.info(f"Found increase liquidity event for token ID {token_id}.")
+      self.logger.info(
+        f"Current position: {self.pool.token0.format(pos['deposited_amount0'])} and "
+        f"{self.pool.token1.format(pos['deposited_amount1'])}")
+      pos["deposited_amount0"] += amount0
+      pos["deposited_amount1"] += amount1
       self.logger.info(
-        f"Collected fees for Position ID[{token_id}]: {self.pool.token0.format(amount0)} and "
+        f"Updated position: {self.pool.token0.format(pos['deposited_amount0'])} and "
+        f"{self.pool.token1.format(pos['deposited_amount1'])}")
+    else:
+      self.logger.info(
+        f"Create new position with ID[{token_id}] {self.pool.token0.format(amount0)} and "
         f"{self.pool.token1.format(amount1)}")
-
-      position = self.position_repo.get_by_token_id(token_id)
-
-      self.collect_repo.save(
-        tx_hash,
-        token_id,
-        amount0,
-        amount1,
-        position_id=position.id
-      )
-
-  def find_decrease_liquidity_events(self, starting_block, to_block):
-    """Finds and processes DecreaseLiquidity events for your wallet in a given block."""
-    event_signature = "DecreaseLiquidity(uint256,uint128,uint256,uint256)"
-    logs = self.w3.eth.get_logs({
-      "fromBlock": starting_block,
-      "toBlock": to_block,
-      "address": self.nftm.contract.address,
-      "topics": ["0x" + Web3.keccak(text=event_signature).hex(), None]
-    })
-
-    for log in logs:
-      tx = self.w3.eth.get_transaction(log["transactionHash"])
-
-      if tx["from"].lower() == self.account.address.lower():
-        decoded = self.decode_decrease_liquidity_event(log)
-        pos = self.position_repo.get_by_token_id(decoded["tokenId"])
-        pos.liquidity -= decoded["liquidity"]
-        if pos.liquidity <= 0:
-          pos.is_active = False
-        self.position_repo.save(pos)
-
-        self.logger.info(
-          f"Position ID[{decoded['tokenId']}] decreased liquidity by {self.pool.token0.format(decoded['amount0'])} and "
-          f"{self.pool.token1.format(decoded['amount1'])} active: {pos.is_active}")
-
-  def decode_decrease_liquidity_event(self, log):
-    """Decodes a DecreaseLiquidity event log."""
-    event_abi = self.nftm.contract.events.DecreaseLiquidity()._get_event_abi()
-    decoded = get_event_data(self.w3.codec, event_abi, log)
-    liquidity = decoded.args.liquidity
-    amount0 = decoded.args.amount0
-    amount1 = decoded.args.amount1
-    token_id = decoded.args.tokenId
-
-    return {
-      "liquidity": liquidity,
+      # 1. Read the position and slot0 at the block of the mint (it contains the sqrtPriceX96) in one batch
+      # This represents the 'p_initial' for your IL calculation
+      with RpcBatch(self.w3) as rpc_batch:
+        rpc_batch.add_call(self.nftm.contract.functions.positions(token_id))
+        rpc_batch.add_call(self.pool.pool_contract.functions.slot0(), block_identifier=event.blockNumber)
+      pos_data, pool_data_at_mint = (result.unwrap() for result in rpc_batch.results)
+      sqrt_price_x96 = pool_data_at_mint[0]
+
+      # 2. Convert sqrtPriceX96 to a human-readable price (p_initial)
+      # Adjust decimals based on your token0 and token1 (e.g., 6 for USDC/EUROC)
+      dec0 = self.pool.token0.decimals
+      dec1 = self.pool.token1.decimals
+      p_initial = ((sqrt_price_x96 / (2 ** 96)) ** 2) * (10 ** (dec0 - dec1))
+
+      self.logger.info(f"Position Mint Price (p_initial): {p_initial}")
+
+      batch.mint_events.append({
+        "tx_hash": tx_hash,
+        "token_id": token_id,
+        "liquidity": event.args.liquidity,
+        "amount0": amount0,
+        "amount1": amount1,
+        "tick_lower": pos_data[5],
+        "tick_upper": pos_data[6],
+      })
+
+      batch.positions[token_id] = {
+        "token_id": token_id,
+        "deposited_amount0": amount0,
+        "deposited_amount1": amount1,
+        "current_amount0": amount0,
+        "current_amount1": amount1,
+        "liquidity": event.args.liquidity,
+        "tick_lower": pos_data[5],
+        "tick_upper": pos_data[6],
+        "is_active": True,
+      }
+    batch.changed_positions.add(token_id)
+
+  def handle_collect(self, batch: RangeBatch, event: EventData):
+    tx_hash = event.transactionHash.hex()
+    token_id = event.args.tokenId
+    amount0 = event.args.amount0
+    amount1 = event.args.amount1
+
+    self.logger.info(f"Collect fees event in tx {tx_hash}")
+    self.logger.info(
+      f"Collected fees for Position ID[{token_id}]: {self.pool.token0.format(amount0)} and "
+      f"{self.pool.token1.format(amount1)}")
+
+    # position_id is resolved after the range's positions are written
+    batch.collect_events.append({
+      "tx_hash": tx_hash,
+      "token_id": token_id,
       "amount0": amount0,
       "amount1": amount1,
-      "tokenId": token_id
-    }
+    })
+
+  def handle_decrease_liquidity(self, batch: RangeBatch, event: EventData):
+    token_id = event.args.tokenId
+    pos = batch.positions[token_id]
+    pos["liquidity"] -= event.args.liquidity
+    if pos["liquidity"] <= 0:
+      pos["is_active"] = False
+    batch.changed_positions.add(token_id)
+
+    self.logger.info(
+      f"Position ID[{token_id}] decreased liquidity by {self.pool.token0.format(event.args.amount0)} and "
+      f"{self.pool.token1.format(event.args.amount1)} active: {pos['is_active']}")
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import socket
+from datetime import timedelta
+from typing import Any
+
+from common.logger import get_logger
+from database.database import Database
+from database.models import TaskState
+from database.repositories import TaskRecordRepository
+from execution.BasicTask import BasicTask
+from execution.TaskContext import TaskContext
+from execution.tasks.ArbitrageExecuteTask import ArbitrageExecuteTask
+from execution.tasks.CoinbaseWithdrawalTask import CoinbaseWithdrawalTask
+from execution.tasks.WalletWithdrawalTask import WalletWithdrawalTask
+
+
+class TaskStore:
+  """
+  Postgres backing of the Executor queue, so queued and in-flight tasks survive a restart.
+
+  State transitions are buffered per task (only the latest state of a task is kept) and written
+  in one upsert every FLUSH_INTERVAL_SECONDS. Checkpoints are flushed right away: a task awaits
+  them before its next irreversible step; the Executor flushes finished tasks right away too.
+
+  Written rows are leased to this process for LEASE_SECONDS and the lease is renewed every
+  LEASE_RENEW_SECONDS. On startup `claim_unfinished` takes over the pending and running rows that
+  are unclaimed or whose lease ran out (i.e. of a process that is gone) and rebuilds their tasks.
+  """
+  FLUSH_INTERVAL_SECONDS = 0.5
+  LEASE_SECONDS = 30
+  LEASE_RENEW_SECONDS = 10
+  TASK_TYPES: dict[str, type[BasicTask]] = {
+    task_type.__name__: task_type
+    for task_type in (ArbitrageExecuteTask, CoinbaseWithdrawalTask, WalletWithdrawalTask)
+  }
+
+  def __init__(self, db: Database):
+    self.logger = get_logger()
+    self.db = db
+    self.owner = f"{socket.gethostname()}-{os.getpid()}"
+    self.lease = timedelta(seconds=self.LEASE_SECONDS)
+    self._buffer: dict[str, dict[str, Any]] = {}
+    self._flush_lock: asyncio.Lock | None = None
+
+  def record(self, task: BasicTask, state: TaskState, error: str | None = None) -> None:
+    """Buffers a state transition of a persistable task; written with the next flush."""
+    payload = task.to_payload()
+    if payload is None:
+      return
+    self._buffer[task.task_id] = {
+      "id": task.task_id,
+      "task_type": task.__class__.__name__,
+      "priority": task.priority,
+      "state": state,
+      "payload": payload,
+      "checkpoint": dict(task.checkpoint),
+      "error": error,
+      "claimed_by": self.owner,
+    }
+
+  async def save_checkpoint(self, task: BasicTask) -> None:
+    self.record(task, TaskState.RUNNING)
+    await self.flush()
+
+  async def flush(self) -> None:
+    async with self._get_flush_lock():
+      if not self._buffer:
+        return
+      rows, self._buffer = self._buffer, {}
+      try:
+        await asyncio.to_thread(self._write, list(rows.values()))
+      except Exception:
+        # Keep the rows for the next flush unless a newer state of the task was recorded meanwhile
+        self._buffer = {**rows, **self._buffer}
+        raise
+
+  async def run(self) -> None:
+    loop = asyncio.get_running_loop()
+    renewed_at = loop.time()
+    while True:
+      await asyncio.sleep(self.FLUSH_INTERVAL_SECONDS)
+      try:
+        await self.flush()
+      except Exception as e:
+        self.logger.error(f"TaskStore flush failed, retrying: {e}")
+      if loop.time() - renewed_at >= self.LEASE_RENEW_SECONDS:
+        try:
+          await asyncio.to_thread(self._renew_leases)
+          renewed_at = loop.time()
+        except Exception as e:
+          self.logger.error(f"TaskStore lease renewal failed, retrying: {e}")
+
+  async def claim_unfinished(self, context: TaskContext) -> list[BasicTask]:
+    """
+    Rebuilds the tasks a previous process left pending or running; dropped ones are cancelled. Tasks
+    still leased by another process are claimed once that lease ran out, unless it is renewed.
+    """
+    records = await asyncio.to_thread(self._claim)
+    leased_seconds = await asyncio.to_thread(self._get_leased_seconds)
+    if leased_seconds is not None:
+      self.logger.info(f"Unfinished tasks are leased by another process, claiming them in {leased_seconds:.0f}s")
+      await asyncio.sleep(leased_seconds + 1)
+      records += await asyncio.to_thread(self._claim)
+
+    tasks: list[BasicTask] = []
+    for record in records:
+      task_type = self.TASK_TYPES.get(record["task_type"])
+      task = task_type.restore(record["payload"], record["checkpoint"], context) if task_type else None
+      if task is None:
+        self.logger.warning(f"Dropping persisted {record['task_type']} {record['id']} ({record['state']})")
+        self._buffer[record["id"]] = {**record, "state": TaskState.CANCELLED, "claimed_by": self.owner}
+        continue
+
+      task.task_id = record["id"]
+      task.checkpoint = dict(record["checkpoint"])
+      self.logger.info(f"Resuming persisted {record['task_type']} {record['id']} ({record['state']})")
+      tasks.append(task)
+    await self.flush()
+    return tasks
+
+  def _write(self, rows: list[dict[str, Any]]) -> None:
+    with self.db.session() as session:
+      TaskRecordRepository(session).upsert_many(rows, self.lease)
+
+  def _renew_leases(self) -> None:
+    with self.db.session() as session:
+      TaskRecordRepository(session).renew_leases(self.owner, self.lease)
+
+  def _get_leased_seconds(self) -> float | None:
+    with self.db.session() as session:
+      return TaskRecordRepository(session).get_leased_seconds(self.owner)
+
+  def _claim(self) -> list[dict[str, Any]]:
+    with self.db.session() as session:
+      return [
+        {
+          "id": record.id,
+          "task_type": record.task_type,
+          "priority": record.priority,
+          "state": record.state,
+          "payload": record.payload,
+          "checkpoint": record.checkpoint or {},
+          "error": record.error,
+        }
+        for record in TaskRecordRepository(session).claim_unfinished(self.owner, self.lease)
+      ]
+
+  def _get_flush_lock(self) -> asyncio.Lock:
+    # Created lazily so the lock binds to the running event loop
+    if self._flush_lock is None:
+      self._flush_lock = asyncio.Lock()
+    return self._flush_lock
@@ -0,0 +1,200 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from blockchain.Token import Token
+from blockchain.uniswap.Pool import Pool
+from exchanges.Coinbase.OrderBook import OrderBookSide
+
+
+@dataclass(frozen=True)
+class TradeSizeResult:
+  """
+  Profit-maximizing arbitrage size. quantity is in the base token (EURC),
+  all notionals, costs and profit are in the quote token (USDC).
+  """
+  quantity: float
+  cb_notional: float
+  pool_notional: float
+  trading_costs: float
+  profit: float
+  candidates_evaluated: int
+
+  @property
+  def cb_avg_price(self) -> float:
+    return self.cb_notional / self.quantity
+
+  @property
+  def pool_price(self) -> float:
+    return self.pool_notional / self.quantity
+
+
+class TradeSizeOptimizer:
+  """
+  Finds the trade size with the highest profit after costs for one arbitrage direction.
+
+  The Coinbase leg is priced from the order book prefix sums and the Uniswap leg from the
+  local swap simulator, so evaluating a candidate size costs no RPC call. Candidates are the
+  book level breakpoints plus a geometric grid, and the best one is refined by golden-section
+  search between its neighbours (profit before fixed costs is concave in the size).
+  """
+  GRID_POINTS = 24
+  MIN_QUANTITY_RATIO = 0.001
+  TOLERANCE = 0.01
+  MAX_REFINE_ITERATIONS = 40
+  MAX_BISECT_ITERATIONS = 40
+  GOLDEN_RATIO = (math.sqrt(5) - 1) / 2
+
+  def __init__(self, pool: Pool, base_token: Token, quote_token: Token, cb_fee_rate: float):
+    self.pool = pool
+    self.base_token = base_token
+    self.quote_token = quote_token
+    self.cb_fee_rate = cb_fee_rate
+
+  @property
+  def is_available(self) -> bool:
+    return self.pool.mirror.is_loaded
+
+  def optimize(self, is_cb_buy: bool, book_side: OrderBookSide, fixed_costs: float, max_base_qty: float,
+               max_quote_spend: float) -> TradeSizeResult | None:
+    """
+    Returns the best size for buying on Coinbase and selling on Uniswap (is_cb_buy) or the reverse.
+    The result may have a non-positive profit; None means no size is feasible or the pool
+    mirror is not loaded.
+
+    Args:
+      book_side: Coinbase asks when buying on Coinbase, bids otherwise
+      fixed_costs: size independent costs (gas, transfers) in the quote token
+      max_base_qty: cap for the base token amount
+      max_quote_spend: cap for the quote token amount spent on the buying leg
+    """
+    if not self.is_available:
+      return None
+
+    max_qty = min(max_base_qty, book_side.depth)
+    if is_cb_buy:
+      max_qty = min(max_qty, book_side.quantity_for_notional(max_quote_spend))
+    else:
+      max_qty = self._max_pool_buy_quantity(max_qty, max_quote_spend)
+    if max_qty <= 0:
+      return None
+
+    evaluated: dict[float, TradeSizeResult | None] = {}
+
+    def evaluate(quantity: float, cb_notional: float | None = None) -> float:
+      if quantity not in evaluated:
+        if cb_notional is None:
+          cb_notional = book_side.notional(quantity)
+        evaluated[quantity] = self._evaluate(is_cb_buy, quantity, cb_notional, fixed_costs)
+      result = evaluated[quantity]
+      return result.profit if result else -math.inf
+
+    candidates = self._candidate_quantities(book_side, max_qty)
+    cb_notionals = book_side.notional_many(np.array(candidates))
+    profits = [evaluate(quantity, float(cb_notional)) for quantity, cb_notional in zip(candidates, cb_notionals)]
+    best_index = max(range(len(candidates)), key=profits.__getitem__)
+    if profits[best_index] == -math.inf:
+      return None
+
+    lo = candidates[best_index - 1] if best_index > 0 else 0.0
+    hi = candidates[best_index + 1] if best_index + 1 < len(candidates) else candidates[best_index]
+    best_quantity = self._golden_section(evaluate, lo, hi, candidates[best_index])
+
+    best = evaluated[best_quantity]
+    return TradeSizeResult(
+      quantity=best.quantity,
+      cb_notional=best.cb_notional,
+      pool_notional=best.pool_notional,
+      trading_costs=best.trading_costs,
+      profit=best.profit,
+      candidates_evaluated=len(evaluated)
+    )
+
+  def _evaluate(self, is_cb_buy: bool, quantity: float, cb_notional: float,
+                fixed_costs: float) -> TradeSizeResult | None:
+    if quantity <= 0:
+      return None
+
+    if is_cb_buy:
+      pool_notional = self._pool_sell_proceeds(quantity)
+    else:
+      pool_notional = self._pool_buy_cost(quantity)
+      if pool_notional is None:
+        return None
+
+    trading_costs = cb_notional * self.cb_fee_rate + fixed_costs
+    if is_cb_buy:
+      profit = pool_notional - cb_notional - trading_costs
+    else:
+      profit = cb_notional - pool_notional - trading_costs
+
+    return TradeSizeResult(
+      quantity=quantity,
+      cb_notional=cb_notional,
+      pool_notional=pool_notional,
+      trading_costs=trading_costs,
+      profit=profit,
+      candidates_evaluated=0
+    )
+
+  def _pool_sell_proceeds(self, quantity: float) -> float:
+    """Quote amount received for selling quantity base on Uniswap."""
+    zero_for_one = self.base_token.address == self.pool.token0.address
+    amount_out = self.pool.simulator.quote_exact_input_single(zero_for_one, self.base_token.to_raw(quantity))
+    return self.quote_token.to_human(amount_out)
+
+  def _pool_buy_cost(self, quantity: float) -> float | None:
+    """Quote amount needed to buy quantity base on Uniswap, None if the pool cannot fill it."""
+    zero_for_one = self.quote_token.address == self.pool.token0.address
+    try:
+      amount_in = self.pool.simulator.quote_exact_output_single(zero_for_one, self.base_token.to_raw(quantity))
+    except ValueError:
+      return None
+    return self.quote_token.to_human(amount_in)
+
+  def _max_pool_buy_quantity(self, max_qty: float, max_quote_spend: float) -> float:
+    """Largest quantity up to max_qty whose Uniswap buy cost stays within max_quote_spend."""
+    cost = self._pool_buy_cost(max_qty)
+    if cost is not None and cost <= max_quote_spend:
+      return max_qty
+
+    lo, hi = 0.0, max_qty
+    for _ in range(self.MAX_BISECT_ITERATIONS):
+      if hi - lo <= self.TOLERANCE:
+        break
+      mid = (lo + hi) / 2
+      cost = self._pool_buy_cost(mid)
+      if cost is not None and cost <= max_quote_spend:
+        lo = mid
+      else:
+        hi = mid
+    return lo
+
+  def _candidate_quantities(self, book_side: OrderBookSide, max_qty: float) -> list[float]:
+    min_qty = max_qty * self.MIN_QUANTITY_RATIO
+    step = (max_qty / min_qty) ** (1 / (self.GRID_POINTS - 1))
+    candidates = {min_qty * step ** i for i in range(self.GRID_POINTS - 1)}
+    candidates.add(max_qty)
+    breakpoints = book_side.cum_sizes[1:]
+    candidates.update(breakpoints[(breakpoints > min_qty) & (breakpoints < max_qty)].tolist())
+    return sorted(candidates)
+
+  def _golden_section(self, evaluate, lo: float, hi: float, best: float) -> float:
+    """Narrows [lo, hi] around the profit maximum, returns the best evaluated quantity."""
+    x1 = hi - self.GOLDEN_RATIO * (hi - lo)
+    x2 = lo + self.GOLDEN_RATIO * (hi - lo)
+    for _ in range(self.MAX_REFINE_ITERATIONS):
+      if hi - lo <= self.TOLERANCE:
+        break
+      if evaluate(x1) < evaluate(x2):
+        lo, x1 = x1, x2
+        x2 = lo + self.GOLDEN_RATIO * (hi - lo)
+      else:
+        hi, x2 = x2, x1
+        x1 = hi - self.GOLDEN_RATIO * (hi - lo)
+      if evaluate(x1) > evaluate(best):
+        best = x1
+      if evaluate(x2) > evaluate(best):
+        best = x2
+    return best
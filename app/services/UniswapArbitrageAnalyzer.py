@@ -1,25 +1,35 @@
 import asyncio
 import os
 from dataclasses import dataclass
+from functools import partial
 from datetime import datetime, timezone
 from typing import Any
 
 import dotenv
-from web3 import Web3
 
+from Configurations import ANALYZER_TRIGGER_MODE, COINBASE_WS_ORDER_BOOK
+from blockchain.BlockWatcher import BlockWatcher
+from blockchain.GasOracle import GasOracle
 from blockchain.Network import Network
 from blockchain.Token import Token, Tokens
 from blockchain.WalletService import WalletService
+from blockchain.Web3Provider import Web3Provider
 from blockchain.uniswap.Pool import Pool
 from common.AccountManager import AccountManager
+from common.ConcurrentFetcher import ConcurrentFetcher
 from common.TelegramServices import TelegramServices
 from common.logger import get_logger
 from exchanges.Coinbase.Coinbase import Coinbase
+from exchanges.Coinbase.CoinbaseOrderBookStream import CoinbaseOrderBookStream
+from exchanges.Coinbase.OrderBook import OrderBook, OrderBookSide
 from exchanges.UniswapV3 import UniswapV3
+from execution.TaskContext import TaskContext
 from execution.tasks.ArbitrageExecuteTask import ArbitrageExecuteTask
 from execution.tasks.CoinbaseWithdrawalTask import CoinbaseWithdrawalTask
 from execution.tasks.WalletWithdrawalTask import WalletWithdrawalTask
+from services.CycleTrigger import CycleTrigger, TriggerEvent
 from services.Executor import Executor
+from services.TradeSizeOptimizer import TradeSizeOptimizer
 
 dotenv.load_dotenv()
 
@@ -62,16 +72,25 @@ class UniswapArbitrageAnalyzer:
       runtime_state=None
   ):
     self.logger = get_logger()
-    self.w3 = Web3(Web3.HTTPProvider(os.getenv("RPC_URL")))
+    self.w3 = Web3Provider.get_web3()
     self.token0 = Token(token0)
     self.token1 = Token(token1)
     self.coinbase = Coinbase(coinbase_product_id, token0, token1)
+    self.order_book_stream = CoinbaseOrderBookStream(
+      self.coinbase.product.product_id, self.coinbase.api_key, self.coinbase.api_secret
+    ) if COINBASE_WS_ORDER_BOOK else None
+    self._order_book_stream_task: asyncio.Task | None = None
+    self.cycle_trigger = CycleTrigger(
+      BlockWatcher.shared(), self.order_book_stream
+    ) if ANALYZER_TRIGGER_MODE == "event" else None
     self.pool = Pool(uni_pool_address)
     self.account_manager = AccountManager(self.coinbase)
     self.uniswap_pool = UniswapV3(chain="ethereum", fee_tier=500)
     self.executor = executor
     self.wallet_service = WalletService()
+    self.fetcher = ConcurrentFetcher()
     self.target_qty = target_qty
+    self.trade_size_optimizer = TradeSizeOptimizer(self.pool, self.token0, self.token1, self.CB_FEE_RATE)
     self.telegram = TelegramServices(os.getenv("TELEGRAM_BOT_TOKEN"), os.getenv("TELEGRAM_CHAT_ID"))
     self.starting_date = starting_date
     self.starting_balance_eth = starting_balance_eth
@@ -107,7 +126,7 @@ class UniswapArbitrageAnalyzer:
     )
 
   @staticmethod
-  def get_average_price(book_side, limit_price, is_ask: bool, target_quantity: float):
+  def get_average_price(book_side: OrderBookSide, limit_price: float, target_quantity: float):
     """
     Berechnet den VWAP für die Zielmenge (target_quantity) und liefert zusätzlich
     das gesamte ausführbare Volumen am Book bis zum Limitpreis.
@@ -117,36 +136,12 @@ class UniswapArbitrageAnalyzer:
         - average_price_for_target: VWAP der (Teil-)Ausführung für target_quantity
         - total_volume_until_limit: gesamtes verfügbares Volumen bis limit_price (unabhängig vom target)
     """
-    matched_volume_for_target = 0.0
-    total_cost_for_target = 0.0
-    total_volume_until_limit = 0.0
-    remaining_qty = max(target_quantity, 0.0)
-
-    for entry in book_side:
-      price = float(entry.price)
-      size = float(entry.size)
-
-      # Profitability-Check gegen das Limit
-      if is_ask and price >= limit_price:
-        break
-      if not is_ask and price <= limit_price:
-        break
-
-      total_volume_until_limit += size
-
-      if remaining_qty <= 0:
-        continue
-
-      take_qty = min(size, remaining_qty)
-      matched_volume_for_target += take_qty
-      total_cost_for_target += take_qty * price
-      remaining_qty -= take_qty
-
-    if matched_volume_for_target == 0:
+    total_volume_until_limit = book_side.volume_until(limit_price)
+    matched_volume_for_target = min(max(target_quantity, 0.0), total_volume_until_limit)
+    if matched_volume_for_target <= 0:
       return None, total_volume_until_limit
 
-    average_price_for_target = total_cost_for_target / matched_volume_for_target
-    return average_price_for_target, total_volume_until_limit
+    return book_side.vwap(matched_volume_for_target), total_volume_until_limit
 
   def _resolve_cb_trade_size(self, is_cb_buy: bool, target_qty: float, usage: float,
                              usdc_balance_total: float, eurc_balance_total: float,
@@ -170,6 +165,39 @@ class UniswapArbitrageAnalyzer:
 
     return buy_balance, buy_outcome
 
+  def _size_target_qty(self, is_cb_buy: bool, target_qty: float, usage: float, usdc_balance_total: float,
+                       eurc_balance_total: float, entry_price: float,
+                       order_book_side: OrderBookSide) -> tuple[float, float, float] | None:
+    """Fixed size sizing around target_qty. Returns (buy_balance, buy_outcome, avg_price_cb)."""
+    usdc_buy_capacity = min(target_qty, usdc_balance_total * usage)
+    target_quantity = usdc_buy_capacity if is_cb_buy else min(target_qty, eurc_balance_total * usage, usdc_buy_capacity / entry_price)
+    # VWAP is already taken over min(target_quantity, volume until limit), no second pass on short depth
+    avg_price_cb, cb_available_volume = self.get_average_price(
+      book_side=order_book_side,
+      limit_price=entry_price,
+      target_quantity=target_quantity
+    )
+
+    if not avg_price_cb or cb_available_volume <= 0:
+      return None
+
+    effective_target_quantity = min(target_quantity, cb_available_volume)
+    if effective_target_quantity < target_quantity:
+      self.logger.info(f"Target quantity {target_quantity} limited by Coinbase volume: {effective_target_quantity}")
+
+    buy_balance, buy_outcome = self._resolve_cb_trade_size(
+      is_cb_buy=is_cb_buy,
+      target_qty=target_qty,
+      usage=usage,
+      usdc_balance_total=usdc_balance_total,
+      eurc_balance_total=eurc_balance_total,
+      entry_price=entry_price,
+      cb_available_volume=effective_target_quantity
+    )
+    if is_cb_buy:
+      buy_outcome = buy_balance / avg_price_cb
+    return buy_balance, buy_outcome, avg_price_cb
+
   async def run(self):
     self.logger.info("Starting Uniswap Arbitrage Analyzer...")
     wallet_balances = self.account_manager.get_wallet_balances()
@@ -179,8 +207,8 @@ class UniswapArbitrageAnalyzer:
     self.logger.info(f"Coinbase: {coinbase_balances}")
     self.logger.info(f"Total: {total}")
 
-    order_book = self.coinbase.get_product_book(self.coinbase.product.product_id)
-    ask_price = float(order_book.pricebook.asks[0].price)
+    order_book = self.coinbase.get_order_book()
+    ask_price = order_book.asks.best_price
     result = self.calculate_rebalance(total.get(Tokens.USDC), total.get(Tokens.EURC), ask_price)
     eth_price = self.coinbase.get_eth_price()
 
@@ -193,32 +221,51 @@ class UniswapArbitrageAnalyzer:
     self._log_performance_summary(total, total_profit_usdc, apr, runtime_delta)
     self.logger.info(f"Rebalance Analysis: {result}")
 
+    try:
+      self.pool.load_mirror()
+    except Exception as e:
+      self.logger.error(f"Failed to load pool mirror, depth queries fall back to RPC: {e}")
+
+    if self.cycle_trigger:
+      # Gas prices follow the same head as the cycle trigger, cost estimates then never wait for RPC
+      GasOracle.shared().attach(BlockWatcher.shared())
+
+    await self.executor.resume(TaskContext(
+      coinbase=self.coinbase,
+      pool=self.pool,
+      wallet_service=self.wallet_service,
+      account_manager=self.account_manager
+    ))
+
+    if self.order_book_stream:
+      self._order_book_stream_task = asyncio.create_task(self.order_book_stream.run())
+
+    trigger: TriggerEvent | None = None
     while True:
       try:
         if self.runtime_state and self.runtime_state.is_sleep_mode():
           await asyncio.sleep(1)
           continue
 
-        if len(self.executor.queue) > 0:
+        if not self.executor.is_drained:
           self.logger.info(
-            f"Executor queue has {len(self.executor.queue)} tasks. Waiting before next analysis...")
-          await asyncio.sleep(10)
+            f"Executor has {self.executor.task_count} tasks. Waiting for them to finish before next analysis...")
+          await self.executor.wait_drained()
+          trigger = None
           continue
 
-        order_book = self.coinbase.get_product_book(self.coinbase.product.product_id)
-        ask_coinbase = order_book.pricebook.asks[0]
-        bid_coinbase = order_book.pricebook.bids[0]
-
-        ask_uni = self.pool.get_ask(self.token1, self.target_qty) / self.target_qty
-        bid_uni = self.pool.get_bid(self.token0, self.target_qty) / self.target_qty
+        # Gather stage: Coinbase book and Uniswap quotes are independent, fetch them concurrently
+        order_book, (ask_uni, bid_uni) = await self.fetcher.gather(
+          self._get_order_book,
+          partial(self._get_pool_quotes, trigger.block_number if trigger else None)
+        )
+        ask_coinbase = order_book.asks.best_price
+        bid_coinbase = order_book.bids.best_price
 
-        profit_a = bid_uni - float(ask_coinbase.price)
-        profit_b = float(bid_coinbase.price) - ask_uni
+        profit_a = bid_uni - ask_coinbase
+        profit_b = bid_coinbase - ask_uni
 
-        await self._send_periodic_report_if_due(
-          total_balances=self.account_manager.get_total_balances(),
-          eurc_price=float(ask_coinbase.price)
-        )
+        await self._send_periodic_report_if_due(eurc_price=ask_coinbase)
 
         if profit_a > 0:
           await self._process_opportunity(
@@ -226,7 +273,7 @@ class UniswapArbitrageAnalyzer:
             profit_raw=profit_a,
             target_qty=self.target_qty,
             entry_price=bid_uni,  # Preis auf der Gegenseite
-            order_book_side=order_book.pricebook.asks,
+            order_book_side=order_book.asks,
             is_cb_buy=True
           )
         elif profit_b > 0 >= profit_a:
@@ -235,22 +282,42 @@ class UniswapArbitrageAnalyzer:
             profit_raw=profit_b,
             target_qty=self.target_qty,
             entry_price=ask_uni,
-            order_book_side=order_book.pricebook.bids,
+            order_book_side=order_book.bids,
             is_cb_buy=False
           )
 
-        await asyncio.sleep(12)
+        if trigger:
+          self.logger.debug(f"Cycle [{trigger.reason}] trigger to decision: {trigger.latency_ms():.1f}ms")
+        trigger = await self._wait_next_cycle(12)
       except Exception as e:
         self.logger.error(f"Error in main loop: {e}")
+        trigger = None
         await asyncio.sleep(10)
 
+  def _get_pool_quotes(self, block_number: int | None) -> tuple[float, float]:
+    """Per unit (ask, bid) of the pool at target_qty, after syncing the mirror to block_number."""
+    if self.pool.mirror.is_loaded:
+      self.pool.sync_mirror(block_number)
+    ask_uni, bid_uni = self.pool.get_quotes(self.token1, self.target_qty, self.token0, self.target_qty)
+    return ask_uni / self.target_qty, bid_uni / self.target_qty
+
+  async def _wait_next_cycle(self, interval_seconds: float) -> TriggerEvent | None:
+    """Fixed sleep in interval mode, next block / top of book change in event mode."""
+    if self.cycle_trigger:
+      return await self.cycle_trigger.wait()
+    await asyncio.sleep(interval_seconds)
+    return None
+
   async def _process_opportunity(self, side: str, profit_raw: float, target_qty: float,
-                                 entry_price: float, order_book_side: list, is_cb_buy: bool
+                                 entry_price: float, order_book_side: OrderBookSide, is_cb_buy: bool
                                  ):
     t_needed_wallet, t_needed_cb = self._get_needed_tokens(is_cb_buy)
+    cb_available_volume = order_book_side.volume_until(entry_price)
+    if cb_available_volume <= 0:
+      return
 
-    # 1. Balances & Amounts (single fetch to reduce REST/Node calls per loop)
-    total_balances, wallet_balances, coinbase_balances = self._get_balance_snapshot()
+    # 1. Balances & Amounts (gather stage: balances and ETH price fetched concurrently)
+    total_balances, wallet_balances, coinbase_balances, eth_price = await self._get_balance_snapshot()
     usdc_balance_total = total_balances.get(Tokens.USDC, 0.0)
     eurc_balance_total = total_balances.get(Tokens.EURC, 0.0)
 
@@ -265,71 +332,70 @@ class UniswapArbitrageAnalyzer:
       wallet_balances=wallet_balances,
       coinbase_balances=coinbase_balances
     )
-    usdc_buy_capacity = min(target_qty, usdc_balance_total * usage)
-    target_quantity = usdc_buy_capacity if is_cb_buy else min(target_qty, eurc_balance_total * usage, usdc_buy_capacity / entry_price)
-    avg_price_cb, cb_available_volume = self.get_average_price(
-      book_side=order_book_side,
-      limit_price=entry_price,
-      is_ask=is_cb_buy,
-      target_quantity=target_quantity
-    )
 
-    if not avg_price_cb or cb_available_volume <= 0:
-      return
-
-    effective_target_quantity = min(target_quantity, cb_available_volume)
-    if effective_target_quantity <= 0:
-      return
-
-    if effective_target_quantity < target_quantity:
-      self.logger.info(f"Target quantity {target_quantity}less than effective quantity: {effective_target_quantity}, recalc")
-      avg_price_cb_adjusted, _ = self.get_average_price(
-        book_side=order_book_side,
-        limit_price=entry_price,
-        is_ask=is_cb_buy,
-        target_quantity=effective_target_quantity
-      )
-      if not avg_price_cb_adjusted:
-        return
-      avg_price_cb = avg_price_cb_adjusted
+    # 2. Kostenkalkulation (Zentralisiert) - size independent costs first, they bound the optimal size
+    fee_fetches = [partial(self.pool.get_swap_costs, self.token0.token, target_qty, 0, eth_price, True)]
+    if cb_rebasing_needed or wallet_rebasing_needed:
+      if wallet_balances.get(Tokens.EURC, 0.0) < 1:
+        existing_token_on_wallet = Tokens.USDC
+      else:
+        existing_token_on_wallet = Tokens.EURC
+      fee_fetches.append(self.coinbase.estimate_withdrawal_fees)
+      fee_fetches.append(partial(
+        self.wallet_service.get_transfer_costs, self.pool.get_token(existing_token_on_wallet), eth_price))
+    pool_swap_fees, *transfer_fees = await self.fetcher.gather(*fee_fetches)
+    self.logger.info(f"Swap fees:~{pool_swap_fees}$")
+    transfer_costs = sum(transfer_fees)
+    fixed_costs = pool_swap_fees + transfer_costs
 
-    buy_balance, buy_outcome = self._resolve_cb_trade_size(
+    # 3. Trade size: profit-maximizing size from book and pool curves, fixed target_qty without pool mirror
+    max_base_qty = eurc_balance_total * usage
+    if is_cb_buy:
+      # The Uniswap leg sells the bought EURC from the wallet
+      max_base_qty = min(max_base_qty, wallet_balances.get(Tokens.EURC, 0.0))
+    sizing = self.trade_size_optimizer.optimize(
       is_cb_buy=is_cb_buy,
-      target_qty=target_qty,
-      usage=usage,
-      usdc_balance_total=usdc_balance_total,
-      eurc_balance_total=eurc_balance_total,
-      entry_price=entry_price,
-      cb_available_volume=effective_target_quantity
+      book_side=order_book_side,
+      fixed_costs=fixed_costs,
+      max_base_qty=max_base_qty,
+      max_quote_spend=usdc_balance_total * usage
     )
-    if is_cb_buy:
-      buy_outcome = buy_balance / avg_price_cb
-
-    # 2. Kostenkalkulation (Zentralisiert)
-    cb_withdrawal_fee = await self.coinbase.estimate_withdrawal_fees()
-    eth_price = self.coinbase.get_eth_price()
-    pool_swap_fees = await self.pool.get_swap_costs(self.token0.token, buy_outcome, 0, eth_price, True)
-    self.logger.info(f"Swap fees:~{pool_swap_fees}$")
-    if wallet_balances.get(Tokens.EURC, 0.0) < 1:
-      existing_token_on_wallet = Tokens.USDC
+    if sizing:
+      self.logger.info(
+        f"Optimal size: {sizing.quantity:.4f} EURC ({sizing.candidates_evaluated} candidates evaluated)")
+      buy_outcome = sizing.quantity
+      avg_price_cb = sizing.cb_avg_price
+      entry_price = sizing.pool_price
+      buy_balance = sizing.cb_notional if is_cb_buy else sizing.pool_notional
+      trading_costs = sizing.trading_costs
+      real_profit = sizing.profit
     else:
-      existing_token_on_wallet = Tokens.EURC
-    wallet_transfer_fees = await self.wallet_service.get_transfer_costs(
-      self.pool.get_token(existing_token_on_wallet), eth_price)
-    transfer_costs = cb_withdrawal_fee + wallet_transfer_fees if cb_rebasing_needed or wallet_rebasing_needed else 0
-    trading_base_amount = buy_balance if is_cb_buy else buy_outcome
-    trading_costs = (trading_base_amount * self.CB_FEE_RATE) + pool_swap_fees + transfer_costs
+      target_size = self._size_target_qty(
+        is_cb_buy=is_cb_buy,
+        target_qty=target_qty,
+        usage=usage,
+        usdc_balance_total=usdc_balance_total,
+        eurc_balance_total=eurc_balance_total,
+        entry_price=entry_price,
+        order_book_side=order_book_side
+      )
+      if not target_size:
+        return
+      buy_balance, buy_outcome, avg_price_cb = target_size
+      trading_base_amount = buy_balance if is_cb_buy else buy_outcome
+      trading_costs = (trading_base_amount * self.CB_FEE_RATE) + fixed_costs
 
-    break_even = trading_costs / profit_raw
+      # Real Profit: Was kommt am Ende raus minus was haben wir reingesteckt minus Kosten
+      sell_price = entry_price if is_cb_buy else avg_price_cb
+      real_profit = (buy_outcome * sell_price - buy_balance) - trading_costs
 
-    # Real Profit: Was kommt am Ende raus minus was haben wir reingesteckt minus Kosten
-    sell_price = entry_price if is_cb_buy else avg_price_cb
-    real_profit = (buy_outcome * sell_price - buy_balance) - trading_costs
+    break_even = trading_costs / profit_raw
     liquidity_reference_price = entry_price if is_cb_buy else avg_price_cb
-    liquidity_pool = self.pool.get_volume_until_price(
+    liquidity_pool = await self.fetcher.fetch(partial(
+      self.pool.get_volume_until_price,
       self.pool.get_token(t_needed_wallet),
       liquidity_reference_price
-    )
+    ))
 
     self._log_opportunity_summary(
       side=side,
@@ -367,11 +433,10 @@ class UniswapArbitrageAnalyzer:
         f"profit={real_profit:.2f} USDC | pool_liquidity={liquidity_pool:.4f} {t_needed_wallet.name} | "
         f"cb_volume={cb_available_volume:.4f}"
       )
-      self.executor.queue.append(ArbitrageExecuteTask(
+      self.executor.submit(ArbitrageExecuteTask(
         coinbase=self.coinbase,
         pool=self.pool,
         wallet_service=self.wallet_service,
-        account_manager=self.account_manager,
         sell_coinbase_buy_uni=not is_cb_buy,
         t1_stat_amount=buy_balance,
         t1_expected_outcome=buy_outcome,
@@ -417,12 +482,23 @@ class UniswapArbitrageAnalyzer:
     return cb_rebasing_needed, wallet_rebasing_needed
 
 
-  def _get_balance_snapshot(self) -> tuple[dict[Tokens, float], dict[Tokens, float], dict[Tokens, float]]:
-    """Fetch account balances once to minimize REST/Node calls per arbitrage cycle."""
-    total_balances = self.account_manager.get_total_balances()
-    wallet_balances = self.account_manager.get_wallet_balances()
-    coinbase_balances = self.account_manager.get_coinbase_balances()
-    return total_balances, wallet_balances, coinbase_balances
+  def _get_order_book(self) -> OrderBook:
+    """Local websocket book when it is in sync, REST snapshot otherwise."""
+    if self.order_book_stream:
+      order_book = self.order_book_stream.get_order_book()
+      if order_book:
+        return order_book
+    return self.coinbase.get_order_book()
+
+  async def _get_balance_snapshot(self) -> tuple[dict[Tokens, float], dict[Tokens, float], dict[Tokens, float], float]:
+    """Fetch wallet and Coinbase balances and the ETH price concurrently, once per arbitrage cycle."""
+    wallet_balances, coinbase_balances, eth_price = await self.fetcher.gather(
+      self.account_manager.get_wallet_balances,
+      self.account_manager.get_coinbase_balances,
+      self.coinbase.get_eth_price
+    )
+    total_balances = self.account_manager.sum_balances(coinbase_balances, wallet_balances)
+    return total_balances, wallet_balances, coinbase_balances, eth_price
 
   @staticmethod
   def _get_needed_tokens(is_cb_buy: bool) -> tuple[Tokens, Tokens]:
@@ -460,12 +536,12 @@ class UniswapArbitrageAnalyzer:
 
     self.logger.info(f"Profit (incl. costs): {real_profit:.2f}$")
 
-  async def _send_periodic_report_if_due(self, total_balances: dict[Tokens, float], eurc_price: float):
+  async def _send_periodic_report_if_due(self, eurc_price: float):
     now_ts = datetime.now(timezone.utc).timestamp()
     if now_ts - self._last_report_ts < self.REPORT_INTERVAL_SECONDS:
       return
 
-    eth_price = self.coinbase.get_eth_price()
+    total_balances, _, _, eth_price = await self._get_balance_snapshot()
     total_profit_usdc, apr, runtime_delta = self._compute_performance_metrics(
       total_balances=total_balances,
       eurc_price=eurc_price,
@@ -549,20 +625,17 @@ class UniswapArbitrageAnalyzer:
     self.logger.info(f"Runtime: {runtime_delta}")
     self.logger.info(f"Current APR: {apr:.2f}%")
 
-  def _has_queued_task(self, task_type: type) -> bool:
-    return any(isinstance(task, task_type) for task in self.executor.queue)
-
   def _enqueue_rebalance_tasks(self, wallet_rebasing_needed: bool, cb_rebasing_needed: bool,
                                t_needed_cb: Tokens, t_needed_wallet: Tokens, eth_price: float,
                                wallet_balances: dict[Tokens, float], coinbase_balances: dict[Tokens, float]):
-    if wallet_rebasing_needed and not self._has_queued_task(WalletWithdrawalTask):
+    if wallet_rebasing_needed and not self.executor.has_task(WalletWithdrawalTask):
       wallet_bal = wallet_balances.get(t_needed_cb, 0.0)
       if wallet_bal < 100:
         self.logger.warning(
           f"Wallet balacne is too small: {wallet_bal}{t_needed_wallet.name}, check the trigger logik here ")
       dep_addr = self.coinbase.get_deposit_addresses(t_needed_cb, Network.ETH)
       self.logger.info(f"Add [WalletWithdrawalTask] to queue | token={t_needed_cb.name} | amount={wallet_bal:.4f}")
-      self.executor.queue.append(
+      self.executor.submit(
         WalletWithdrawalTask(
           wallet_service=self.wallet_service,
           send_token=self.pool.get_token(t_needed_cb),
@@ -572,13 +645,13 @@ class UniswapArbitrageAnalyzer:
           amount=wallet_bal
         ))
 
-    if cb_rebasing_needed and not self._has_queued_task(CoinbaseWithdrawalTask):
+    if cb_rebasing_needed and not self.executor.has_task(CoinbaseWithdrawalTask):
       cb_bal = coinbase_balances.get(t_needed_wallet, 0.0)
       if cb_bal < 100:
         self.logger.warning(
           f"Coinbase balacne is too small: {cb_bal}{t_needed_cb.name}, check the trigger logik here ")
       self.logger.info(f"Add [CoinbaseWithdrawalTask] to queue | token={t_needed_wallet.name} | amount={cb_bal * 0.99:.4f}")
-      self.executor.queue.append(
+      self.executor.submit(
         CoinbaseWithdrawalTask(
           coinbase=self.coinbase,
           wallet_service=self.wallet_service,
@@ -1,18 +1,18 @@
 import math
 import os
-from math import sqrt
 from time import sleep
 
 import dotenv
 from eth_account import Account
 from eth_account.signers.local import LocalAccount
-from web3 import Web3
 
 from blockchain.AbiService import AbiService
 from blockchain.Contract import Contract
+from blockchain.Web3Provider import Web3Provider
 from blockchain.uniswap.NoneFungibleTokenManager import NoneFungibleTokenManager
 from blockchain.uniswap.Pool import Pool
 from blockchain.uniswap.QuoterV3 import QuoterV3
+from blockchain.uniswap.SqrtPriceMath import SqrtPriceMath
 from common.logger import get_logger
 from database.repositories import IndexedBlockRepository, PositionRepository
 
@@ -25,11 +25,11 @@ class UniswapPositionAnalyzer:
     self.abi_service = AbiService()
     self.db = db
     self.runtime_state = runtime_state
-    self.w3 = Web3(Web3.HTTPProvider(os.getenv("RPC_URL")))
+    self.w3 = Web3Provider.get_web3()
     self.pool = Pool("0x95DBB3C7546F22BCE375900AbFdd64a4E5bD73d6")
     self.account: LocalAccount = Account.from_key(os.getenv("PRIVATE_KEY"))
-    self.nftm = NoneFungibleTokenManager(Contract.NFTM.to_address(self.w3.eth.chain_id))
-    self.quoter_v3 = QuoterV3(Contract.UNISWAP_V3_QUOTER.to_address(self.w3.eth.chain_id))
+    self.nftm = NoneFungibleTokenManager(Contract.NFTM.to_address(Web3Provider.get_chain_id()))
+    self.quoter_v3 = QuoterV3(Contract.UNISWAP_V3_QUOTER.to_address(Web3Provider.get_chain_id()))
 
     self.block_status = None
     self.position_repo = None
@@ -66,28 +66,26 @@ class UniswapPositionAnalyzer:
     slot0 = self.pool.pool_contract.functions.slot0().call()
     sqrt_price_x96 = slot0[0]
 
-    # 2. Convert Ticks to sqrtPrice
-    # tick_to_sqrt_price formula: sqrt(1.0001^tick) * 2^96
-    sqrt_p = sqrt_price_x96 / (2 ** 96)
-    sqrt_p_lower = sqrt(1.0001 ** position.tick_lower)
-    sqrt_p_upper = sqrt(1.0001 ** position.tick_upper)
+    # 2. Convert Ticks to sqrtPrice (exact getSqrtRatioAtTick values, Q64.96)
+    sqrt_p_lower = self.pool.sqrt_price_table.get_sqrt_ratio_at_tick(position.tick_lower)
+    sqrt_p_upper = self.pool.sqrt_price_table.get_sqrt_ratio_at_tick(position.tick_upper)
 
-    # 3. Calculate Amounts based on range
+    # 3. Calculate Amounts based on range (LiquidityAmounts.getAmountsForLiquidity)
     liquidity = position.liquidity
 
     amount0 = 0
     amount1 = 0
 
-    if sqrt_p < sqrt_p_lower:
+    if sqrt_price_x96 <= sqrt_p_lower:
       # Out of range (Price too low) -> 100% Token0
-      amount0 = liquidity * (sqrt_p_upper - sqrt_p_lower) / (sqrt_p_lower * sqrt_p_upper)
-    elif sqrt_p > sqrt_p_upper:
+      amount0 = SqrtPriceMath.get_amount0_delta(sqrt_p_lower, sqrt_p_upper, liquidity, False)
+    elif sqrt_price_x96 >= sqrt_p_upper:
       # Out of range (Price too high) -> 100% Token1
-      amount1 = liquidity * (sqrt_p_upper - sqrt_p_lower)
+      amount1 = SqrtPriceMath.get_amount1_delta(sqrt_p_lower, sqrt_p_upper, liquidity, False)
     else:
       # In range -> Mixed
-      amount0 = liquidity * (sqrt_p_upper - sqrt_p) / (sqrt_p * sqrt_p_upper)
-      amount1 = liquidity * (sqrt_p - sqrt_p_lower)
+      amount0 = SqrtPriceMath.get_amount0_delta(sqrt_price_x96, sqrt_p_upper, liquidity, False)
+      amount1 = SqrtPriceMath.get_amount1_delta(sqrt_p_lower, sqrt_price_x96, liquidity, False)
 
     return amount0, amount1
 
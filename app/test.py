@@ -101,12 +101,12 @@ async def main():
 
   pool = Pool(EURO_USDC_UNI_V3_POOL_ADDRESS)
 
-  # pool_swap_fees = await pool.get_swap_costs(pool.token1.token, 1, 0)
+  # pool_swap_fees = pool.get_swap_costs(pool.token1.token, 1, 0)
   order = coinbase.create_order("buy", "limit", 1, 0.99)
   test1 = await  coinbase.wait_order_filled(order['id'], 120)
-  test2 = await pool.swap(Tokens.EURC, 2417.118612910428, 2800)
+  test2 = pool.swap(Tokens.EURC, 2417.118612910428, 2800)
 
-  test = await coinbase.estimate_withdrawal_fees(Tokens.ETH)
+  test = coinbase.estimate_withdrawal_fees(Tokens.ETH)
   logger.info(test)
 
   # task = CoinbaseWithdrawalTask(
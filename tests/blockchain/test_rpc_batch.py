@@ -0,0 +1,94 @@
+import pytest
+
+pytest.importorskip("web3")
+
+from web3 import Web3
+from web3.providers.base import BaseProvider
+
+from blockchain.RpcBatch import RpcBatch, RpcBatchError
+
+
+class StubBatchProvider(BaseProvider):
+  """Answers every JSON-RPC batch with respond(requests) and records the batches."""
+
+  def __init__(self, respond):
+    super().__init__()
+    self.respond = respond
+    self.batches: list[list[tuple[str, list]]] = []
+
+  def make_batch_request(self, requests):
+    self.batches.append(list(requests))
+    return self.respond(requests)
+
+
+def echo_block_numbers(requests):
+  return [{"jsonrpc": "2.0", "id": i, "result": params[0]} for i, (_, params) in enumerate(requests)]
+
+
+def test_entry_errors_only_fail_their_own_result():
+  w3 = Web3(StubBatchProvider(lambda requests: [
+    {"jsonrpc": "2.0", "id": 0, "result": {"hash": "0xaa"}},
+    {"jsonrpc": "2.0", "id": 1, "error": {"code": -32000, "message": "header not found"}},
+    {"jsonrpc": "2.0", "id": 2, "result": None},
+    {"jsonrpc": "2.0", "id": 3, "result": "0x2a"},
+  ]))
+  batch = RpcBatch(w3)
+  batch.add_block_hash(1)
+  batch.add_block_hash(2)
+  batch.add_block_hash(3)
+  batch.add("eth_blockNumber", [], lambda raw: int(raw, 16))
+
+  first, failed, missing, number = batch.execute()
+
+  assert first.ok and first.unwrap() == "0xaa"
+  assert not failed.ok
+  with pytest.raises(RpcBatchError, match="header not found"):
+    failed.unwrap()
+  # A block the node doesn't have is a result, not an error
+  assert missing.ok and missing.unwrap() is None
+  assert number.unwrap() == 42
+  assert [method for method, _ in w3.provider.batches[0]] == [
+    "eth_getBlockByNumber", "eth_getBlockByNumber", "eth_getBlockByNumber", "eth_blockNumber"]
+
+
+def test_undecodable_result_is_an_entry_error():
+  w3 = Web3(StubBatchProvider(lambda requests: [{"jsonrpc": "2.0", "id": 0, "result": "not hex"}]))
+  batch = RpcBatch(w3)
+  batch.add("eth_blockNumber", [], lambda raw: int(raw, 16))
+
+  (result,) = batch.execute()
+
+  assert not result.ok
+  with pytest.raises(RpcBatchError, match="Undecodable"):
+    result.unwrap()
+
+
+def test_rejected_batch_raises():
+  w3 = Web3(StubBatchProvider(lambda requests: {
+    "jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "batch requests not supported"}}))
+  batch = RpcBatch(w3)
+  batch.add_block_hash(1)
+
+  with pytest.raises(RpcBatchError, match="batch requests not supported"):
+    batch.execute()
+
+
+def test_response_count_mismatch_raises():
+  w3 = Web3(StubBatchProvider(lambda requests: echo_block_numbers(requests)[:1]))
+  batch = RpcBatch(w3)
+  batch.add("eth_getBlockByNumber", ["0x1", False])
+  batch.add("eth_getBlockByNumber", ["0x2", False])
+
+  with pytest.raises(RpcBatchError, match="1 responses for 2 requests"):
+    batch.execute()
+
+
+def test_entries_past_max_batch_size_go_out_in_order_in_several_batches():
+  w3 = Web3(StubBatchProvider(echo_block_numbers))
+  count = RpcBatch.MAX_BATCH_SIZE * 2 + 1
+  with RpcBatch(w3) as batch:
+    indexes = [batch.add("eth_getBlockByNumber", [hex(number), False]) for number in range(count)]
+
+  assert indexes == list(range(count))
+  assert [len(sent) for sent in w3.provider.batches] == [RpcBatch.MAX_BATCH_SIZE, RpcBatch.MAX_BATCH_SIZE, 1]
+  assert [result.unwrap() for result in batch.results] == [hex(number) for number in range(count)]
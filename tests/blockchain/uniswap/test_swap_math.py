@@ -0,0 +1,42 @@
+from decimal import Decimal, ROUND_FLOOR, localcontext
+
+from blockchain.uniswap.SqrtPriceMath import SqrtPriceMath
+from blockchain.uniswap.SwapMath import SwapMath
+
+E18 = 10 ** 18
+
+
+def encode_price_sqrt(reserve1: int, reserve0: int) -> int:
+  """sqrt(reserve1 / reserve0) as Q64.96, like encodePriceSqrt of the v3-core tests."""
+  with localcontext() as context:
+    context.prec = 80
+    return int(((Decimal(reserve1) / Decimal(reserve0)).sqrt() * (1 << 96)).to_integral_value(ROUND_FLOOR))
+
+
+def test_amount_deltas_price_1_to_1_21():
+  low, high = encode_price_sqrt(1, 1), encode_price_sqrt(121, 100)
+  assert SqrtPriceMath.get_amount0_delta(low, high, E18, True) == 90909090909090910
+  assert SqrtPriceMath.get_amount0_delta(low, high, E18, False) == 90909090909090909
+  assert SqrtPriceMath.get_amount1_delta(low, high, E18, True) == 100000000000000000
+  assert SqrtPriceMath.get_amount1_delta(low, high, E18, False) == 99999999999999999
+
+
+def test_exact_in_capped_at_price_target_one_for_zero():
+  price, target = encode_price_sqrt(1, 1), encode_price_sqrt(101, 100)
+  sqrt_next, amount_in, amount_out, fee_amount = SwapMath.compute_swap_step(price, target, 2 * E18, E18, 600)
+
+  assert sqrt_next == target
+  assert amount_in == 9975124224178055
+  assert amount_out == 9925619580021728
+  assert fee_amount == 5988667735148
+  assert amount_in + fee_amount < E18
+
+
+def test_exact_out_fully_received_one_for_zero():
+  price, target = encode_price_sqrt(1, 1), encode_price_sqrt(10000, 100)
+  sqrt_next, amount_in, amount_out, fee_amount = SwapMath.compute_swap_step(price, target, 2 * E18, -E18, 600)
+
+  assert sqrt_next < target
+  assert amount_in == 2 * E18
+  assert amount_out == E18
+  assert fee_amount == 1200720432259356
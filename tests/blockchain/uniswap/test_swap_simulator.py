@@ -0,0 +1,60 @@
+import pytest
+
+# PoolMirror imports web3
+pytest.importorskip("web3")
+
+from blockchain.uniswap.PoolMirror import PoolMirror
+from blockchain.uniswap.SwapMath import SwapMath
+from blockchain.uniswap.SwapSimulator import SwapSimulator
+from blockchain.uniswap.TickMath import TickMath
+
+E18 = 10 ** 18
+FEE = 600
+
+
+def make_mirror(tick_spacing: int = 10, liquidity: int = 2 * E18) -> PoolMirror:
+  """Mirror at price 1 with liquidity over the whole range and no initialized ticks, no node needed."""
+  mirror = PoolMirror.__new__(PoolMirror)
+  mirror.tick_spacing = tick_spacing
+  mirror.sqrt_price_x96 = TickMath.get_sqrt_ratio_at_tick(0)
+  mirror.tick = 0
+  mirror.liquidity = liquidity
+  mirror.words = {}
+  mirror.liquidity_gross = {}
+  mirror.liquidity_net = {}
+  mirror.synced_block = 1
+  return mirror
+
+
+def test_exact_in_within_one_step_matches_swap_math():
+  mirror = make_mirror()
+  limit = TickMath.get_sqrt_ratio_at_tick(100)
+  result = SwapSimulator(mirror, FEE).swap(zero_for_one=False, amount_specified=E18, sqrt_price_limit_x96=limit)
+
+  sqrt_next, amount_in, amount_out, fee_amount = SwapMath.compute_swap_step(
+    mirror.sqrt_price_x96, limit, mirror.liquidity, E18, FEE)
+  assert result.sqrt_price_x96_after == sqrt_next == limit
+  assert result.amount1 == amount_in + fee_amount
+  assert result.amount0 == -amount_out
+  assert result.tick_after == 100
+  assert result.initialized_ticks_crossed == 0
+
+
+def test_exact_out_quote_buys_at_least_the_output():
+  simulator = SwapSimulator(make_mirror(), FEE)
+  amount_out = E18 // 10
+  amount_in = simulator.quote_exact_output_single(zero_for_one=True, amount_out=amount_out)
+
+  assert amount_in > amount_out
+  assert simulator.quote_exact_input_single(zero_for_one=True, amount_in=amount_in) >= amount_out
+
+
+def test_crossing_an_initialized_tick_removes_its_liquidity():
+  mirror = make_mirror()
+  # Position from tick -100 to 100 on top of the range-wide liquidity
+  mirror.apply_mint(-100, 100, E18)
+  simulator = SwapSimulator(mirror, FEE)
+  result = simulator.swap(zero_for_one=False, amount_specified=10 * E18)
+
+  assert result.initialized_ticks_crossed == 1
+  assert result.liquidity_after == 2 * E18
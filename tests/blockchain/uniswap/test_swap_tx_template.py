@@ -0,0 +1,60 @@
+import pytest
+
+# SwapTxTemplate and the reference RouterCodec encoding import web3
+pytest.importorskip("web3")
+pytest.importorskip("uniswap_universal_router_decoder")
+
+from uniswap_universal_router_decoder import FunctionRecipient, RouterCodec
+from web3 import Web3
+
+from blockchain.GasOracle import GasSnapshot
+from blockchain.uniswap.SwapTxTemplate import SwapTxTemplate
+
+ROUTER = "0x66a9893cC07D91D95644AEDD05D03f95e1dBA8Af"
+SENDER = "0x1111111111111111111111111111111111111111"
+USDC = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"
+EURC = "0x1aBaEA1f7C830bD89Acc67eC4af516284b1bC33c"
+FEE = 100
+DEADLINE = 1_900_000_000
+GAS = GasSnapshot(block_number=1, base_fee=10 ** 9, next_base_fee=10 ** 9, priority_fee=10 ** 8, fetched_at=0.0)
+
+
+def router_calldata(token_in: str, token_out: str, amount_in: int, amount_out_min: int) -> str:
+  """The execute() calldata Pool.prepare_order_tx builds with the router codec."""
+  return (
+    RouterCodec(Web3())
+    .encode
+    .chain()
+    .v3_swap_exact_in(
+      function_recipient=FunctionRecipient.SENDER,
+      amount_in=amount_in,
+      amount_out_min=amount_out_min,
+      path=[token_in, FEE, token_out],
+      custom_recipient=None,
+      payer_is_sender=True
+    )
+    .build(deadline=DEADLINE)
+  )
+
+
+@pytest.mark.parametrize("token_in, token_out, amount_in, amount_out_min", [
+  (USDC, EURC, 1_234_567_891, 1_050_000_123),
+  (EURC, USDC, 987_654_321, 1_150_000_999),
+])
+def test_patched_calldata_matches_the_router_encoding(token_in, token_out, amount_in, amount_out_min):
+  template = SwapTxTemplate(
+    router_address=ROUTER, sender=SENDER, chain_id=1, token_in=token_in, fee=FEE, token_out=token_out)
+  tx = template.build(amount_in, amount_out_min, GAS, gas_used=150_000, deadline=DEADLINE)
+
+  assert bytes.fromhex(tx["data"][2:]) == bytes.fromhex(router_calldata(token_in, token_out, amount_in, amount_out_min)[2:])
+  assert tx["to"] == ROUTER
+  assert tx["value"] == 0
+
+
+def test_template_is_reusable_across_trades():
+  template = SwapTxTemplate(
+    router_address=ROUTER, sender=SENDER, chain_id=1, token_in=USDC, fee=FEE, token_out=EURC)
+  template.build(10 ** 12, 10 ** 12, GAS, gas_used=150_000, deadline=DEADLINE + 1)
+  tx = template.build(5, 4, GAS, gas_used=150_000, deadline=DEADLINE)
+
+  assert bytes.fromhex(tx["data"][2:]) == bytes.fromhex(router_calldata(USDC, EURC, 5, 4)[2:])
@@ -0,0 +1,55 @@
+import pytest
+
+from blockchain.uniswap.SqrtPriceTable import SqrtPriceTable
+from blockchain.uniswap.TickMath import TickMath
+
+# getSqrtRatioAtTick values of the on-chain library (Uniswap v3-core TickMath spec)
+ON_CHAIN_SQRT_RATIOS = {
+  0: 79228162514264337593543950336,
+  50: 79426470787362580746886972461,
+  100: 79625275426524748796330556128,
+  250: 80224679980005306637834519095,
+  500: 81233731461783161732293370115,
+}
+
+
+@pytest.mark.parametrize("tick, sqrt_ratio", ON_CHAIN_SQRT_RATIOS.items())
+def test_sqrt_ratio_matches_chain(tick, sqrt_ratio):
+  assert TickMath.get_sqrt_ratio_at_tick(tick) == sqrt_ratio
+
+
+def test_bounds():
+  assert TickMath.get_sqrt_ratio_at_tick(TickMath.MIN_TICK) == TickMath.MIN_SQRT_RATIO
+  assert TickMath.get_sqrt_ratio_at_tick(TickMath.MAX_TICK) == TickMath.MAX_SQRT_RATIO
+  assert TickMath.get_tick_at_sqrt_ratio(TickMath.MIN_SQRT_RATIO) == TickMath.MIN_TICK
+  assert TickMath.get_tick_at_sqrt_ratio(TickMath.MAX_SQRT_RATIO - 1) == TickMath.MAX_TICK - 1
+
+
+def test_out_of_range():
+  with pytest.raises(ValueError):
+    TickMath.get_sqrt_ratio_at_tick(TickMath.MAX_TICK + 1)
+  with pytest.raises(ValueError):
+    TickMath.get_sqrt_ratio_at_tick(TickMath.MIN_TICK - 1)
+  with pytest.raises(ValueError):
+    TickMath.get_tick_at_sqrt_ratio(TickMath.MIN_SQRT_RATIO - 1)
+  with pytest.raises(ValueError):
+    TickMath.get_tick_at_sqrt_ratio(TickMath.MAX_SQRT_RATIO)
+
+
+@pytest.mark.parametrize("tick", [TickMath.MIN_TICK, -200_000, -50, -1, 0, 1, 49, 50, 200_000, TickMath.MAX_TICK - 1])
+def test_tick_sqrt_round_trip(tick):
+  sqrt_ratio = TickMath.get_sqrt_ratio_at_tick(tick)
+  assert TickMath.get_tick_at_sqrt_ratio(sqrt_ratio) == tick
+  # Just below a tick's ratio is still the tick below
+  if tick > TickMath.MIN_TICK:
+    assert TickMath.get_tick_at_sqrt_ratio(sqrt_ratio - 1) == tick - 1
+
+
+def test_sqrt_price_table_matches_tick_math():
+  table = SqrtPriceTable(tick_spacing=10)
+  table.warm([-1000, 0, 600])
+  assert len(table) == 3
+  for tick in (TickMath.MIN_TICK, -1000, 0, 600, 7, TickMath.MAX_TICK):
+    assert table.get_sqrt_ratio_at_tick(tick) == TickMath.get_sqrt_ratio_at_tick(tick)
+  # Misses are computed once and kept
+  assert len(table) == 6
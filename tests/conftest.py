@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Modules import each other relative to app/ (e.g. `from blockchain.uniswap.TickMath import TickMath`)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+# Required settings of Configurations, the tests never reach a node or an exchange
+os.environ.setdefault("DEFAULT_TIMEOUT_ORDERS", "60")
+os.environ.setdefault("SLIPPAGE", "0.005")
@@ -0,0 +1,120 @@
+import json
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+# IndexerService imports web3 and sqlalchemy
+pytest.importorskip("web3")
+pytest.importorskip("sqlalchemy")
+
+from eth_utils.abi import get_abi_output_types
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.datastructures import AttributeDict
+from web3.providers.base import BaseProvider
+
+from blockchain.uniswap.TickMath import TickMath
+from services.IndexerService import IndexerService, RangeLogs
+
+ABI_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "app", "abis")
+NFPM_ADDRESS = "0xC36442b4a4522E871399CD717aBDD847Ab11FE88"
+POOL_ADDRESS = "0x95DBB3C7546F22BCE375900AbFdd64a4E5bD73d6"
+TOKEN_ID = 1234
+MINT_BLOCK = 24500000
+
+
+class StubBatchProvider(BaseProvider):
+  """Answers JSON-RPC batches with queued raw results and records the requests."""
+
+  def __init__(self, results: list[str]):
+    super().__init__()
+    self.results = results
+    self.requests: list[tuple[str, list]] = []
+
+  def make_batch_request(self, requests):
+    self.requests.extend(requests)
+    return [{"jsonrpc": "2.0", "id": i, "result": result} for i, result in enumerate(self.results)]
+
+
+def load_abi(name: str) -> list:
+  with open(os.path.join(ABI_DIR, f"{name}.json")) as f:
+    return json.load(f)
+
+
+def encode_result(w3: Web3, function, values: list) -> str:
+  return "0x" + w3.codec.encode(get_abi_output_types(function.abi), values).hex()
+
+
+def make_indexer(w3: Web3) -> IndexerService:
+  """IndexerService with stub repositories, no node or database needed."""
+  indexer = IndexerService.__new__(IndexerService)
+  indexer.logger = MagicMock()
+  indexer.w3 = w3
+  indexer.nftm = SimpleNamespace(contract=w3.eth.contract(address=NFPM_ADDRESS, abi=load_abi("NFPM")))
+  indexer.pool = SimpleNamespace(
+    pool_contract=w3.eth.contract(address=POOL_ADDRESS, abi=load_abi("Pool")),
+    token0=SimpleNamespace(decimals=6, format=str),
+    token1=SimpleNamespace(decimals=6, format=str),
+  )
+  indexer.event_handlers = {
+    "IncreaseLiquidity": indexer.handle_increase_liquidity,
+    "DecreaseLiquidity": indexer.handle_decrease_liquidity,
+    "Collect": indexer.handle_collect,
+  }
+  indexer.session = MagicMock()
+  indexer.block_repo = MagicMock()
+  indexer.range_repo = MagicMock()
+  indexer.mint_repo = MagicMock()
+  indexer.collect_repo = MagicMock()
+  indexer.position_repo = MagicMock()
+  indexer.position_repo.get_by_token_ids.return_value = []
+  indexer.position_repo.upsert_many.return_value = {TOKEN_ID: 1}
+  return indexer
+
+
+def test_apply_range_creates_a_minted_position():
+  w3 = Web3(StubBatchProvider([]))
+  indexer = make_indexer(w3)
+  positions = indexer.nftm.contract.functions.positions(TOKEN_ID)
+  slot0 = indexer.pool.pool_contract.functions.slot0()
+  w3.provider.results = [
+    encode_result(w3, positions, [0, NFPM_ADDRESS, POOL_ADDRESS, POOL_ADDRESS, 100, -10, 10, 5000, 0, 0, 0, 0]),
+    encode_result(w3, slot0, [TickMath.get_sqrt_ratio_at_tick(0), 0, 0, 1, 1, 0, True]),
+  ]
+  mint = AttributeDict({
+    "event": "IncreaseLiquidity",
+    "args": AttributeDict({"tokenId": TOKEN_ID, "liquidity": 5000, "amount0": 100, "amount1": 200}),
+    "transactionHash": HexBytes("0x" + "ab" * 32),
+    "blockNumber": MINT_BLOCK,
+  })
+
+  indexer.apply_range(RangeLogs(from_block=MINT_BLOCK, to_block=MINT_BLOCK + 9, events=[mint], block_hash="0x01"))
+
+  # positions() and slot0 at the mint block went out in one batch
+  assert [method for method, _ in w3.provider.requests] == ["eth_call", "eth_call"]
+  assert w3.provider.requests[1][1][1] == hex(MINT_BLOCK)
+  indexer.position_repo.upsert_many.assert_called_once_with([{
+    "token_id": TOKEN_ID,
+    "deposited_amount0": 100,
+    "deposited_amount1": 200,
+    "current_amount0": 100,
+    "current_amount1": 200,
+    "liquidity": 5000,
+    "tick_lower": -10,
+    "tick_upper": 10,
+    "is_active": True,
+  }])
+  indexer.mint_repo.insert_many.assert_called_once_with([{
+    "tx_hash": "ab" * 32,
+    "token_id": TOKEN_ID,
+    "liquidity": 5000,
+    "amount0": 100,
+    "amount1": 200,
+    "tick_lower": -10,
+    "tick_upper": 10,
+  }])
+  indexer.block_repo.set_latest.assert_called_once_with(MINT_BLOCK + 9, commit=False)
+  indexer.session.commit.assert_called_once()
+  indexer.session.rollback.assert_not_called()